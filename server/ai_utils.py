@@ -1,10 +1,57 @@
 import os
 import json
+import time
 from openai import OpenAI
+from classification_cache import cached_classification
+from local_classifier import local_first
+from resilience import call_with_resilience, CircuitOpenError
+from telemetry import telemetry
 
 # Initialize OpenAI client
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+# Without a timeout a hung request would hold a web or worker thread indefinitely.
+# Retries are left to call_with_resilience so they share one deadline.
+# OPENAI_BASE_URL points it elsewhere, e.g. at fake_openai.py for offline load tests.
+client = OpenAI(
+    api_key=os.environ.get("OPENAI_API_KEY"),
+    base_url=os.environ.get("OPENAI_BASE_URL") or None,
+    timeout=float(os.environ.get("OPENAI_TIMEOUT", 20)),
+    max_retries=0,
+)
 
+
+def _complete(kind, **kwargs):
+    """Make a chat completion through the resilience layer and record its telemetry."""
+    started = time.perf_counter()
+    try:
+        response = call_with_resilience(client.chat.completions.create, **kwargs)
+    except CircuitOpenError:
+        telemetry.record(kind, time.perf_counter() - started, outcome='short_circuited')
+        raise
+    except Exception:
+        telemetry.record(kind, time.perf_counter() - started, outcome='error')
+        raise
+    usage = response.usage
+    telemetry.record(
+        kind, time.perf_counter() - started, model=response.model,
+        prompt_tokens=usage.prompt_tokens if usage else 0,
+        completion_tokens=usage.completion_tokens if usage else 0,
+    )
+    return response
+
+
+# Categories used in the classification prompts
+DISASTER_TYPES = [
+    "Fire", "Flood", "Earthquake", "Hurricane", "Tornado", "Drought", "Landslide",
+    "Tsunami", "Volcanic Eruption", "Winter Storm", "Wildfire", "Epidemic", "Other",
+]
+SEVERITY_LEVELS = ["Minor", "Moderate", "Severe"]
+
+# Bump when a prompt or model changes so cached answers from the old one are not reused
+TYPE_PROMPT_VERSION = "type-v1"
+SEVERITY_PROMPT_VERSION = "severity-v1"
+REPORT_PROMPT_VERSION = "report-v1"
+
+@cached_classification('type', TYPE_PROMPT_VERSION)
 def classify_disaster_type(description):
     """
     Uses OpenAI API to classify the disaster type based on the description.
@@ -20,7 +67,8 @@ def classify_disaster_type(description):
         }
     """
     try:
-        response = client.chat.completions.create(
+        response = _complete(
+            'type',
             model="gpt-3.5-turbo",
             messages=[
                 {
@@ -73,6 +121,7 @@ Example:
             explanation = result.get('explanation', 'No explanation provided')
         except json.JSONDecodeError:
             # Fallback if JSON parsing fails
+            telemetry.record_parse_failure('type')
             disaster_type = result_text.split('\n')[0] if result_text else 'Other'
             confidence = 0.5
             explanation = "Unable to parse AI response"
@@ -95,6 +144,7 @@ Example:
         }
 
 
+@cached_classification('severity', SEVERITY_PROMPT_VERSION)
 def classify_severity(description):
     """
     Uses OpenAI API to classify the severity of the disaster based on the description.
@@ -110,7 +160,8 @@ def classify_severity(description):
         }
     """
     try:
-        response = client.chat.completions.create(
+        response = _complete(
+            'severity',
             model="gpt-3.5-turbo",
             messages=[
                 {
@@ -153,6 +204,7 @@ Example:
             explanation = result.get('explanation', 'No explanation provided')
         except json.JSONDecodeError:
             # Fallback if JSON parsing fails
+            telemetry.record_parse_failure('severity')
             severity = result_text.split('\n')[0] if result_text else 'Moderate'
             confidence = 0.5
             explanation = "Unable to parse AI response"
@@ -173,3 +225,79 @@ Example:
             'confidence': 0.0,
             'explanation': f'Classification failed: {str(e)}'
         }
+
+
+@local_first
+@cached_classification('report', REPORT_PROMPT_VERSION)
+def classify_report(description):
+    """
+    Uses a single OpenAI call to classify both the disaster type and its severity.
+
+    Falls back to classify_disaster_type / classify_severity if the combined
+    response cannot be parsed, and to the same "Other" / "Moderate" results
+    they use if the API call itself fails.
+    
+    Args:
+        description (str): The disaster description text
+        
+    Returns:
+        tuple: (type_result, severity_result) in the same shape as
+        classify_disaster_type and classify_severity return
+    """
+    try:
+        response = _complete(
+            'report',
+            model="gpt-3.5-turbo",
+            messages=[
+                {
+                    "role": "system",
+                    "content": f"""You are a disaster classification and severity assessment expert.
+Classify the disaster into ONE type: {", ".join(DISASTER_TYPES)}.
+Classify the severity into ONE level:
+- Minor: limited impact, contained, minimal damage
+- Moderate: some damage, affects a limited area
+- Severe: catastrophic, widespread, life-threatening
+
+Return ONLY a JSON object:
+{{"type": "Wildfire", "type_confidence": 0.92, "type_explanation": "brief reason",
+"severity": "Severe", "severity_confidence": 0.88, "severity_explanation": "brief reason"}}"""
+                },
+                {
+                    "role": "user",
+                    "content": f"Classify this disaster report: {description}"
+                }
+            ],
+            temperature=0.3,
+            max_tokens=200
+        )
+        
+        result_text = response.choices[0].message.content.strip()
+        
+    except Exception as e:
+        print(f"[OpenAI Error] Failed to classify report: {str(e)}")
+        return (
+            {'type': 'Other', 'confidence': 0.0, 'explanation': f'Classification failed: {str(e)}'},
+            {'severity': 'Moderate', 'confidence': 0.0, 'explanation': f'Classification failed: {str(e)}'},
+        )
+
+    try:
+        result = json.loads(result_text)
+        type_result = {
+            'type': result['type'],
+            'confidence': float(result.get('type_confidence', 0.5)),
+            'explanation': result.get('type_explanation', 'No explanation provided')
+        }
+        severity_result = {
+            'severity': result['severity'],
+            'confidence': float(result.get('severity_confidence', 0.5)),
+            'explanation': result.get('severity_explanation', 'No explanation provided')
+        }
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        # Combined answer unusable: fall back to the two single-purpose prompts
+        telemetry.record_parse_failure('report')
+        print("[OpenAI] Could not parse combined classification, falling back to separate calls")
+        return classify_disaster_type(description), classify_severity(description)
+
+    print(f"[OpenAI] Classified report: {type_result['type']} / {severity_result['severity']} "
+          f"(confidence: {type_result['confidence']} / {severity_result['confidence']})")
+    return type_result, severity_result
@@ -3,14 +3,15 @@
 # Standard library imports
 
 # Remote library imports
-from flask import request, send_from_directory, current_app
+from flask import request
 from flask_restful import Resource
 
 # Local imports
 from config import app, db, api
 # Add your model imports
-from routes import auth_route, report_route, admin_route, admin_auth_route, reset_password_route
+from routes import auth_route, report_route, admin_route, admin_auth_route, reset_password_route, upload_route
 from cloudinary_config import is_cloudinary_configured
+from upload_serving import serve_upload
 
 # Check Cloudinary configuration on startup
 print("\n" + "="*60)
@@ -33,10 +34,10 @@ def uploaded_file(filename):
     """Serve files saved in the UPLOAD_FOLDER directory.
 
     This allows the client to request /uploads/<filename> and receive the
-    saved image. In production, it's better to have a web server serve
-    static files or configure a dedicated static folder.
+    saved image. In production, set UPLOAD_SERVING so the fronting web
+    server sends the bytes instead of a worker (see upload_serving.py).
     """
-    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
+    return serve_upload(filename)
 
 
 # Views go here!
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark SerializerMixin.to_dict against the precompiled to_fast_dict.
+
+Builds a throwaway in-memory database, serializes every object both ways,
+checks that the JSON output is byte-identical and prints the per-object cost.
+
+Usage: python bench_serializers.py [num_reports]
+"""
+import os
+import sys
+import json
+import time
+from datetime import datetime, timezone, timedelta
+
+# Never touch a real database from a benchmark
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from config import app, db
+from models import User, Admin, Report, Donation
+from fieldsets import REPORT_FIELDS
+
+
+def build_data(num_reports):
+    users = []
+    for i in range(20):
+        user = User(username=f"user{i}", email=f"user{i}@example.com")
+        user.password_hash = "password123"
+        users.append(user)
+    db.session.add_all(users)
+
+    admin = Admin(username="admin", email="admin@example.com")
+    admin.password_hash = "admin123"
+    db.session.add(admin)
+
+    now = datetime.now(timezone.utc)
+    for i in range(num_reports):
+        report = Report(
+            type="Flood",
+            location=f"Nairobi, Estate {i}",
+            description="Heavy rains have flooded homes and roads. " * 5,
+            severity=("Minor", "Moderate", "Severe")[i % 3],
+            reporter_name=f"user{i % 20}",
+            type_confidence=0.9,
+            type_explanation="Mentions flooding",
+            severity_confidence=0.8,
+            severity_explanation="Homes affected",
+            date=now - timedelta(minutes=i),
+            user=users[i % 20] if i % 4 else None,
+        )
+        for j in range(i % 4):
+            report.donations.append(Donation(
+                full_name=f"Donor {j}", email=f"donor{j}@example.com", phone="0700000000",
+                type="Money", amount="KES 1,000", amount_number=1000.0,
+            ))
+        db.session.add(report)
+    db.session.commit()
+
+
+def bench(label, objects, slow, fast, repeat=3):
+    for obj in objects:
+        expected = json.dumps(slow(obj), sort_keys=True)
+        actual = json.dumps(fast(obj), sort_keys=True)
+        if expected != actual:
+            print(f"❌ {label}: output differs for {obj!r}")
+            print(f"   to_dict:      {expected[:200]}")
+            print(f"   to_fast_dict: {actual[:200]}")
+            sys.exit(1)
+
+    def per_object(fn):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for obj in objects:
+                fn(obj)
+            best = min(best, time.perf_counter() - start)
+        return best / len(objects) * 1e6
+
+    slow_us = per_object(slow)
+    fast_us = per_object(fast)
+    print(f"{label:<28} {slow_us:>10.1f} µs {fast_us:>10.1f} µs {slow_us / fast_us:>8.1f}x")
+
+
+def main():
+    num_reports = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    list_fields = ("id", "type", "location", "severity", "date", "image")
+
+    with app.app_context():
+        db.create_all()
+        build_data(num_reports)
+
+        reports = Report.query.all()
+        donations = Donation.query.all()
+        users = User.query.all()
+        admins = Admin.query.all()
+
+        print(f"\nSerializing {len(reports)} reports, {len(donations)} donations, {len(users)} users\n")
+        print(f"{'case':<28} {'to_dict':>13} {'to_fast_dict':>13} {'speedup':>9}")
+        print("-" * 66)
+        bench("Report (default)", reports, lambda r: r.to_dict(), lambda r: r.to_fast_dict())
+        bench("Report (list fields)", reports,
+              lambda r: r.to_dict(only=list_fields), lambda r: r.to_fast_dict(only=list_fields))
+        bench("Report (list + donations)", reports,
+              lambda r: r.to_dict(only=list_fields + ("donations",)),
+              lambda r: r.to_fast_dict(only=list_fields + ("donations",)))
+        bench("Report (all columns)", reports,
+              lambda r: r.to_dict(only=REPORT_FIELDS), lambda r: r.to_fast_dict(only=REPORT_FIELDS))
+        bench("Donation (default)", donations, lambda d: d.to_dict(), lambda d: d.to_fast_dict())
+        bench("User (default)", users, lambda u: u.to_dict(), lambda u: u.to_fast_dict())
+        bench("Admin (default)", admins, lambda a: a.to_dict(), lambda a: a.to_fast_dict())
+        print("\n✅ Output is byte-identical for every object\n")
+
+
+if __name__ == "__main__":
+    main()
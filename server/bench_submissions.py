@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of POST /reports against the fake OpenAI server.
+
+Starts fake_openai.py and the Flask app on local ports with a throwaway
+SQLite database, then submits reports at each concurrency level in each
+classification mode and prints throughput and latency percentiles:
+
+- sequential: classify on the request thread (CONCURRENT_SUBMISSION off)
+- bounded:    classify on the shared pool with CLASSIFY_TIMEOUT (submission.py)
+- async:      202 Accepted, classified by a background worker (jobs.py);
+              "drain" is the time until every queued report was classified
+
+The local model tier and near-duplicate detection are disabled, and every
+description is unique, so each submission really reaches the API.
+
+Usage: python bench_submissions.py [--concurrency 1,4,16] [--requests 48]
+           [--latency-ms 400] [--error-rate 0.02] [--malformed-rate 0.02]
+"""
+import os
+import sys
+import time
+import uuid
+import random
+import logging
+import argparse
+import contextlib
+import tempfile
+import threading
+import urllib.parse
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from fake_openai import FakeOpenAI, start_server
+
+TEMPLATES = (
+    "Heavy flooding near the {place} market, water is rising fast",
+    "Fire broke out in {place}, smoke everywhere and several shops burnt",
+    "Small tremor felt in {place}, minor cracks on some walls",
+    "Massive landslide in {place} destroyed homes, many people missing",
+    "Cholera outbreak reported in {place}, clinics overwhelmed",
+)
+PLACES = ("Kibera", "Mathare", "Eastleigh", "Kisumu", "Mombasa", "Nakuru", "Eldoret", "Garissa")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark report submission end to end")
+    parser.add_argument('--concurrency', default='1,4,16', help="comma-separated client concurrency levels")
+    parser.add_argument('--requests', type=int, default=48, help="submissions per mode and level")
+    parser.add_argument('--modes', default='sequential,bounded,async')
+    parser.add_argument('--latency-ms', type=float, default=400.0, help="fake API median latency")
+    parser.add_argument('--latency-sigma', type=float, default=0.5)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--malformed-rate', type=float, default=0.0)
+    return parser.parse_args()
+
+
+def percentile(sorted_values, p):
+    index = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def submit(base_url, run_async):
+    description = f"{random.choice(TEMPLATES).format(place=random.choice(PLACES))} (ref {uuid.uuid4().hex[:8]})"
+    data = urllib.parse.urlencode({'description': description, 'location': 'Nairobi'}).encode()
+    url = f"{base_url}/reports?async={1 if run_async else 0}"
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data, method='POST')) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return time.perf_counter() - started, status
+
+
+def run_level(base_url, mode, concurrency, requests):
+    run_async = mode == 'async'
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        started = time.perf_counter()
+        results = list(pool.map(lambda _: submit(base_url, run_async), range(requests)))
+        elapsed = time.perf_counter() - started
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, status in results if status not in (201, 202))
+    return elapsed, latencies, errors
+
+
+def wait_for_queue(app, db, ClassificationJob):
+    """Block until the background worker has finished every job; return the seconds waited."""
+    started = time.perf_counter()
+    with app.app_context():
+        while ClassificationJob.query.filter(ClassificationJob.status.in_(('queued', 'running'))).count():
+            db.session.remove()
+            time.sleep(0.05)
+    return time.perf_counter() - started
+
+
+def main():
+    args = parse_args()
+    fake = FakeOpenAI(args.latency_ms, args.latency_sigma, args.error_rate, args.malformed_rate, seed=42)
+    _, openai_url = start_server(fake)
+
+    # Configure the app before importing it: throwaway DB, fake API, every request hits the API
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{db_path}",
+        'OPENAI_BASE_URL': openai_url,
+        'OPENAI_API_KEY': 'fake',
+        'LOCAL_CLASSIFIER': '0',
+        'DUPLICATE_THRESHOLD': '2',
+        'WORKER_POLL_SECONDS': '0.05',
+    })
+    for name in ('CLOUDINARY_CLOUD_NAME', 'CLOUDINARY_API_KEY', 'CLOUDINARY_API_SECRET'):
+        os.environ.pop(name, None)
+
+    from werkzeug.serving import make_server
+    from app import app
+    from config import db
+    from models import ClassificationJob
+    from routes import report_route
+    import worker
+
+    with app.app_context():
+        db.create_all()
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    def run_worker():
+        with app.app_context():
+            worker.main()
+    threading.Thread(target=run_worker, daemon=True).start()
+    # The app and worker log every submission; keep them out of the results table
+    quiet = open(os.devnull, 'w')
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    levels = [int(level) for level in args.concurrency.split(',')]
+    print(f"\nFake API: median {args.latency_ms:g}ms, sigma {args.latency_sigma:g}, "
+          f"errors {args.error_rate:.0%}, malformed {args.malformed_rate:.0%}; "
+          f"{args.requests} submissions per row\n")
+    print(f"{'mode':<11} {'conc':>4} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6} {'drain s':>8}")
+    print("-" * 70)
+    for mode in args.modes.split(','):
+        report_route.CONCURRENT_SUBMISSION = mode == 'bounded'
+        for concurrency in levels:
+            with contextlib.redirect_stdout(quiet):
+                elapsed, latencies, errors = run_level(base_url, mode, concurrency, args.requests)
+                drain = wait_for_queue(app, db, ClassificationJob) if mode == 'async' else None
+            print(f"{mode:<11} {concurrency:>4} {len(latencies) / elapsed:>8.1f} "
+                  f"{percentile(latencies, 50) * 1000:>8.0f} {percentile(latencies, 95) * 1000:>8.0f} "
+                  f"{percentile(latencies, 99) * 1000:>8.0f} {errors:>6} "
+                  f"{'' if drain is None else f'{drain:.1f}':>8}")
+    print(f"\n✅ Fake API served {fake.requests} requests\n")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Worker occupancy of GET /uploads/<path> in each UPLOAD_SERVING mode.
+
+Runs the Flask app on a single-threaded server (one gunicorn sync worker)
+with a throwaway UPLOAD_FOLDER and downloads one stored image from several
+bandwidth-limited clients at once. For every scenario it reports how long
+the worker was tied up per request (from the WSGI call until the last body
+byte was written) and how long a cheap API call (GET /) waited meanwhile:
+
+- full:        plain download of the whole file
+- range:       Range: bytes=0-65535 (resumed or partial download)
+- revalidate:  If-None-Match with the current ETag (expects 304)
+
+In the offload modes the proxy would send the bytes, so clients only get
+headers here; what matters is that the worker is released straight away.
+Socket buffers are kept small, as on a busy host, so transfer time shows up
+instead of disappearing into kernel buffers.
+
+Usage: python bench_uploads.py [--size-kb 2048] [--clients 4] [--requests 8]
+           [--client-kbps 4096] [--modes flask,x-accel-redirect,x-sendfile]
+"""
+import io
+import os
+import sys
+import time
+import socket
+import logging
+import argparse
+import contextlib
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+SCENARIOS = ('full', 'range', 'revalidate')
+SOCKET_BUFFER = 64 * 1024
+READ_SIZE = 16 * 1024
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark worker occupancy of upload serving modes")
+    parser.add_argument('--size-kb', type=int, default=2048, help="size of the served image")
+    parser.add_argument('--clients', type=int, default=4, help="concurrent downloading clients")
+    parser.add_argument('--requests', type=int, default=8, help="downloads per mode and scenario")
+    parser.add_argument('--client-kbps', type=float, default=4096.0, help="per-client download bandwidth")
+    parser.add_argument('--modes', default='flask,x-accel-redirect,x-sendfile')
+    return parser.parse_args()
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class OccupancyMiddleware:
+    """Report how long each request holds the worker, including streaming the body."""
+
+    def __init__(self, wsgi_app, busy_queue):
+        self.wsgi_app = wsgi_app
+        self.busy_queue = busy_queue
+
+    def __call__(self, environ, start_response):
+        started = time.perf_counter()
+        path = environ.get('PATH_INFO')
+        application_iter = self.wsgi_app(environ, start_response)
+
+        def body():
+            # Stop the clock once the last byte is written: the dev server then
+            # idles 10ms draining the socket, which gunicorn doesn't
+            try:
+                yield from application_iter
+            finally:
+                self.busy_queue.put((path, time.perf_counter() - started))
+                if hasattr(application_iter, 'close'):
+                    application_iter.close()
+
+        return body()
+
+
+def serve(app, mode, ports, busy_queue):
+    """Server process: one request at a time, like a gunicorn sync worker."""
+    from werkzeug.serving import make_server
+    import upload_serving
+
+    upload_serving.SERVING_MODE = mode
+    app.wsgi_app = OccupancyMiddleware(app.wsgi_app, busy_queue)
+    server = make_server('127.0.0.1', 0, app, threaded=False)
+    server.socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER)
+    ports.put(server.server_port)
+    server.serve_forever()
+
+
+def upload_busy_times(busy_queue, count):
+    """Collect the worker times of the next `count` /uploads requests."""
+    busy = []
+    while len(busy) < count:
+        path, seconds = busy_queue.get(timeout=10)
+        if path.startswith('/uploads/'):
+            busy.append(seconds)
+    return sorted(busy)
+
+
+def fetch(port, path, headers=None, kbps=None):
+    """GET `path` over a small-buffered socket, reading at most `kbps`; return (status, body bytes)."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER)
+    sock.connect(('127.0.0.1', port))
+    lines = [f"GET {path} HTTP/1.0", "Host: 127.0.0.1"] + [f"{k}: {v}" for k, v in (headers or {}).items()]
+    sock.sendall(("\r\n".join(lines) + "\r\n\r\n").encode())
+
+    received = bytearray()
+    with sock:
+        while True:
+            chunk = sock.recv(READ_SIZE)
+            if not chunk:
+                break
+            if not received:
+                # Requests wait their turn for the single worker; the download starts now
+                started = time.perf_counter()
+            received += chunk
+            if kbps:
+                # Sleep until this many bytes would have arrived at the client's bandwidth
+                lag = len(received) / (kbps * 1024) - (time.perf_counter() - started)
+                if lag > 0:
+                    time.sleep(lag)
+    head, _, body = bytes(received).partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1]) if head else 0
+    return status, len(body)
+
+
+def probe_loop(port, stop, latencies):
+    """Time a cheap API call every 20ms until `stop` is set."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        fetch(port, '/')
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.02)
+
+
+def run_scenario(port, path, etag, scenario, args):
+    headers = {
+        'full': {},
+        'range': {'Range': 'bytes=0-65535'},
+        'revalidate': {'If-None-Match': etag},
+    }[scenario]
+    stop, probes = threading.Event(), []
+    prober = threading.Thread(target=probe_loop, args=(port, stop, probes))
+    prober.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        results = list(pool.map(lambda _: fetch(port, path, headers, args.client_kbps), range(args.requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    prober.join()
+    return elapsed, results, sorted(probes)
+
+
+def main():
+    args = parse_args()
+    upload_folder = tempfile.mkdtemp()
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(upload_folder, 'bench.db')}",
+        'OPENAI_API_KEY': 'fake',
+    })
+
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        from app import app
+        import upload_serving
+        from upload_storage import store_stream
+    app.config['UPLOAD_FOLDER'] = upload_folder
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    image = io.BytesIO(os.urandom(args.size_kb * 1024))
+    relative, stored_path, _ = store_stream(image, '.jpg', upload_folder=upload_folder)
+    path = f"/uploads/{relative}"
+    etag = f'"{upload_serving.upload_etag(relative, os.stat(stored_path))}"'
+
+    print(f"\n{args.size_kb} KB image, {args.clients} clients at {args.client_kbps:g} KB/s, "
+          f"{args.requests} requests per row, 1 sync worker\n")
+    print(f"{'mode':<17} {'scenario':<11} {'status':>6} {'KB/req':>7} {'busy ms':>8} {'p95 ms':>8} "
+          f"{'occupied':>8} {'api p50':>8} {'api p95':>8}")
+    print("-" * 91)
+    # The server runs in its own process so client threads don't compete with it for the GIL
+    context = multiprocessing.get_context('fork')
+    for mode in args.modes.split(','):
+        ports, busy_queue = context.Queue(), context.Queue()
+        server = context.Process(target=serve, args=(app, mode, ports, busy_queue), daemon=True)
+        server.start()
+        port = ports.get(timeout=10)
+        for scenario in SCENARIOS:
+            elapsed, results, probes = run_scenario(port, path, etag, scenario, args)
+            busy = upload_busy_times(busy_queue, len(results))
+            statuses = "/".join(sorted({str(status) for status, _ in results}))
+            body_kb = sum(size for _, size in results) / len(results) / 1024
+            print(f"{mode:<17} {scenario:<11} {statuses:>6} {body_kb:>7.0f} "
+                  f"{sum(busy) / len(busy) * 1000:>8.1f} {percentile(busy, 95) * 1000:>8.1f} "
+                  f"{sum(busy) / elapsed:>8.0%} {percentile(probes, 50) * 1000:>8.1f} "
+                  f"{percentile(probes, 95) * 1000:>8.1f}")
+        server.terminate()
+        server.join()
+    print("\nbusy = worker time per upload request; occupied = share of wall time the worker spent on uploads;"
+          "\napi = latency of GET / issued while the downloads were running\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+Two-tier cache for AI classification results.
+
+Tier 1 is an in-process LRU; tier 2 is the `classification_cache` table,
+shared by every worker and surviving restarts. Keys are a SHA-256 of the
+classifier kind, its prompt version and the normalized description, so
+resubmissions and whitespace/case-only edits reuse the earlier answer,
+while changing a prompt (and bumping its version) starts afresh.
+"""
+import os
+import re
+import json
+import hashlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from functools import wraps
+
+from sqlalchemy import delete, select, func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from config import app, db
+from models import ClassificationCache
+
+CACHE_TTL = timedelta(days=float(os.environ.get('CLASSIFICATION_CACHE_TTL_DAYS', 30)))
+MEMORY_SIZE = int(os.environ.get('CLASSIFICATION_CACHE_SIZE', 1024))
+MAX_ROWS = int(os.environ.get('CLASSIFICATION_CACHE_MAX_ROWS', 50000))
+EVICT_EVERY = 100  # DB writes between eviction passes
+
+
+def normalize_description(description):
+    """Case-fold, NFKC-normalize and collapse whitespace so trivial edits share a key."""
+    text = unicodedata.normalize('NFKC', description or '').casefold()
+    return re.sub(r'\s+', ' ', text).strip(' .!')
+
+
+def cache_key(kind, prompt_version, description):
+    raw = f"{kind}\0{prompt_version}\0{normalize_description(description)}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def is_cacheable(result):
+    """Only cache real answers, never the fallbacks used when the API fails or returns junk."""
+    results = result if isinstance(result, (tuple, list)) else (result,)
+    return all(
+        not str(r.get('explanation', '')).startswith(('Classification failed', 'Unable to parse'))
+        for r in results
+    )
+
+
+class _MemoryTier:
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+memory_tier = _MemoryTier(MEMORY_SIZE, CACHE_TTL.total_seconds())
+_writes = 0
+_writes_lock = threading.Lock()
+stats = {'memory_hits': 0, 'db_hits': 0, 'misses': 0}
+
+
+def _db_get(key):
+    now = datetime.now(timezone.utc)
+    table = ClassificationCache.__table__
+    with app.app_context(), db.engine.connect() as conn:
+        row = conn.execute(
+            select(table.c.result).where(table.c.key == key, table.c.expires_at > now)
+        ).first()
+    return json.loads(row.result) if row else None
+
+
+def _db_set(key, kind, value):
+    global _writes
+    now = datetime.now(timezone.utc)
+    table = ClassificationCache.__table__
+    values = dict(key=key, kind=kind, result=json.dumps(value), created_at=now, expires_at=now + CACHE_TTL)
+
+    with app.app_context(), db.engine.begin() as conn:
+        dialect_insert = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}.get(conn.dialect.name)
+        if dialect_insert:
+            conn.execute(dialect_insert(table).values(**values).on_conflict_do_update(
+                index_elements=['key'],
+                set_={'result': values['result'], 'created_at': now, 'expires_at': values['expires_at']},
+            ))
+        else:
+            conn.execute(delete(table).where(table.c.key == key))
+            conn.execute(table.insert().values(**values))
+
+        with _writes_lock:
+            _writes += 1
+            evict = _writes % EVICT_EVERY == 0
+        if evict:
+            _evict(conn, now)
+
+
+def _evict(conn, now):
+    """Drop expired rows, then the oldest rows beyond MAX_ROWS."""
+    table = ClassificationCache.__table__
+    conn.execute(delete(table).where(table.c.expires_at <= now))
+    excess = conn.execute(select(func.count()).select_from(table)).scalar() - MAX_ROWS
+    if excess > 0:
+        oldest = select(table.c.key).order_by(table.c.created_at).limit(excess).scalar_subquery()
+        conn.execute(delete(table).where(table.c.key.in_(oldest)))
+
+
+def cached_classification(kind, prompt_version):
+    """
+    Decorate a classifier taking a description with the two-tier cache.
+
+    Args:
+        kind (str): Classifier name, part of the key (e.g. 'type', 'severity')
+        prompt_version (str): Bump when the prompt or model changes to invalidate old answers
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(description):
+            key = cache_key(kind, prompt_version, description)
+
+            value = memory_tier.get(key)
+            if value is not None:
+                stats['memory_hits'] += 1
+                return _restore(value)
+
+            try:
+                value = _db_get(key)
+            except Exception as e:
+                # The cache must never break classification (e.g. table not migrated yet)
+                print(f"[Classification cache] DB lookup failed: {str(e)}")
+                value = None
+            if value is not None:
+                stats['db_hits'] += 1
+                memory_tier.set(key, value)
+                return _restore(value)
+
+            stats['misses'] += 1
+            result = fn(description)
+            if is_cacheable(result):
+                value = _freeze(result)
+                memory_tier.set(key, value)
+                try:
+                    _db_set(key, kind, value)
+                except Exception as e:
+                    print(f"[Classification cache] DB write failed: {str(e)}")
+            return result
+        return wrapper
+    return decorator
+
+
+def _freeze(result):
+    # Tuples (classify_report) are stored as JSON lists
+    return list(result) if isinstance(result, tuple) else result
+
+
+def _restore(value):
+    # Hand out copies so callers can't mutate cached entries
+    if isinstance(value, list):
+        return tuple(dict(v) for v in value)
+    return dict(value)
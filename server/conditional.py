@@ -0,0 +1,99 @@
+"""
+Conditional GET support (ETag / Last-Modified / 304 Not Modified).
+
+Validators are derived from the per-table change versions in
+`table_versions`, so a request can be answered with 304 after a single
+primary-key read, before any ORM loading or serialization happens.
+"""
+import hashlib
+from datetime import timezone
+from functools import wraps
+
+from flask import request, make_response, g
+
+from config import db
+from models import TableVersion
+
+
+def get_table_versions(tables):
+    """
+    Read the current change versions for a set of tables in one query.
+
+    Returns:
+        dict: {table_name: (version, updated_at)}; missing tables report version 0
+    """
+    rows = db.session.query(TableVersion.table_name, TableVersion.version, TableVersion.updated_at).filter(
+        TableVersion.table_name.in_(tables)
+    ).all()
+    versions = {name: (0, None) for name in tables}
+    versions.update({row.table_name: (row.version, row.updated_at) for row in rows})
+    return versions
+
+
+def compute_validators(tables):
+    """
+    Build the ETag and Last-Modified values for the current request.
+
+    The ETag covers the request path and query string (different filters or
+    field sets are different representations) and the table versions.
+
+    Returns:
+        tuple: (etag str, last_modified datetime or None)
+    """
+    versions = get_table_versions(tables)
+    # Shared with the response cache so it can validate entries without a second read
+    g.table_versions = versions
+    version_key = ",".join(f"{name}:{versions[name][0]}" for name in sorted(tables))
+    digest = hashlib.sha1(f"{request.full_path}|{version_key}".encode()).hexdigest()[:20]
+
+    timestamps = [updated_at for _, updated_at in versions.values() if updated_at]
+    last_modified = max(timestamps) if timestamps else None
+    if last_modified and last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return digest, last_modified
+
+
+def is_not_modified(etag, last_modified):
+    """Evaluate If-None-Match (preferred) or If-Modified-Since against the validators."""
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified:
+        # HTTP dates have one-second resolution
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def add_validators(response, etag, last_modified, private=False):
+    """Attach ETag, Last-Modified and a revalidate-always Cache-Control to a response."""
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers["Cache-Control"] = "private, no-cache" if private else "no-cache"
+    return response
+
+
+def not_modified(etag, last_modified, private=False):
+    return add_validators(make_response("", 304), etag, last_modified, private)
+
+
+def conditional_get(*tables, private=False):
+    """
+    Decorate a GET handler so unchanged resources are answered with 304.
+
+    Args:
+        tables: Names of the tables the response is built from
+        private (bool): Mark the response as per-user (session dependent)
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            etag, last_modified = compute_validators(tables)
+            if is_not_modified(etag, last_modified):
+                return not_modified(etag, last_modified, private)
+
+            response = make_response(fn(*args, **kwargs))
+            if response.status_code == 200:
+                add_validators(response, etag, last_modified, private)
+            return response
+        return wrapper
+    return decorator
@@ -13,12 +13,21 @@ from flask_restful import Api
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import MetaData
 
+# Local imports
+from upload_ingest import IngestRequest, MAX_CONTENT_LENGTH, reject_oversized
+
 
 app = Flask(__name__)
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 app.config["UPLOAD_FOLDER"] = os.path.join(BASE_DIR, 'uploads') 
 
+# Uploaded images are streamed, size-checked and sniffed while the request
+# body is read, never buffered whole (see upload_ingest.py)
+app.request_class = IngestRequest
+app.config["MAX_CONTENT_LENGTH"] = MAX_CONTENT_LENGTH
+app.before_request(reject_oversized)
+
 
 app.secret_key = os.environ.get('SECRET_KEY', 'dev_secret_key')
 app.config['SECRET_KEY'] = app.secret_key
@@ -69,7 +78,8 @@ app.config["SQLALCHEMY_DATABASE_URI"] = db_url
 print(f"🔧 SQLALCHEMY_DATABASE_URI set: {db_url[:40]}...")
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.json.compact = False
+# Leave app.json.compact at Flask's default: pretty-printed only in debug mode,
+# compact in production so list responses aren't padded with whitespace
 
 metadata = MetaData(naming_convention={
     "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
@@ -100,5 +110,5 @@ print(f"🔐 CORS credentials: enabled")
 CORS(app, 
      supports_credentials=True,
      origins=allowed_origins,
-     allow_headers=["Content-Type", "Authorization"],
-     expose_headers=["Content-Type"])
+     allow_headers=["Content-Type", "Authorization", "Upload-Offset"],
+     expose_headers=["Content-Type", "Upload-Offset", "Location"])
@@ -0,0 +1,222 @@
+"""
+Near-duplicate report detection with MinHash LSH.
+
+Each report's location and description are normalized, cut into word-bigram
+shingles and summarized by a MinHash signature. Signatures are split into
+bands; reports sharing any band bucket are candidates, and candidates whose
+estimated Jaccard similarity reaches DUPLICATE_THRESHOLD are duplicates.
+Lookups therefore touch a handful of buckets instead of every report.
+
+The index lives in memory per worker. It is built from the reports table
+on a background thread after the first lookup (lookups find no duplicates
+until it is ready) and then catches up with reports created by other
+workers (ids above the highest one indexed) before every lookup. Reports deleted or
+edited through this worker are removed or re-indexed at once; for changes
+made by other workers, candidates are re-scored against their current
+description and location when they are loaded, and deleted ones are
+skipped.
+"""
+import os
+import re
+import random
+import threading
+import zlib
+
+from config import app, db
+from models import Report
+from classification_cache import normalize_description
+from local_classifier import is_final
+
+DUPLICATE_THRESHOLD = float(os.environ.get('DUPLICATE_THRESHOLD', 0.7))
+SHINGLE_SIZE = 2  # words per shingle
+NUM_PERM = 64
+BANDS = 16  # 16 bands x 4 rows: pairs above ~0.5 similarity almost always share a bucket
+ROWS = NUM_PERM // BANDS
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Fixed seed: signatures must be comparable across workers and restarts
+_rng = random.Random(1729)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def shingles(description, location):
+    """Hashed word bigrams of the normalized location and description."""
+    words = re.findall(r"\w+", f"{normalize_description(location)} {normalize_description(description)}")
+    if len(words) < SHINGLE_SIZE:
+        return {zlib.crc32(" ".join(words).encode())}
+    return {
+        zlib.crc32(" ".join(words[i:i + SHINGLE_SIZE]).encode()) for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def signature(description, location):
+    """MinHash signature: per permutation, the minimum of (a*x + b) mod p over the shingles."""
+    hashes = shingles(description, location)
+    return tuple(min((a * h + b) % _PRIME for h in hashes) & _MAX_HASH for a, b in _PERMUTATIONS)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+def _bands(sig):
+    return [(band, sig[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+
+
+class DuplicateIndex:
+    """In-memory MinHash LSH index over reports."""
+
+    def __init__(self):
+        self.signatures = {}  # report id -> signature
+        self.buckets = {}     # (band, rows) -> set of report ids
+        self.max_id = 0
+        self.built = False
+        self._building = False
+        self._lock = threading.Lock()       # guards signatures, buckets and max_id
+        self._sync_lock = threading.Lock()  # one database read (build or sync) at a time
+
+    def add(self, report_id, description, location):
+        sig = signature(description, location)
+        with self._lock:
+            self.signatures[report_id] = sig
+            for key in _bands(sig):
+                self.buckets.setdefault(key, set()).add(report_id)
+            self.max_id = max(self.max_id, report_id)
+
+    def remove(self, report_id):
+        with self._lock:
+            sig = self.signatures.pop(report_id, None)
+            if sig is None:
+                return
+            for key in _bands(sig):
+                bucket = self.buckets.get(key)
+                if bucket:
+                    bucket.discard(report_id)
+                    if not bucket:
+                        del self.buckets[key]
+
+    def rebuild(self):
+        """Re-index every report from the database; the index counts as built once this returns."""
+        with self._sync_lock:
+            with self._lock:
+                self.signatures, self.buckets, self.max_id = {}, {}, 0
+            self._sync()
+        self.built = True
+
+    def start_build(self):
+        """Build the index on a background thread, unless that is already happening."""
+        with self._lock:
+            if self.built or self._building:
+                return
+            self._building = True
+        threading.Thread(target=self._build_in_background, name='duplicate-index', daemon=True).start()
+
+    def _build_in_background(self):
+        try:
+            self.rebuild()
+        except Exception as e:
+            print(f"[Duplicates] Index build failed: {str(e)}")
+        finally:
+            self._building = False
+
+    def sync(self):
+        """Index reports created since the last sync (e.g. by other workers)."""
+        with self._sync_lock:
+            self._sync()
+
+    def _sync(self):
+        with app.app_context():
+            rows = db.session.query(Report.id, Report.description, Report.location).filter(
+                Report.id > self.max_id
+            ).order_by(Report.id).yield_per(1000)
+            for report_id, description, location in rows:
+                self.add(report_id, description, location)
+
+    def matches(self, sig, exclude_id=None):
+        """
+        Returns:
+            list of (report id, similarity) at or above the threshold, most
+            similar first; empty while the index is still being built
+        """
+        # Never builds on the calling thread
+        if not self.built:
+            self.start_build()
+            return []
+        self.sync()
+
+        with self._lock:
+            candidates = set()
+            for key in _bands(sig):
+                candidates |= self.buckets.get(key, set())
+            scored = [(rid, similarity(sig, self.signatures[rid])) for rid in candidates if rid != exclude_id]
+        return sorted(
+            ((rid, score) for rid, score in scored if score >= DUPLICATE_THRESHOLD),
+            key=lambda match: (-match[1], match[0]),
+        )
+
+
+duplicate_index = DuplicateIndex()
+
+
+def _load_matches(sig, matches, *criteria):
+    """
+    Load the matched reports, re-scored against their current description and
+    location (another worker may have edited them since they were indexed).
+
+    Returns:
+        list of (Report, similarity) still at or above the threshold, most similar first
+    """
+    if not matches:
+        return []
+    rows = Report.query.filter(Report.id.in_([rid for rid, _ in matches]), *criteria)
+    scored = [(r, similarity(sig, signature(r.description, r.location))) for r in rows]
+    return sorted(
+        ((r, score) for r, score in scored if score >= DUPLICATE_THRESHOLD),
+        key=lambda match: (-match[1], match[0].id),
+    )
+
+
+def has_reusable_classification(report):
+    """A real answer, not a fallback or local guess stored when the classifier was down or returned junk."""
+    return (
+        bool(report.type_confidence) and bool(report.severity_confidence)
+        and is_final(({'explanation': report.type_explanation or ''},
+                      {'explanation': report.severity_explanation or ''}))
+    )
+
+
+def find_duplicate(description, location):
+    """
+    Find the most similar existing report whose classification can be reused.
+
+    Returns:
+        tuple: (Report, similarity), or (None, 0.0) if there is no such near-duplicate
+    """
+    sig = signature(description, location)
+    matches = duplicate_index.matches(sig)
+    for report, score in _load_matches(sig, matches, Report.classification_status == 'complete'):
+        if has_reusable_classification(report):
+            return report, score
+    return None, 0.0
+
+
+def duplicates_of(report):
+    """
+    Returns:
+        list of (Report, similarity) for the reports that are near-duplicates of `report`
+    """
+    sig = signature(report.description, report.location)
+    return _load_matches(sig, duplicate_index.matches(sig, exclude_id=report.id))
+
+
+def reuse_classification(original, similarity):
+    """Build classify_report-shaped results from a near-duplicate's classification."""
+    note = f"[duplicate of #{original.id}, {similarity:.0%} similar]"
+    return (
+        {'type': original.type, 'confidence': original.type_confidence,
+         'explanation': f"{note} {original.type_explanation or ''}".strip()},
+        {'severity': original.severity, 'confidence': original.severity_confidence,
+         'explanation': f"{note} {original.severity_explanation or ''}".strip()},
+    )
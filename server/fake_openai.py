@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI chat completions API, for offline load tests.
+
+Answers POST /v1/chat/completions with plausible classifications for the
+prompts in ai_utils.py, after a log-normally distributed delay. A fraction
+of requests can fail with HTTP 500 or return content that isn't JSON.
+
+    python fake_openai.py --port 8089 --latency-ms 400 --error-rate 0.02 --malformed-rate 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=fake python app.py
+"""
+import re
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+KEYWORDS = {
+    'Flood': ('flood', 'water', 'river', 'rain'),
+    'Fire': ('fire', 'smoke', 'burn', 'flame'),
+    'Earthquake': ('earthquake', 'tremor', 'quake'),
+    'Landslide': ('landslide', 'mudslide'),
+    'Drought': ('drought', 'dry', 'famine'),
+    'Epidemic': ('cholera', 'outbreak', 'epidemic', 'disease'),
+}
+SEVERE_WORDS = ('dead', 'killed', 'massive', 'destroyed', 'hundreds', 'catastrophic')
+MINOR_WORDS = ('small', 'minor', 'contained', 'slight')
+
+
+class FakeOpenAI:
+    """Behaviour knobs shared by all request handler threads."""
+
+    def __init__(self, latency_ms=400.0, latency_sigma=0.5, error_rate=0.0, malformed_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def draw(self):
+        """Return (delay in seconds, outcome) for the next request."""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency_ms / 1000 * math.exp(self.random.gauss(0, self.latency_sigma))
+            roll = self.random.random()
+        if roll < self.error_rate:
+            return delay, 'error'
+        if roll < self.error_rate + self.malformed_rate:
+            return delay, 'malformed'
+        return delay, 'ok'
+
+
+def classify(text):
+    words = text.lower()
+    disaster_type = next((t for t, keys in KEYWORDS.items() if any(k in words for k in keys)), 'Other')
+    if any(w in words for w in SEVERE_WORDS):
+        severity = 'Severe'
+    elif any(w in words for w in MINOR_WORDS):
+        severity = 'Minor'
+    else:
+        severity = 'Moderate'
+    return disaster_type, severity
+
+
+def completion_content(system_prompt, user_prompt):
+    """Answer in the JSON shape the given ai_utils prompt asks for."""
+    disaster_type, severity = classify(user_prompt)
+    if 'type_confidence' in system_prompt:
+        return json.dumps({
+            'type': disaster_type, 'type_confidence': 0.91, 'type_explanation': 'Keyword match',
+            'severity': severity, 'severity_confidence': 0.84, 'severity_explanation': 'Keyword match',
+        })
+    if 'severity assessment expert' in system_prompt:
+        return json.dumps({'severity': severity, 'confidence': 0.84, 'explanation': 'Keyword match'})
+    return json.dumps({'type': disaster_type, 'confidence': 0.91, 'explanation': 'Keyword match'})
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass  # keep benchmark output readable
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            if not re.search(r'/chat/completions$', self.path):
+                return self._send(404, {'error': {'message': f'Unknown path {self.path}'}})
+
+            delay, outcome = fake.draw()
+            time.sleep(delay)
+            if outcome == 'error':
+                return self._send(500, {'error': {'message': 'Injected failure', 'type': 'server_error'}})
+
+            messages = body.get('messages', [])
+            system_prompt = next((m['content'] for m in messages if m['role'] == 'system'), '')
+            user_prompt = next((m['content'] for m in messages if m['role'] == 'user'), '')
+            content = 'Sorry, I cannot help with that.' if outcome == 'malformed' else \
+                completion_content(system_prompt, user_prompt)
+
+            prompt_tokens = sum(len(m['content']) for m in messages) // 4
+            completion_tokens = len(content) // 4
+            self._send(200, {
+                'id': f'chatcmpl-fake-{fake.requests}',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': body.get('model', 'gpt-3.5-turbo'),
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': content},
+                    'finish_reason': 'stop',
+                }],
+                'usage': {
+                    'prompt_tokens': prompt_tokens,
+                    'completion_tokens': completion_tokens,
+                    'total_tokens': prompt_tokens + completion_tokens,
+                },
+            })
+
+    return Handler
+
+
+def start_server(fake, host='127.0.0.1', port=0):
+    """Serve `fake` on a daemon thread. Returns (server, base URL for OPENAI_BASE_URL)."""
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat completions server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=400.0, help="median response latency")
+    parser.add_argument('--latency-sigma', type=float, default=0.5, help="log-normal spread (0 = fixed latency)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction answered with HTTP 500")
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help="fraction answered with non-JSON content")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    fake = FakeOpenAI(args.latency_ms, args.latency_sigma, args.error_rate, args.malformed_rate, args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(fake))
+    print(f"🤖 Fake OpenAI listening on http://{args.host}:{args.port}/v1 "
+          f"(median {args.latency_ms:g}ms, errors {args.error_rate:.0%}, malformed {args.malformed_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n👋 Served {fake.requests} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Sparse fieldsets (?fields= / ?include=) for list endpoints.
+
+A fieldset is pushed down to the SQL layer: unrequested columns are left
+out of the SELECT with load_only(), and relationships that were not asked
+for are switched from their default eager load to a plain lazy load that
+never fires, so e.g. report lists skip the donations selectin query.
+"""
+from sqlalchemy.orm import load_only, lazyload, selectinload, joinedload
+
+from models import Report, Donation
+
+REPORT_FIELDS = (
+    "id", "type", "location", "date", "description", "image", "severity",
+    "reporter_name", "type_confidence", "type_explanation",
+    "severity_confidence", "severity_explanation", "classification_status",
+    "duplicate_of_id", "image_status", "image_variants", "image_upload_id", "user_id",
+)
+REPORT_INCLUDES = ("donations", "user")
+
+# Donation.to_dict renames full_name -> name, so the public field is "name"
+DONATION_COLUMNS = (
+    "id", "report_id", "name", "email", "phone", "type", "amount",
+    "amount_number", "created_at",
+)
+# Report columns that /admin/donations flattens into each donation
+DONATION_REPORT_FIELDS = {
+    "report_type": "type",
+    "report_location": "location",
+    "report_description": "description",
+}
+DONATION_FIELDS = DONATION_COLUMNS + tuple(DONATION_REPORT_FIELDS)
+
+
+class FieldsetError(ValueError):
+    """Raised when ?fields= or ?include= names something that does not exist."""
+
+
+class Fieldset:
+    """The columns and relationships requested for one list response."""
+
+    def __init__(self, fields, includes):
+        self.fields = tuple(fields)
+        self.includes = tuple(includes)
+
+    @property
+    def only(self):
+        """The `only=` argument for SerializerMixin.to_dict."""
+        return self.fields + self.includes
+
+
+def _split(raw):
+    return [part.strip() for part in raw.split(",") if part.strip()]
+
+
+def parse_fieldset(args, allowed_fields, allowed_includes=()):
+    """
+    Read ?fields= and ?include= from the query string.
+
+    Args:
+        args: The request query string (request.args)
+        allowed_fields: Field names this endpoint can project
+        allowed_includes: Relationship names this endpoint can embed
+
+    Returns:
+        Fieldset, or None when neither parameter was given (full legacy payload)
+    """
+    if "fields" not in args and "include" not in args:
+        return None
+
+    fields = _split(args.get("fields", "")) or list(allowed_fields)
+    includes = _split(args.get("include", ""))
+
+    unknown = [f for f in fields if f not in allowed_fields]
+    if unknown:
+        raise FieldsetError(f"Unknown field(s): {', '.join(unknown)}")
+    unknown = [i for i in includes if i not in allowed_includes]
+    if unknown:
+        raise FieldsetError(f"Unknown include(s): {', '.join(unknown)}")
+
+    # Preserve request order but drop duplicates
+    return Fieldset(dict.fromkeys(fields), dict.fromkeys(includes))
+
+
+def report_load_options(fieldset):
+    """
+    Loader options for a Report query restricted to a fieldset.
+
+    id and date are always loaded because keyset pagination reads them to
+    build next_cursor.
+    """
+    columns = set(fieldset.fields) | {"id", "date"}
+    options = [load_only(*[getattr(Report, name) for name in columns])]
+    for name in REPORT_INCLUDES:
+        relationship = getattr(Report, name)
+        options.append(selectinload(relationship) if name in fieldset.includes else lazyload(relationship))
+    return options
+
+
+def donation_load_options(fieldset):
+    """Loader options for a Donation query restricted to a fieldset."""
+    columns = {"full_name" if name == "name" else name
+               for name in fieldset.fields if name in DONATION_COLUMNS}
+    columns.add("id")
+    options = [load_only(*[getattr(Donation, name) for name in columns])]
+
+    report_columns = [DONATION_REPORT_FIELDS[name]
+                      for name in fieldset.fields if name in DONATION_REPORT_FIELDS]
+    if report_columns:
+        options.append(
+            joinedload(Donation.report)
+            .load_only(*[getattr(Report, name) for name in report_columns])
+            .lazyload(Report.donations)
+        )
+    else:
+        options.append(lazyload(Donation.report))
+    return options
+
+
+# Embedded donations carry their own columns but not the flattened report ones
+NESTED_DONATION_FIELDSET = Fieldset(DONATION_COLUMNS, ())
+
+
+def serialize_report(report, fieldset):
+    """Serialize a report with the full legacy payload, or only the fieldset when given."""
+    if fieldset is None:
+        return report.to_fast_dict()
+    only = tuple(name for name in fieldset.only if name != "donations")
+    data = report.to_fast_dict(only=only)
+    if "donations" in fieldset.includes:
+        # Same public 'name' key as the donation endpoints, not the full_name column
+        data["donations"] = [serialize_donation(d, NESTED_DONATION_FIELDSET) for d in report.donations]
+    return data
+
+
+def serialize_donation(donation, fieldset):
+    """Serialize a donation with only the requested fields (using the public 'name' key)."""
+    only = tuple("full_name" if name == "name" else name
+                 for name in fieldset.fields if name in DONATION_COLUMNS)
+    data = donation.to_fast_dict(only=only)
+    for name in fieldset.fields:
+        if name in DONATION_REPORT_FIELDS:
+            column = DONATION_REPORT_FIELDS[name]
+            data[name] = getattr(donation.report, column) if donation.report else None
+    return data
@@ -0,0 +1,93 @@
+"""
+Resized WebP/JPEG derivatives of locally stored report images.
+
+When images stay on local disk (Cloudinary not configured), list cards and
+thumbnails would otherwise download full-size phone photos. After a report
+with a local image is committed, the derivatives below are rendered on the
+image thread pool (image_executor.py) and recorded in Report.image_variants as a
+srcset-style map:
+
+    {"webp": {"160w": url, "480w": url, "1200w": url},
+     "jpeg": {"160w": url, "480w": url, "1200w": url}}
+
+Sizes wider than the original are skipped. Requires Pillow; without it,
+reports simply have no variants.
+"""
+import os
+import uuid
+
+from config import app, db
+from models import Report
+from image_executor import executor
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+    print("⚠️  Pillow is not installed - local image derivatives are disabled")
+
+# name -> max width in pixels
+SIZES = {'thumb': 160, 'card': 480, 'full': 1200}
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def render_derivatives(source_path, output_dir, stem, base_url):
+    """
+    Write every size/format of `source_path` into `output_dir`, skipping files
+    that already exist (derivatives of identical content are identical).
+
+    Returns:
+        dict: {format: {"<width>w": url}}
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    variants = {fmt: {} for fmt in FORMATS}
+    with Image.open(source_path) as original:
+        # Phone photos are often stored sideways with an EXIF rotation flag
+        image = ImageOps.exif_transpose(original).convert('RGB')
+
+    widths = sorted({min(width, image.width) for width in SIZES.values()})
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = None
+        for fmt, (pil_format, options) in FORMATS.items():
+            filename = f"{stem}-{width}.{fmt}"
+            path = os.path.join(output_dir, filename)
+            if not os.path.exists(path):
+                if resized is None:
+                    resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+                # Write-then-rename so a derivative is never served half-written
+                tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+                resized.save(tmp_path, pil_format, **options)
+                os.replace(tmp_path, path)
+            variants[fmt][f"{width}w"] = f"{base_url}/{filename}"
+    return variants
+
+
+def start_derivatives(report_id, source_path, image_url):
+    """Render derivatives for a committed report's local image on the image thread pool."""
+    if Image is None:
+        return
+    # Derivatives sit next to their content-addressed source, so identical
+    # uploads share them too
+    output_dir = os.path.dirname(source_path)
+    base_url = image_url.rsplit('/', 1)[0]
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+
+    def process():
+        try:
+            variants = render_derivatives(source_path, output_dir, stem, base_url)
+        except Exception as e:
+            print(f"❌ Image derivatives failed for report {report_id}: {str(e)}")
+            return
+        with app.app_context():
+            report = Report.query.filter_by(id=report_id).with_for_update().first()
+            # Skip if the image was replaced while we were rendering
+            if report is not None and report.image == image_url:
+                report.image_variants = variants
+                db.session.commit()
+                print(f"🖼️ Image derivatives ready for report {report_id}")
+
+    executor.submit(process)
@@ -0,0 +1,17 @@
+"""
+Thread pool for background image work in the web process: the immediate
+Cloudinary upload attempt (image_pipeline.py) and resized copies
+(image_derivatives.py).
+
+It is kept apart from the classification pool in submission.py, so slow
+uploads or large renders never hold the threads a classification is waiting
+for and push it past CLASSIFY_TIMEOUT.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared by every request in this worker; max_workers bounds concurrent image jobs
+executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('IMAGE_WORKERS', 4)),
+    thread_name_prefix='images',
+)
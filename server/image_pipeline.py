@@ -0,0 +1,187 @@
+"""
+Background image upload pipeline.
+
+A request only spools the uploaded image to UPLOAD_FOLDER (content-addressed,
+see upload_storage.py) and points Report.image at that provisional local URL. When Cloudinary
+is configured, an ImageUploadJob is queued in the same transaction and the
+upload happens off the request thread: first attempted straight away on the
+image thread pool (image_executor.py), then retried with a backoff by worker.py. A
+successful upload swaps Report.image to the CDN URL, but only if the report
+still shows the provisional image, so a newer image is never overwritten.
+
+Report.image_status tells clients which URL they have: 'pending' (local,
+upload queued), 'uploaded' (CDN), 'failed' (kept local after MAX_ATTEMPTS)
+or 'local' (Cloudinary not configured; resized copies are then rendered by
+image_derivatives.py).
+
+worker.py needs to see UPLOAD_FOLDER to retry uploads; on hosts without a
+shared disk, only the web process's immediate attempt can succeed.
+"""
+import os
+from datetime import datetime, timezone, timedelta
+
+from flask import current_app
+
+from config import app, db
+from models import Report, ImageUploadJob
+from cloudinary_config import upload_image_to_cloudinary, delete_image_from_cloudinary, is_cloudinary_configured
+from jobs import claim_jobs, requeue_stale_jobs
+from image_executor import executor
+from image_derivatives import start_derivatives
+from upload_storage import store_stream, store_spooled, public_url, relative_path_from_url
+from upload_ingest import SNIFF_BYTES, SpoolFile, accepted_image_type
+from resumable_uploads import blob_in_use
+
+MAX_ATTEMPTS = int(os.environ.get('IMAGE_UPLOAD_MAX_ATTEMPTS', 5))
+RETRY_BACKOFF = timedelta(seconds=float(os.environ.get('IMAGE_UPLOAD_RETRY_SECONDS', 30)))
+CLOUDINARY_FOLDER = "disaster_reports"
+
+
+def spool_image(image):
+    """
+    Store an uploaded file in content-addressed local storage (see upload_storage.py).
+
+    Returns:
+        tuple: (local path, public URL served by /uploads/<path>)
+    """
+    if isinstance(image.stream, SpoolFile):
+        # Already validated, hashed and written to disk while the request was parsed
+        relative, path, created = store_spooled(image.stream)
+    else:
+        # Named after the sniffed type, like spooled uploads, not the client's filename
+        ext = accepted_image_type(image.stream.read(SNIFF_BYTES))
+        image.stream.seek(0)
+        relative, path, created = store_stream(image.stream, ext)
+    if not created:
+        print(f"♻️ Identical image already stored: {relative}")
+    return path, public_url(relative)
+
+
+def attach_image(report, image):
+    """
+    Spool `image`, point the report at it and queue its Cloudinary upload (caller commits).
+
+    Returns:
+        ImageUploadJob, or None if Cloudinary is not configured
+    """
+    path, url = spool_image(image)
+    print(f"💾 Image spooled locally: {url}")
+    report.image_upload_id = None
+    return _attach_local_file(report, path, url)
+
+
+def attach_upload(report, upload):
+    """
+    Point the report at a completed resumable upload (see resumable_uploads.py)
+    and queue its Cloudinary upload, exactly as for an inline image (caller commits).
+
+    Returns:
+        ImageUploadJob, or None if Cloudinary is not configured
+    """
+    path = os.path.join(current_app.config["UPLOAD_FOLDER"], upload.stored_path)
+    report.image_upload_id = upload.id
+    return _attach_local_file(report, path, public_url(upload.stored_path))
+
+
+def _attach_local_file(report, path, url):
+    report.image = url
+    report.image_variants = None
+    if not is_cloudinary_configured():
+        report.image_status = 'local'
+        return None
+
+    report.image_status = 'pending'
+    if report.id is None:
+        db.session.add(report)
+        db.session.flush()  # assigns report.id
+    job = ImageUploadJob(report_id=report.id, spool_path=path, provisional_url=url)
+    db.session.add(job)
+    return job
+
+
+def process_attached_image(report, upload_job):
+    """After commit, start the background work for an image attached with attach_image or attach_upload."""
+    if upload_job is not None:
+        start_upload(upload_job)
+    elif report.image_status == 'local':
+        relative = relative_path_from_url(report.image)
+        start_derivatives(report.id, os.path.join(current_app.config["UPLOAD_FOLDER"], relative), report.image)
+
+
+def start_upload(job):
+    """Attempt a just-committed upload job right away on the image thread pool."""
+    job_id = job.id
+
+    def attempt():
+        with app.app_context():
+            for claimed in claim_jobs(1, model=ImageUploadJob, job_ids=[job_id]):
+                run_upload_job(claimed)
+
+    executor.submit(attempt)
+
+
+def _remove_spool(job):
+    """Delete a spooled file once no report, pending upload job or unused resumable upload needs it."""
+    # Identical uploads share one content-addressed file
+    if blob_in_use(relative_path_from_url(job.provisional_url)):
+        return
+    try:
+        os.remove(job.spool_path)
+    except FileNotFoundError:
+        pass
+
+
+def requeue_stale_uploads():
+    """Requeue stale upload jobs; ones out of attempts fail like run_upload_job would."""
+    return requeue_stale_jobs(ImageUploadJob, MAX_ATTEMPTS, Report.image_status,
+                              Report.image == ImageUploadJob.provisional_url)
+
+
+def run_upload_job(job_id):
+    """
+    Upload the job's spooled image and swap it into its report.
+
+    Returns:
+        str: the job's status after this run ('done', 'queued' or 'failed')
+    """
+    job = db.session.get(ImageUploadJob, job_id)
+    if job is None:
+        return 'failed'
+
+    result = None
+    if os.path.exists(job.spool_path):
+        result = upload_image_to_cloudinary(job.spool_path, folder=CLOUDINARY_FOLDER)
+        error = 'Cloudinary upload failed'
+    else:
+        error = f'Spooled file not found: {job.spool_path}'
+
+    if result is None:
+        job.last_error = error
+        job.locked_at = None
+        if job.attempts < MAX_ATTEMPTS:
+            job.status = 'queued'
+            job.run_after = datetime.now(timezone.utc) + RETRY_BACKOFF * 2 ** (job.attempts - 1)
+        else:
+            # Give up; the report keeps its working local URL
+            job.status = 'failed'
+            report = db.session.get(Report, job.report_id)
+            if report is not None and report.image == job.provisional_url:
+                report.image_status = 'failed'
+        db.session.commit()
+        return job.status
+
+    # Lock the row so a concurrent edit can't slip in between the check and the swap
+    report = Report.query.filter_by(id=job.report_id).with_for_update().first()
+    if report is not None and report.image == job.provisional_url:
+        report.image = result['url']
+        report.image_status = 'uploaded'
+        print(f"☁️ Report {report.id} image moved to Cloudinary: {result['url']}")
+    else:
+        # The report was deleted or got a newer image meanwhile: this upload is orphaned
+        delete_image_from_cloudinary(result['public_id'])
+    job.status = 'done'
+    job.locked_at = None
+    job.last_error = None
+    db.session.commit()
+    _remove_spool(job)
+    return job.status
@@ -0,0 +1,154 @@
+"""
+Database-backed job queue for background report classification.
+
+The API enqueues a ClassificationJob in the same transaction as the
+pending report; worker.py claims queued jobs, classifies the report and
+writes the results back. Claims are a conditional UPDATE, so several
+worker processes can poll the same table safely. claim_jobs and
+requeue_stale_jobs also serve the image upload queue (see image_pipeline.py).
+"""
+import os
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy import case, exists, update
+
+from config import db
+from models import Report, ClassificationJob
+from ai_utils import classify_report
+from local_classifier import is_final
+
+MAX_ATTEMPTS = int(os.environ.get('CLASSIFICATION_MAX_ATTEMPTS', 3))
+RETRY_BACKOFF = timedelta(seconds=float(os.environ.get('CLASSIFICATION_RETRY_SECONDS', 30)))
+STALE_LOCK = timedelta(minutes=float(os.environ.get('CLASSIFICATION_STALE_MINUTES', 5)))
+
+PENDING_TYPE = 'Pending'
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def enqueue_classification(report):
+    """Mark a report as pending and queue a job for it (caller commits)."""
+    report.classification_status = 'pending'
+    db.session.flush()  # assigns report.id
+    job = ClassificationJob(report_id=report.id)
+    db.session.add(job)
+    return job
+
+
+def claim_jobs(limit=10, model=ClassificationJob, job_ids=None):
+    """
+    Atomically claim up to `limit` due jobs for this worker.
+
+    Args:
+        model: The job table to claim from (ClassificationJob or ImageUploadJob)
+        job_ids: Only consider these jobs (e.g. one just enqueued by this process)
+
+    Returns:
+        list of job ids now in status 'running'
+    """
+    now = _now()
+    query = db.session.query(model.id).filter(model.status == 'queued', model.run_after <= now)
+    if job_ids is not None:
+        query = query.filter(model.id.in_(job_ids))
+    candidates = query.order_by(model.run_after).limit(limit).all()
+
+    claimed = []
+    for (job_id,) in candidates:
+        # Only one worker can move a given job out of 'queued'
+        result = db.session.execute(
+            update(model)
+            .where(model.id == job_id, model.status == 'queued')
+            .values(status='running', locked_at=now, attempts=model.attempts + 1)
+        )
+        if result.rowcount == 1:
+            claimed.append(job_id)
+    db.session.commit()
+    return claimed
+
+
+def requeue_stale_jobs(model=ClassificationJob, max_attempts=MAX_ATTEMPTS,
+                       report_status=Report.classification_status, *report_criteria):
+    """
+    Put back jobs whose worker died mid-run (locked for longer than STALE_LOCK).
+
+    A job that has already used max_attempts is marked 'failed' instead, so a
+    report that crashes the worker every time is not retried forever, and its
+    report's status column is set to 'failed' to match.
+
+    Args:
+        model: The job table to sweep (ClassificationJob or ImageUploadJob)
+        max_attempts: Attempts after which a stale job is given up
+        report_status: Report column that mirrors the job's outcome
+        report_criteria: Extra conditions for updating the report (e.g. that it
+            still shows the job's image)
+
+    Returns:
+        int: number of stale jobs requeued or failed
+    """
+    stale = (model.status == 'running', model.locked_at < _now() - STALE_LOCK)
+    exhausted = model.attempts >= max_attempts
+    db.session.execute(
+        update(Report)
+        .where(exists().where(model.report_id == Report.id, exhausted, *stale, *report_criteria))
+        .values({report_status: 'failed'})
+        .execution_options(synchronize_session=False)
+    )
+    result = db.session.execute(
+        update(model)
+        .where(*stale)
+        .values(
+            status=case((exhausted, 'failed'), else_='queued'),
+            last_error=case((exhausted, 'Worker stopped while running the job'), else_=model.last_error),
+            locked_at=None,
+        )
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def run_job(job_id):
+    """
+    Classify the job's report and store the results.
+
+    Fallback answers (API down, unparseable output, or a local guess made
+    while the API was down) are retried with a backoff; after MAX_ATTEMPTS the fallback is stored like the synchronous
+    path would, and the report is marked 'failed'.
+
+    Returns:
+        str: the job's final status for this run ('done', 'queued' or 'failed')
+    """
+    job = db.session.get(ClassificationJob, job_id)
+    report = db.session.get(Report, job.report_id) if job else None
+    if report is None:
+        if job:
+            job.status = 'failed'
+            job.last_error = 'Report no longer exists'
+            db.session.commit()
+        return 'failed'
+
+    type_result, severity_result = classify_report(report.description)
+    succeeded = is_final((type_result, severity_result))
+
+    if not succeeded and job.attempts < MAX_ATTEMPTS:
+        job.status = 'queued'
+        job.locked_at = None
+        job.run_after = _now() + RETRY_BACKOFF * job.attempts
+        job.last_error = type_result['explanation']
+        db.session.commit()
+        return 'queued'
+
+    report.type = type_result['type']
+    report.type_confidence = type_result['confidence']
+    report.type_explanation = type_result['explanation']
+    report.severity = severity_result['severity']
+    report.severity_confidence = severity_result['confidence']
+    report.severity_explanation = severity_result['explanation']
+    report.classification_status = 'complete' if succeeded else 'failed'
+
+    job.status = 'done' if succeeded else 'failed'
+    job.locked_at = None
+    job.last_error = None if succeeded else type_result['explanation']
+    db.session.commit()
+    return job.status
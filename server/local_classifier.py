@@ -0,0 +1,352 @@
+"""
+Local first-tier classifier for disaster type and severity.
+
+A multinomial naive Bayes over hashed word unigrams and bigrams, trained
+from reports the LLM has already classified (weighted by its confidence).
+Reports it is confident about never reach OpenAI; the rest fall through
+to classify_report as before. When OpenAI is unreachable its best guess
+replaces the "Other" / "Moderate" fallback.
+
+Naive Bayes posteriors are overconfident (its independence assumption
+counts correlated words many times), so the threshold is applied to
+calibrated probabilities: every fifth report (by description hash) is held
+out, a model trained on the rest is scored on it, and an isotonic fit maps
+its raw posteriors to how often they matched the LLM's label. The served
+model is then trained on all reports and uses that map.
+
+Reports answered locally are never used for training, so a sample of
+confident answers (LOCAL_MODEL_AUDIT_RATE) is still sent to the LLM. Its
+labels keep the training set growing and measure how often the two agree.
+
+The model is pure Python, trains in well under a second on tens of
+thousands of reports and predicts in tens of microseconds. Training runs
+on a background thread, started by worker.py and on first use, and is
+repeated every LOCAL_MODEL_REFRESH seconds; until a model exists every
+report goes to the LLM.
+"""
+import os
+import re
+import math
+import random
+import threading
+import time
+import zlib
+from bisect import bisect_left
+from collections import defaultdict
+from functools import wraps
+
+from config import app, db
+from models import Report
+from classification_cache import normalize_description, is_cacheable
+
+LOCAL_CLASSIFIER = os.environ.get('LOCAL_CLASSIFIER', '1').lower() not in ('0', 'false', 'no')
+# Applied to calibrated probabilities, i.e. the share of held-out reports with a
+# similar raw score whose label matched the LLM's. 0.9 keeps the local tier to
+# answers that agreed with the LLM at least 9 times in 10; every retrain logs the
+# share of held-out reports it would answer and their agreement at this value.
+THRESHOLD = float(os.environ.get('LOCAL_CLASSIFIER_THRESHOLD', 0.9))
+REFRESH_SECONDS = float(os.environ.get('LOCAL_MODEL_REFRESH', 3600))
+MAX_TRAINING_ROWS = int(os.environ.get('LOCAL_MODEL_MAX_ROWS', 20000))
+# Share of confident local answers sent to the LLM anyway, as fresh training labels
+AUDIT_RATE = float(os.environ.get('LOCAL_MODEL_AUDIT_RATE', 0.05))
+MIN_TRAINING_ROWS = 20
+MIN_CALIBRATION_ROWS = 50
+MIN_CALIBRATION_BLOCK = 20  # held-out predictions behind each calibrated value
+HELD_OUT_EVERY = 5  # one report in five calibrates instead of training
+MIN_LABEL_CONFIDENCE = 0.6  # ignore labels the LLM itself was unsure about
+N_BUCKETS = 2 ** 18
+ALPHA = 0.1  # additive smoothing
+
+LOCAL_TAG = '[local]'
+LLM_TAG = '[llm]'
+# Appended to a local answer given because the LLM could not be reached
+UNAVAILABLE_NOTE = '(LLM unavailable)'
+
+
+def features(description):
+    """Hashed unigram and bigram bucket counts for a description."""
+    words = re.findall(r"[a-z0-9']+", normalize_description(description))
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    counts = defaultdict(int)
+    for gram in grams:
+        counts[zlib.crc32(gram.encode()) % N_BUCKETS] += 1
+    return counts
+
+
+
+def is_final(result):
+    """
+    Whether a classification can be stored as the report's answer.
+
+    Unlike is_cacheable, this also rejects the low-confidence local guess
+    local_first returns while OpenAI is down, which should be retried later
+    rather than kept or copied to duplicates.
+    """
+    results = result if isinstance(result, (tuple, list)) else (result,)
+    return is_cacheable(results) and not any(
+        str(r.get('explanation') or '').endswith(UNAVAILABLE_NOTE) for r in results
+    )
+
+class NaiveBayes:
+    """Multinomial naive Bayes over sparse hashed features with weighted examples."""
+
+    def __init__(self):
+        self.log_priors = {}
+        self.log_likelihoods = {}  # label -> {bucket: log P(bucket | label)}
+        self.log_unseen = {}       # label -> log P(unseen bucket | label)
+        self.n_examples = 0
+
+    def fit(self, examples):
+        """
+        Args:
+            examples: iterable of (feature counts, label, weight)
+        """
+        label_weight = defaultdict(float)
+        bucket_weight = defaultdict(lambda: defaultdict(float))
+        vocabulary = set()
+        for counts, label, weight in examples:
+            label_weight[label] += weight
+            for bucket, n in counts.items():
+                bucket_weight[label][bucket] += n * weight
+                vocabulary.add(bucket)
+            self.n_examples += 1
+
+        total = sum(label_weight.values())
+        vocab_size = max(len(vocabulary), 1)
+        for label, weight in label_weight.items():
+            self.log_priors[label] = math.log(weight / total)
+            denominator = math.log(sum(bucket_weight[label].values()) + ALPHA * vocab_size)
+            self.log_likelihoods[label] = {
+                bucket: math.log(w + ALPHA) - denominator for bucket, w in bucket_weight[label].items()
+            }
+            self.log_unseen[label] = math.log(ALPHA) - denominator
+        return self
+
+    def predict(self, counts):
+        """
+        Returns:
+            tuple: (label, posterior probability), or (None, 0.0) for an empty model
+        """
+        if not self.log_priors:
+            return None, 0.0
+        scores = {}
+        for label, prior in self.log_priors.items():
+            likelihoods = self.log_likelihoods[label]
+            unseen = self.log_unseen[label]
+            scores[label] = prior + sum(n * likelihoods.get(bucket, unseen) for bucket, n in counts.items())
+        best = max(scores, key=scores.get)
+        # Softmax normalisation, shifted by the max for numerical stability
+        total = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1.0 / total
+
+
+class IsotonicCalibrator:
+    """
+    Non-decreasing step function from a raw posterior to the observed accuracy
+    at that score, fitted with pool-adjacent-violators.
+
+    Every step pools at least `min_block` predictions: near-saturated naive
+    Bayes posteriors differ in their tenth decimal, and a handful of lucky
+    predictions must not earn a score range an accuracy of 1.0.
+    """
+
+    def __init__(self, scores, correct, min_block=MIN_CALIBRATION_BLOCK):
+        blocks = []  # [highest score in block, correct predictions, predictions]
+
+        def merge_last():
+            upper, hits, n = blocks.pop()
+            blocks[-1] = [upper, blocks[-1][1] + hits, blocks[-1][2] + n]
+
+        for score, hit in sorted(zip(scores, correct)):
+            blocks.append([score, float(hit), 1])
+            # Merge backwards while accuracy would decrease as the score rises, a block
+            # is too small, or two blocks share a score (saturated posteriors of 1.0)
+            while len(blocks) > 1 and (blocks[-2][1] / blocks[-2][2] >= blocks[-1][1] / blocks[-1][2]
+                                       or blocks[-2][2] < min_block or blocks[-2][0] == blocks[-1][0]):
+                merge_last()
+        while len(blocks) > 1 and blocks[-1][2] < min_block:
+            merge_last()
+        self.upper_scores = [block[0] for block in blocks]
+        self.accuracies = [block[1] / block[2] for block in blocks]
+
+    def __call__(self, score):
+        i = bisect_left(self.upper_scores, score)
+        return self.accuracies[min(i, len(self.accuracies) - 1)]
+
+
+class CalibratedModel:
+    """A NaiveBayes model whose posteriors are mapped through an IsotonicCalibrator."""
+
+    def __init__(self, model, calibrator, held_out):
+        self.model = model
+        self.calibrator = calibrator
+        self.n_examples = model.n_examples
+        # Held-out share answered at THRESHOLD and its agreement with the LLM
+        answered = [hit for p, hit in held_out if calibrator(p) >= THRESHOLD]
+        self.coverage = len(answered) / len(held_out)
+        self.agreement = sum(answered) / len(answered) if answered else None
+
+    def predict(self, counts):
+        label, posterior = self.model.predict(counts)
+        return label, self.calibrator(posterior)
+
+
+class LocalClassifier:
+    """The type and severity models, trained from the reports table."""
+
+    def __init__(self):
+        self.type_model = None
+        self.severity_model = None
+        self.trained_at = 0.0
+        self._lock = threading.Lock()
+        self._training = False
+
+    def train(self):
+        with app.app_context():
+            rows = db.session.query(
+                Report.description, Report.type, Report.type_confidence,
+                Report.severity, Report.severity_confidence,
+            ).filter(
+                Report.classification_status == 'complete',
+                # Never learn from our own guesses
+                db.or_(Report.type_explanation.is_(None), ~Report.type_explanation.startswith(LOCAL_TAG)),
+                # Duplicates copy their original's answer (which may itself be a
+                # local guess); the original is already in the training set
+                Report.duplicate_of_id.is_(None),
+            ).order_by(Report.id.desc()).limit(MAX_TRAINING_ROWS).all()
+            db.session.remove()
+
+        type_examples, severity_examples = [], []
+        for description, report_type, type_conf, severity, severity_conf in rows:
+            counts = features(description)
+            # Split on the description so resubmissions land on the same side
+            held_out = zlib.crc32(normalize_description(description).encode()) % HELD_OUT_EVERY == 0
+            if report_type and (type_conf or 0) >= MIN_LABEL_CONFIDENCE:
+                type_examples.append((counts, report_type, type_conf, held_out))
+            if severity and (severity_conf or 0) >= MIN_LABEL_CONFIDENCE:
+                severity_examples.append((counts, severity, severity_conf, held_out))
+
+        self.type_model = self._fit(type_examples)
+        self.severity_model = self._fit(severity_examples)
+        self.trained_at = time.monotonic()
+        print(f"🧠 Local classifier trained on {len(type_examples)} type / "
+              f"{len(severity_examples)} severity examples")
+        for name, model in (('type', self.type_model), ('severity', self.severity_model)):
+            if model:
+                agreement = f"{model.agreement:.0%}" if model.agreement is not None else "n/a"
+                print(f"   {name}: at threshold {THRESHOLD} answers {model.coverage:.0%} of held-out "
+                      f"reports, agreeing with the LLM on {agreement}")
+
+    @staticmethod
+    def _fit(examples):
+        """
+        Args:
+            examples: list of (feature counts, label, weight, held out?)
+
+        Returns:
+            CalibratedModel, or None if there is too little data to train and calibrate
+        """
+        train = [(counts, label, weight) for counts, label, weight, held_out in examples if not held_out]
+        held_out = [(counts, label) for counts, label, _, is_held_out in examples if is_held_out]
+        if (len(train) < MIN_TRAINING_ROWS or len(held_out) < MIN_CALIBRATION_ROWS
+                or len({label for _, label, _ in train}) < 2):
+            return None
+
+        split_model = NaiveBayes().fit(train)
+        scored = []
+        for counts, label in held_out:
+            predicted, posterior = split_model.predict(counts)
+            scored.append((posterior, predicted == label))
+        calibrator = IsotonicCalibrator(*zip(*scored))
+
+        model = NaiveBayes().fit((counts, label, weight) for counts, label, weight, _ in examples)
+        return CalibratedModel(model, calibrator, scored)
+
+    def start_training(self):
+        """Train (or retrain) on a background thread, unless that is already happening."""
+        with self._lock:
+            if self._training:
+                return
+            self._training = True
+        threading.Thread(target=self._train_in_background, name='local-classifier', daemon=True).start()
+
+    def _train_in_background(self):
+        try:
+            self.train()
+        except Exception as e:
+            print(f"[Local classifier] Training failed: {str(e)}")
+            self.trained_at = time.monotonic()  # keep any old model, try again later
+        finally:
+            self._training = False
+
+    def classify(self, description):
+        """
+        Returns:
+            tuple: (type_result, severity_result) in classify_report's shape, or
+            None if no model has enough training data yet
+        """
+        # Never trains on the calling thread; callers use the LLM until a model exists
+        if not self.trained_at or time.monotonic() - self.trained_at > REFRESH_SECONDS:
+            self.start_training()
+        type_model, severity_model = self.type_model, self.severity_model
+        if type_model is None or severity_model is None:
+            return None
+
+        counts = features(description)
+        report_type, type_p = type_model.predict(counts)
+        severity, severity_p = severity_model.predict(counts)
+        return (
+            {'type': report_type, 'confidence': round(type_p, 3),
+             'explanation': f"{LOCAL_TAG} Naive Bayes on {type_model.n_examples} past reports"},
+            {'severity': severity, 'confidence': round(severity_p, 3),
+             'explanation': f"{LOCAL_TAG} Naive Bayes on {severity_model.n_examples} past reports"},
+        )
+
+
+local_classifier = LocalClassifier()
+stats = {'local': 0, 'llm': 0, 'local_fallback': 0, 'audited': 0, 'audit_agreed': 0}
+_audit_random = random.Random()
+
+
+def _tag(result, tag):
+    return {**result, 'explanation': f"{tag} {result['explanation']}"}
+
+
+def local_first(fn):
+    """
+    Decorate classify_report so the local model answers when it is confident.
+
+    Both its calibrated type and severity probabilities must reach
+    LOCAL_CLASSIFIER_THRESHOLD; otherwise, and for an AUDIT_RATE sample of
+    confident answers, the LLM is called. The tier that answered is prefixed
+    to the explanations ("[local]" or "[llm]"). Failure fallbacks keep their
+    "Classification failed" text so callers can still detect them, unless the
+    local model can stand in.
+    """
+    @wraps(fn)
+    def wrapper(description):
+        local = local_classifier.classify(description) if LOCAL_CLASSIFIER else None
+        audited = False
+        if local and all(r['confidence'] >= THRESHOLD for r in local):
+            if _audit_random.random() >= AUDIT_RATE:
+                stats['local'] += 1
+                return local
+            audited = True
+
+        type_result, severity_result = fn(description)
+        if is_cacheable((type_result, severity_result)):
+            stats['llm'] += 1
+            if audited:
+                stats['audited'] += 1
+                if (local[0]['type'], local[1]['severity']) == (type_result['type'], severity_result['severity']):
+                    stats['audit_agreed'] += 1
+            return _tag(type_result, LLM_TAG), _tag(severity_result, LLM_TAG)
+
+        if local:
+            # OpenAI is unreachable: a low-confidence local answer beats "Other"
+            stats['local_fallback'] += 1
+            return tuple(
+                {**r, 'explanation': f"{r['explanation']} {UNAVAILABLE_NOTE}"} for r in local
+            )
+        return type_result, severity_result
+    return wrapper
@@ -0,0 +1,36 @@
+"""add table_versions for conditional GETs
+
+Revision ID: 3f9c2a71d5e4
+Revises: bbd268b58f0f
+Create Date: 2026-10-18 10:12:41.518204
+
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a71d5e4'
+down_revision = 'bbd268b58f0f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    table_versions = op.create_table('table_versions',
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    now = datetime.now(timezone.utc)
+    op.bulk_insert(table_versions, [
+        {'table_name': name, 'version': 1, 'updated_at': now}
+        for name in ('users', 'reports', 'donations')
+    ])
+
+
+def downgrade():
+    op.drop_table('table_versions')
@@ -0,0 +1,33 @@
+"""add classification_cache
+
+Revision ID: 4d7e21c9f08b
+Revises: e8b3f6c14a27
+Create Date: 2026-10-18 15:47:30.118642
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d7e21c9f08b'
+down_revision = 'e8b3f6c14a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('classification_cache',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('result', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_classification_cache_expires_at'), 'classification_cache', ['expires_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_classification_cache_expires_at'), table_name='classification_cache')
+    op.drop_table('classification_cache')
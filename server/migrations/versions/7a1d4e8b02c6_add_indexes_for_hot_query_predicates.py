@@ -0,0 +1,53 @@
+"""add indexes for hot query predicates
+
+Revision ID: 7a1d4e8b02c6
+Revises: 3f9c2a71d5e4
+Create Date: 2026-10-18 11:40:07.092311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a1d4e8b02c6'
+down_revision = '3f9c2a71d5e4'
+branch_labels = None
+depends_on = None
+
+
+def indexes(dialect):
+    """(name, table, columns) - columns may be SQL expressions"""
+    # Same order as the report lists (date DESC NULLS LAST, id DESC), so keyset
+    # pages seek into the index; SQLite can't declare NULLS LAST on an index
+    # but already sorts NULLs last when descending
+    date_desc = 'date DESC NULLS LAST' if dialect == 'postgresql' else 'date DESC'
+    return [
+        ('ix_reports_user_id', 'reports', ['user_id']),                   # UserReports
+        ('ix_reports_severity', 'reports', ['severity']),                 # AdminStats counts
+        ('ix_reports_date_id', 'reports', [sa.text(date_desc), sa.text('id DESC')]),  # list ordering / keyset pagination
+        ('ix_donations_report_id', 'donations', ['report_id']),           # Report.donations selectin loads
+        ('ix_donations_email_lower', 'donations', [sa.text('lower(email)')]),  # UserReports donor match
+    ]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction, and does
+        # not take the write lock a plain CREATE INDEX holds on the table
+        with op.get_context().autocommit_block():
+            for name, table, columns in indexes('postgresql'):
+                op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, table, columns in indexes(op.get_bind().dialect.name):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, _ in reversed(indexes('postgresql')):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        for name, table, _ in reversed(indexes(op.get_bind().dialect.name)):
+            op.drop_index(name, table_name=table)
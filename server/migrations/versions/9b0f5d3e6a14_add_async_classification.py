@@ -0,0 +1,41 @@
+"""add background classification status and job queue
+
+Revision ID: 9b0f5d3e6a14
+Revises: 4d7e21c9f08b
+Create Date: 2026-10-18 16:58:04.773215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b0f5d3e6a14'
+down_revision = '4d7e21c9f08b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Plain ADD COLUMN (not batch mode): a SQLite table rebuild would drop the reports_fts triggers
+    op.add_column('reports', sa.Column('classification_status', sa.String(), server_default='complete', nullable=False))
+
+    op.create_table('classification_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('report_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('run_after', sa.DateTime(), nullable=False),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['report_id'], ['reports.id'], name=op.f('fk_classification_jobs_report_id_reports'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_classification_jobs_status_run_after', 'classification_jobs', ['status', 'run_after'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_classification_jobs_status_run_after', table_name='classification_jobs')
+    op.drop_table('classification_jobs')
+    op.drop_column('reports', 'classification_status')
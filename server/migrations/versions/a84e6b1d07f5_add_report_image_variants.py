@@ -0,0 +1,25 @@
+"""add reports.image_variants for resized local image copies
+
+Revision ID: a84e6b1d07f5
+Revises: f3a7c9e2b5d8
+Create Date: 2026-10-18 21:37:40.281956
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a84e6b1d07f5'
+down_revision = 'f3a7c9e2b5d8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Plain ADD COLUMN (not batch mode): a SQLite table rebuild would drop the reports_fts triggers
+    op.add_column('reports', sa.Column('image_variants', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('reports', 'image_variants')
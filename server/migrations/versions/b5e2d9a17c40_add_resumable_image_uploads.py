@@ -0,0 +1,48 @@
+"""add resumable image upload sessions and reports.image_upload_id
+
+Revision ID: b5e2d9a17c40
+Revises: a84e6b1d07f5
+Create Date: 2026-10-18 22:41:09.517203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e2d9a17c40'
+down_revision = 'a84e6b1d07f5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('image_uploads',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('filename', sa.String(), nullable=True),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('received', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('stored_path', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_image_uploads_status_updated_at', 'image_uploads', ['status', 'updated_at'], unique=False)
+
+    # Plain ADD COLUMN (not batch mode): a SQLite table rebuild would drop the reports_fts triggers.
+    # SQLite can't add a foreign key to an existing table, so the constraint is Postgres-only.
+    op.add_column('reports', sa.Column('image_upload_id', sa.String(length=32), nullable=True))
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_foreign_key(
+            op.f('fk_reports_image_upload_id_image_uploads'), 'reports', 'image_uploads',
+            ['image_upload_id'], ['id'], ondelete='SET NULL'
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint(op.f('fk_reports_image_upload_id_image_uploads'), 'reports', type_='foreignkey')
+    op.drop_column('reports', 'image_upload_id')
+    op.drop_index('ix_image_uploads_status_updated_at', table_name='image_uploads')
+    op.drop_table('image_uploads')
@@ -0,0 +1,49 @@
+"""add reports.image_path for looking up stored files by path
+
+Revision ID: c4f8a2d61e95
+Revises: b5e2d9a17c40
+Create Date: 2026-10-18 23:52:40.318842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f8a2d61e95'
+down_revision = 'b5e2d9a17c40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Plain ADD COLUMN (not batch mode): a SQLite table rebuild would drop the reports_fts triggers
+    op.add_column('reports', sa.Column('image_path', sa.String(), nullable=True))
+
+    # Backfill from the local /uploads URLs (the same split as upload_storage.relative_path_from_url)
+    bind = op.get_bind()
+    reports = sa.table('reports', sa.column('id', sa.Integer), sa.column('image', sa.String),
+                       sa.column('image_path', sa.String))
+    rows = bind.execute(sa.select(reports.c.id, reports.c.image).where(reports.c.image.contains('/uploads/')))
+    for report_id, image in rows.fetchall():
+        bind.execute(
+            reports.update().where(reports.c.id == report_id)
+            .values(image_path=image.rsplit('/uploads/', 1)[1])
+        )
+
+    if bind.dialect.name == 'postgresql':
+        # See 7a1d4e8b02c6: CONCURRENTLY avoids holding the table's write lock
+        with op.get_context().autocommit_block():
+            op.create_index('ix_reports_image_path', 'reports', ['image_path'],
+                            postgresql_concurrently=True, if_not_exists=True)
+    else:
+        op.create_index('ix_reports_image_path', 'reports', ['image_path'])
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index('ix_reports_image_path', table_name='reports', postgresql_concurrently=True, if_exists=True)
+    else:
+        op.drop_index('ix_reports_image_path', table_name='reports')
+    op.drop_column('reports', 'image_path')
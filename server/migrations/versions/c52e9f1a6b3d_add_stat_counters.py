@@ -0,0 +1,38 @@
+"""add stat_counters for the admin dashboard
+
+Revision ID: c52e9f1a6b3d
+Revises: 7a1d4e8b02c6
+Create Date: 2026-10-18 13:05:52.731940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52e9f1a6b3d'
+down_revision = '7a1d4e8b02c6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stat_counters',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('value', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Populate from existing data; afterwards the ORM keeps the counters current
+    op.execute("INSERT INTO stat_counters (name, value) SELECT 'users', COUNT(*) FROM users")
+    op.execute("INSERT INTO stat_counters (name, value) SELECT 'reports', COUNT(*) FROM reports")
+    op.execute("INSERT INTO stat_counters (name, value) SELECT 'donations', COUNT(*) FROM donations")
+    op.execute("INSERT INTO stat_counters (name, value) "
+               "SELECT 'donation_amount', COALESCE(SUM(amount_number), 0) FROM donations")
+    op.execute("INSERT INTO stat_counters (name, value) "
+               "SELECT 'severity:' || severity, COUNT(*) FROM reports WHERE severity IS NOT NULL GROUP BY severity")
+    op.execute("INSERT INTO stat_counters (name, value) "
+               "SELECT 'type:' || type, COUNT(*) FROM reports GROUP BY type")
+
+
+def downgrade():
+    op.drop_table('stat_counters')
@@ -0,0 +1,35 @@
+"""add reports.duplicate_of_id for near-duplicate submissions
+
+Revision ID: d61a0c7f3b92
+Revises: 9b0f5d3e6a14
+Create Date: 2026-10-18 20:31:47.118402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd61a0c7f3b92'
+down_revision = '9b0f5d3e6a14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Plain ADD COLUMN (not batch mode): a SQLite table rebuild would drop the reports_fts triggers.
+    # SQLite can't add a foreign key to an existing table, so the constraint is Postgres-only.
+    op.add_column('reports', sa.Column('duplicate_of_id', sa.Integer(), nullable=True))
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_foreign_key(
+            op.f('fk_reports_duplicate_of_id_reports'), 'reports', 'reports',
+            ['duplicate_of_id'], ['id'], ondelete='SET NULL'
+        )
+    op.create_index('ix_reports_duplicate_of_id', 'reports', ['duplicate_of_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_reports_duplicate_of_id', table_name='reports')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint(op.f('fk_reports_duplicate_of_id_reports'), 'reports', type_='foreignkey')
+    op.drop_column('reports', 'duplicate_of_id')
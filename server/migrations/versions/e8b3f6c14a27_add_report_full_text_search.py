@@ -0,0 +1,75 @@
+"""add full-text search index over reports
+
+Revision ID: e8b3f6c14a27
+Revises: c52e9f1a6b3d
+Create Date: 2026-10-18 14:21:16.402857
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b3f6c14a27'
+down_revision = 'c52e9f1a6b3d'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_TRIGGERS = [
+    # External-content FTS5 tables must be told about every change to the source rows
+    """CREATE TRIGGER reports_fts_ai AFTER INSERT ON reports BEGIN
+        INSERT INTO reports_fts(rowid, type, location, description)
+        VALUES (new.id, new.type, new.location, new.description);
+    END""",
+    """CREATE TRIGGER reports_fts_ad AFTER DELETE ON reports BEGIN
+        INSERT INTO reports_fts(reports_fts, rowid, type, location, description)
+        VALUES ('delete', old.id, old.type, old.location, old.description);
+    END""",
+    """CREATE TRIGGER reports_fts_au AFTER UPDATE OF type, location, description ON reports BEGIN
+        INSERT INTO reports_fts(reports_fts, rowid, type, location, description)
+        VALUES ('delete', old.id, old.type, old.location, old.description);
+        INSERT INTO reports_fts(rowid, type, location, description)
+        VALUES (new.id, new.type, new.location, new.description);
+    END""",
+]
+
+
+# Must stay identical to search.REPORT_TSVECTOR, or Postgres won't use the index
+REPORT_TSVECTOR = (
+    "setweight(to_tsvector('english', coalesce(type, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(location, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # An expression index rather than a stored generated column: adding that
+        # column rewrites the whole table under an ACCESS EXCLUSIVE lock, while
+        # CREATE INDEX CONCURRENTLY lets reads and writes continue
+        with op.get_context().autocommit_block():
+            op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_reports_search_vector "
+                       f"ON reports USING GIN (({REPORT_TSVECTOR}))")
+    elif dialect == 'sqlite':
+        op.execute("""
+            CREATE VIRTUAL TABLE reports_fts USING fts5(
+                type, location, description,
+                content='reports', content_rowid='id',
+                tokenize='porter unicode61'
+            )
+        """)
+        for trigger in SQLITE_TRIGGERS:
+            op.execute(trigger)
+        op.execute("INSERT INTO reports_fts(reports_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_reports_search_vector")
+    elif dialect == 'sqlite':
+        for name in ('reports_fts_au', 'reports_fts_ad', 'reports_fts_ai'):
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute("DROP TABLE IF EXISTS reports_fts")
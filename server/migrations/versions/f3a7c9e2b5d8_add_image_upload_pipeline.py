@@ -0,0 +1,43 @@
+"""add reports.image_status and the image upload job queue
+
+Revision ID: f3a7c9e2b5d8
+Revises: d61a0c7f3b92
+Create Date: 2026-10-18 21:02:13.604577
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a7c9e2b5d8'
+down_revision = 'd61a0c7f3b92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Plain ADD COLUMN (not batch mode): a SQLite table rebuild would drop the reports_fts triggers
+    op.add_column('reports', sa.Column('image_status', sa.String(), nullable=True))
+
+    op.create_table('image_upload_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('report_id', sa.Integer(), nullable=False),
+    sa.Column('spool_path', sa.String(), nullable=False),
+    sa.Column('provisional_url', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('run_after', sa.DateTime(), nullable=False),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['report_id'], ['reports.id'], name=op.f('fk_image_upload_jobs_report_id_reports'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_image_upload_jobs_status_run_after', 'image_upload_jobs', ['status', 'run_after'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_image_upload_jobs_status_run_after', table_name='image_upload_jobs')
+    op.drop_table('image_upload_jobs')
+    op.drop_column('reports', 'image_status')
@@ -1,12 +1,105 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey
-from sqlalchemy.orm import relationship, validates
+from sqlalchemy import Column, Integer, String, DateTime, Date, Float, ForeignKey, Index, func
+from sqlalchemy import inspect as sa_inspect, event, update, select, insert
+from sqlalchemy.orm import relationship, validates, Session, mapped_column
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy_serializer import SerializerMixin
+import uuid
 from datetime import datetime, timezone
+from functools import lru_cache
+from operator import attrgetter
 from config import db
+from upload_storage import relative_path_from_url
 from werkzeug.security import generate_password_hash, check_password_hash
 
 
-class User(db.Model, SerializerMixin):
+def _split_rules(rules):
+    """Return the negative serialize_rules of a model as dotted paths without the '-'."""
+    return frozenset(rule[1:] for rule in rules if rule.startswith('-'))
+
+
+def _column_converter(model, column_attr):
+    """Pick the value converter for a column once, instead of type-checking every value."""
+    column_type = column_attr.columns[0].type
+    if isinstance(column_type, DateTime):
+        fmt = model.datetime_format
+        return lambda value: value.strftime(fmt) if value is not None else None
+    if isinstance(column_type, Date):
+        fmt = model.date_format
+        return lambda value: value.strftime(fmt) if value is not None else None
+    return None
+
+
+@lru_cache(maxsize=256)
+def compile_serializer(model, only=(), excluded=frozenset()):
+    """
+    Build a flat serializer function for a model and field set.
+
+    Produces the same output as SerializerMixin.to_dict(only=only), but the
+    schema walk (serialize_rules, mapper introspection, per-value type
+    dispatch) happens once per (model, only) instead of once per object.
+
+    Args:
+        model: A FastSerializerMixin model class
+        only (tuple): Exclusive list of top-level keys, or () for the default schema
+        excluded (frozenset): Dotted paths excluded by a parent's serialize_rules
+
+    Returns:
+        callable: obj -> dict
+    """
+    mapper = sa_inspect(model)
+    excluded = excluded | _split_rules(model.serialize_rules)
+
+    if only:
+        keys = [key for key in only if key in mapper.attrs]
+    else:
+        keys = [attr.key for attr in mapper.attrs if attr.key not in excluded]
+
+    plain_keys, converted, nested = [], [], []
+    for key in keys:
+        if key in mapper.relationships:
+            rel = mapper.relationships[key]
+            prefix = key + '.'
+            child = compile_serializer(
+                rel.mapper.class_,
+                excluded=frozenset(path[len(prefix):] for path in excluded if path.startswith(prefix)),
+            )
+            nested.append((key, rel.uselist, child))
+        else:
+            converter = _column_converter(model, mapper.column_attrs[key])
+            if converter:
+                converted.append((key, converter))
+            else:
+                plain_keys.append(key)
+
+    get_plain = attrgetter(*plain_keys) if plain_keys else None
+    if len(plain_keys) == 1:
+        # attrgetter with one name returns the bare value, not a tuple
+        get_single = get_plain
+        get_plain = lambda obj: (get_single(obj),)
+
+    def serialize(obj):
+        data = dict(zip(plain_keys, get_plain(obj))) if get_plain else {}
+        for key, converter in converted:
+            data[key] = converter(getattr(obj, key))
+        for key, uselist, child in nested:
+            value = getattr(obj, key)
+            if uselist:
+                data[key] = [child(item) for item in value]
+            else:
+                data[key] = child(value) if value is not None else None
+        return data
+
+    return serialize
+
+
+class FastSerializerMixin(SerializerMixin):
+    """SerializerMixin with a precompiled to_fast_dict() for hot list endpoints."""
+
+    def to_fast_dict(self, only=()):
+        return compile_serializer(type(self), tuple(only))(self)
+
+
+class User(db.Model, FastSerializerMixin):
     __tablename__ = 'users'
 
     id = db.Column(Integer, primary_key=True)
@@ -32,7 +125,7 @@ class User(db.Model, SerializerMixin):
         return f"<User {self.username}>"
 
 
-class Admin(db.Model, SerializerMixin):
+class Admin(db.Model, FastSerializerMixin):
     __tablename__ = 'admins'
 
     id = db.Column(Integer, primary_key=True)
@@ -58,16 +151,17 @@ class Admin(db.Model, SerializerMixin):
         return f"<Admin {self.username}>"
 
 
-class Report(db.Model, SerializerMixin):
+class Report(db.Model, FastSerializerMixin):
     __tablename__ = 'reports'
 
     id = db.Column(Integer, primary_key=True)
-    type = db.Column(String, nullable=False)
+    # active_history: the stat counters need the old value even when it was not loaded
+    type = mapped_column(String, nullable=False, active_history=True)
     location = db.Column(String, nullable=False)
     date = db.Column(DateTime, default=lambda: datetime.now(timezone.utc))
     description = db.Column(String, nullable=False)
     image = db.Column(String, nullable=True)
-    severity = db.Column(String, nullable=True)
+    severity = mapped_column(String, nullable=True, active_history=True)
     reporter_name = db.Column(String, nullable=False, default="Unknown Reporter")
     
     # AI Classification metadata
@@ -75,6 +169,20 @@ class Report(db.Model, SerializerMixin):
     type_explanation = db.Column(String, nullable=True)  
     severity_confidence = db.Column(Float, nullable=True)  
     severity_explanation = db.Column(String, nullable=True)  
+    # 'pending' while a background job classifies the report, then 'complete' (or 'failed')
+    classification_status = db.Column(String, nullable=False, default='complete', server_default='complete')
+    # None without an image; 'pending' while a local copy waits for its Cloudinary upload,
+    # then 'uploaded' (CDN URL), 'failed' or 'local' (Cloudinary not configured)
+    image_status = db.Column(String, nullable=True)
+    # srcset-style map of resized local copies: {"webp": {"480w": url, ...}, "jpeg": {...}}
+    image_variants = db.Column(db.JSON, nullable=True)
+    # Set when the report was a near-duplicate of an earlier one at submission (see duplicates.py)
+    duplicate_of_id = db.Column(Integer, ForeignKey('reports.id', ondelete='SET NULL'), nullable=True)
+    # Set when the image arrived through a resumable upload session (see resumable_uploads.py)
+    image_upload_id = db.Column(String(32), ForeignKey('image_uploads.id', ondelete='SET NULL'), nullable=True)
+    # The stored file behind a local /uploads image URL, kept in step with image so
+    # resumable_uploads.blob_in_use can find a file's reports through an index
+    image_path = db.Column(String, nullable=True)
 
     user_id = db.Column(Integer, ForeignKey('users.id'))
     user = relationship('User', back_populates='reports')
@@ -82,7 +190,24 @@ class Report(db.Model, SerializerMixin):
     # Donations relationship
     donations = db.relationship('Donation', back_populates='report', cascade="all, delete-orphan", lazy='selectin')
 
-    serialize_rules = ("-user.reports", "-donations.report")
+    serialize_rules = ("-user.reports", "-donations.report", "-image_path")
+
+    __table_args__ = (
+        Index('ix_reports_user_id', 'user_id'),
+        Index('ix_reports_severity', 'severity'),
+        # Matches the list order (date DESC NULLS LAST, id DESC) so keyset pages
+        # seek instead of sorting. SQLite can't declare NULLS LAST on an index,
+        # but it already sorts NULLs last when descending.
+        Index('ix_reports_date_id', date.desc().nulls_last(), id.desc()).ddl_if(dialect='postgresql'),
+        Index('ix_reports_date_id', date.desc(), id.desc()).ddl_if(dialect='sqlite'),
+        Index('ix_reports_duplicate_of_id', 'duplicate_of_id'),
+        Index('ix_reports_image_path', 'image_path'),
+    )
+
+    @validates('image')
+    def validate_image(self, key, value):
+        self.image_path = relative_path_from_url(value)
+        return value
 
     @validates('type')
     def validate_type(self, key, value):
@@ -91,7 +216,7 @@ class Report(db.Model, SerializerMixin):
         return value
 
 
-class Donation(db.Model, SerializerMixin):
+class Donation(db.Model, FastSerializerMixin):
     __tablename__ = 'donations'
 
     id = db.Column(Integer, primary_key=True)
@@ -101,12 +226,17 @@ class Donation(db.Model, SerializerMixin):
     phone = db.Column(String, nullable=False)
     type = db.Column(String, nullable=False)  # e.g., "Money", "Food"
     amount = db.Column(String, nullable=False)  # can be text or number
-    amount_number = db.Column(Float, nullable=True)  # numeric if provided
+    amount_number = mapped_column(Float, nullable=True, active_history=True)  # numeric if provided
     created_at = db.Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
 
     report = relationship('Report', back_populates='donations')
 
     serialize_rules = ("-report.donations",)
+
+    __table_args__ = (
+        Index('ix_donations_report_id', 'report_id'),
+        Index('ix_donations_email_lower', func.lower(email)),
+    )
     
     # Override SerializerMixin's to_dict to return 'name' instead of 'full_name'
     def to_dict(self, **kwargs):
@@ -116,5 +246,241 @@ class Donation(db.Model, SerializerMixin):
             base['name'] = base.pop('full_name')
         return base
 
+    def to_fast_dict(self, only=()):
+        base = super().to_fast_dict(only=only)
+        if 'full_name' in base:
+            base['name'] = base.pop('full_name')
+        return base
+
     def __repr__(self):
         return f"<Donation {self.id} by {self.full_name} for Report {self.report_id}>"
+
+
+class TableVersion(db.Model):
+    """Change counter per table, bumped on every flush that touches the table.
+
+    Stored in the database so every gunicorn worker sees the same version.
+    Used to build ETag/Last-Modified validators for conditional GETs.
+    """
+    __tablename__ = 'table_versions'
+
+    table_name = db.Column(String, primary_key=True)
+    version = db.Column(Integer, nullable=False, default=0)
+    updated_at = db.Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<TableVersion {self.table_name} v{self.version}>"
+
+
+# Tables whose changes are versioned, plus the tables their cascades also touch
+VERSIONED_MODELS = {
+    User: ('users', 'reports', 'donations'),
+    Report: ('reports', 'donations'),
+    Donation: ('donations',),
+}
+
+
+@event.listens_for(Session, 'after_flush')
+def bump_table_versions(session, flush_context):
+    """Bump the version of every table written in this flush, inside the same transaction."""
+    tables = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        touched = VERSIONED_MODELS.get(type(obj))
+        if touched:
+            # Inserts and updates only touch their own table; deletes can cascade
+            tables.update(touched if obj in session.deleted else touched[:1])
+    if not tables:
+        return
+
+    connection = session.connection()
+    now = datetime.now(timezone.utc)
+    result = connection.execute(
+        update(TableVersion.__table__)
+        .where(TableVersion.__table__.c.table_name.in_(tables))
+        .values(version=TableVersion.__table__.c.version + 1, updated_at=now)
+    )
+    if result.rowcount != len(tables):
+        # First write to a table since the versions table was created
+        existing = set(connection.execute(
+            select(TableVersion.__table__.c.table_name)
+            .where(TableVersion.__table__.c.table_name.in_(tables))
+        ).scalars())
+        for name in tables - existing:
+            connection.execute(insert(TableVersion.__table__).values(table_name=name, version=1, updated_at=now))
+
+
+class ClassificationJob(db.Model):
+    """Queued background classification of a report (processed by worker.py)."""
+    __tablename__ = 'classification_jobs'
+
+    id = db.Column(Integer, primary_key=True)
+    report_id = db.Column(Integer, ForeignKey('reports.id', ondelete='CASCADE'), nullable=False)
+    status = db.Column(String, nullable=False, default='queued')  # queued, running, done, failed
+    attempts = db.Column(Integer, nullable=False, default=0)
+    run_after = db.Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    locked_at = db.Column(DateTime, nullable=True)
+    last_error = db.Column(String, nullable=True)
+    created_at = db.Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        Index('ix_classification_jobs_status_run_after', 'status', 'run_after'),
+    )
+
+    def __repr__(self):
+        return f"<ClassificationJob {self.id} report={self.report_id} {self.status}>"
+
+
+class ImageUploadJob(db.Model):
+    """Queued Cloudinary upload of a report image spooled to local disk (see image_pipeline.py)."""
+    __tablename__ = 'image_upload_jobs'
+
+    id = db.Column(Integer, primary_key=True)
+    report_id = db.Column(Integer, ForeignKey('reports.id', ondelete='CASCADE'), nullable=False)
+    spool_path = db.Column(String, nullable=False)
+    provisional_url = db.Column(String, nullable=False)
+    status = db.Column(String, nullable=False, default='queued')  # queued, running, done, failed
+    attempts = db.Column(Integer, nullable=False, default=0)
+    run_after = db.Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    locked_at = db.Column(DateTime, nullable=True)
+    last_error = db.Column(String, nullable=True)
+    created_at = db.Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        Index('ix_image_upload_jobs_status_run_after', 'status', 'run_after'),
+    )
+
+    def __repr__(self):
+        return f"<ImageUploadJob {self.id} report={self.report_id} {self.status}>"
+
+
+class ImageUpload(db.Model):
+    """Resumable, chunked upload of a report image staged on local disk (see resumable_uploads.py)."""
+    __tablename__ = 'image_uploads'
+
+    # Random, so the id also serves as the client's handle on its own session
+    id = db.Column(String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    filename = db.Column(String, nullable=True)
+    size = db.Column(Integer, nullable=False)
+    received = db.Column(Integer, nullable=False, default=0)
+    status = db.Column(String, nullable=False, default='uploading')  # uploading, receiving, complete
+    # Content-addressed path under UPLOAD_FOLDER once complete (see upload_storage.py)
+    stored_path = db.Column(String, nullable=True)
+    created_at = db.Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        Index('ix_image_uploads_status_updated_at', 'status', 'updated_at'),
+    )
+
+    def __repr__(self):
+        return f"<ImageUpload {self.id} {self.received}/{self.size} {self.status}>"
+
+
+class ClassificationCache(db.Model):
+    """Persistent tier of the AI classification cache (see classification_cache.py)."""
+    __tablename__ = 'classification_cache'
+
+    key = db.Column(String(64), primary_key=True)  # sha256 of kind, prompt version and description
+    kind = db.Column(String, nullable=False)
+    result = db.Column(String, nullable=False)  # JSON
+    created_at = db.Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    expires_at = db.Column(DateTime, nullable=False)
+
+    # Named explicitly: the metadata naming convention only covers foreign keys
+    __table_args__ = (
+        Index('ix_classification_cache_expires_at', 'expires_at'),
+    )
+
+    def __repr__(self):
+        return f"<ClassificationCache {self.kind} {self.key[:12]}>"
+
+
+class StatCounter(db.Model):
+    """Incrementally maintained dashboard counter (see stats.py).
+
+    Names: 'users', 'reports', 'donations', 'donation_amount',
+    'severity:<Severity>' and 'type:<Type>'.
+    """
+    __tablename__ = 'stat_counters'
+
+    name = db.Column(String, primary_key=True)
+    value = db.Column(Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<StatCounter {self.name}={self.value}>"
+
+
+def _report_counter_names(severity, report_type):
+    names = ['reports', f'type:{report_type}']
+    if severity:
+        names.append(f'severity:{severity}')
+    return names
+
+
+def _collect_counter_deltas(session):
+    """Work out how this flush changes each counter, using attribute history for updates."""
+    deltas = {}
+
+    def add(name, delta):
+        deltas[name] = deltas.get(name, 0) + delta
+
+    for obj in session.new:
+        if isinstance(obj, User):
+            add('users', 1)
+        elif isinstance(obj, Report):
+            for name in _report_counter_names(obj.severity, obj.type):
+                add(name, 1)
+        elif isinstance(obj, Donation):
+            add('donations', 1)
+            add('donation_amount', obj.amount_number or 0)
+
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            add('users', -1)
+        elif isinstance(obj, Report):
+            for name in _report_counter_names(obj.severity, obj.type):
+                add(name, -1)
+        elif isinstance(obj, Donation):
+            add('donations', -1)
+            add('donation_amount', -(obj.amount_number or 0))
+
+    for obj in session.dirty:
+        if isinstance(obj, Report):
+            state = sa_inspect(obj).attrs
+            for attr, prefix in (('severity', 'severity:'), ('type', 'type:')):
+                history = state[attr].history
+                if history.has_changes():
+                    for old in history.deleted:
+                        if old:
+                            add(prefix + old, -1)
+                    for new in history.added:
+                        if new:
+                            add(prefix + new, 1)
+        elif isinstance(obj, Donation):
+            history = sa_inspect(obj).attrs.amount_number.history
+            if history.has_changes():
+                add('donation_amount', sum(v or 0 for v in history.added) - sum(v or 0 for v in history.deleted))
+
+    return {name: delta for name, delta in deltas.items() if delta}
+
+
+@event.listens_for(Session, 'after_flush')
+def update_stat_counters(session, flush_context):
+    """Apply counter deltas in the same transaction as the write that caused them."""
+    deltas = _collect_counter_deltas(session)
+    if not deltas:
+        return
+
+    connection = session.connection()
+    table = StatCounter.__table__
+    dialect_insert = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}.get(connection.dialect.name)
+    for name, delta in deltas.items():
+        if dialect_insert:
+            connection.execute(
+                dialect_insert(table).values(name=name, value=delta)
+                .on_conflict_do_update(index_elements=['name'], set_={'value': table.c.value + delta})
+            )
+            continue
+        result = connection.execute(update(table).where(table.c.name == name).values(value=table.c.value + delta))
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(name=name, value=delta))
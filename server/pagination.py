@@ -0,0 +1,216 @@
+"""
+Keyset (cursor) pagination and list filters for report queries.
+
+Reports are ordered newest first on (date, id). A cursor encodes the
+(date, id) of the last row on a page, so the next page is fetched with a
+WHERE clause on those two columns instead of an OFFSET scan.
+"""
+import base64
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy import func, tuple_
+
+from models import Report
+from fieldsets import REPORT_FIELDS, REPORT_INCLUDES, parse_fieldset, report_load_options, serialize_report
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class PaginationError(ValueError):
+    """Raised when a cursor, limit or filter value in the query string is invalid."""
+
+
+def parse_date_param(raw, end_of_day=False):
+    """
+    Parse a YYYY-MM-DD or ISO8601 query parameter into a naive UTC datetime.
+
+    Args:
+        raw (str): The raw query string value
+        end_of_day (bool): For plain dates, return 23:59:59.999999 instead of midnight
+
+    Returns:
+        datetime or None if raw is empty
+    """
+    if not raw:
+        return None
+    iso_candidate = raw.replace("Z", "+00:00") if raw.endswith("Z") else raw
+    try:
+        parsed = datetime.fromisoformat(iso_candidate)
+    except ValueError:
+        raise PaginationError(f"Invalid date '{raw}'. Use YYYY-MM-DD or ISO8601.")
+
+    # A bare date means "the whole day" for the upper bound of a range
+    if end_of_day and len(raw) == 10:
+        parsed = parsed.replace(hour=23, minute=59, second=59, microsecond=999999)
+
+    # Stored dates are naive UTC, so compare against naive UTC
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def encode_token(values):
+    """Encode a list of JSON-compatible values as an opaque URL-safe cursor."""
+    payload = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_token(cursor):
+    """Decode a cursor produced by encode_token. Raises PaginationError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise PaginationError("Invalid cursor")
+
+
+def encode_cursor(report):
+    """Encode the (date, id) position of a report as an opaque URL-safe cursor."""
+    date_value = report.date.isoformat() if report.date else None
+    return encode_token([date_value, report.id])
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor into a (date, id) tuple."""
+    try:
+        date_value, report_id = decode_token(cursor)
+        date_value = datetime.fromisoformat(date_value) if date_value else None
+        if date_value and date_value.tzinfo:
+            date_value = date_value.astimezone(timezone.utc).replace(tzinfo=None)
+        return date_value, int(report_id)
+    except (ValueError, TypeError):
+        raise PaginationError("Invalid cursor")
+
+
+def is_paginated(args):
+    """Pagination is opt-in so existing clients that expect a bare list keep working."""
+    return "limit" in args or "cursor" in args
+
+
+def parse_limit(args):
+    raw = args.get("limit")
+    if raw in (None, ""):
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be at least 1")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def apply_report_filters(query, args):
+    """
+    Apply the server-side list filters from the query string.
+
+    Supported parameters:
+        type       exact match (case-insensitive)
+        severity   exact match (case-insensitive)
+        location   substring match (case-insensitive)
+        date_from  reports on or after this date
+        date_to    reports on or before this date
+    """
+    report_type = args.get("type")
+    if report_type:
+        query = query.filter(func.lower(Report.type) == report_type.lower())
+
+    severity = args.get("severity")
+    if severity:
+        query = query.filter(func.lower(Report.severity) == severity.lower())
+
+    location = args.get("location")
+    if location:
+        query = query.filter(Report.location.ilike(f"%{location}%"))
+
+    date_from = parse_date_param(args.get("date_from"))
+    if date_from:
+        query = query.filter(Report.date >= date_from)
+
+    date_to = parse_date_param(args.get("date_to"), end_of_day=True)
+    if date_to:
+        query = query.filter(Report.date <= date_to)
+
+    return query
+
+
+def order_reports(query):
+    """Newest first; reports without a date sort last."""
+    return query.order_by(Report.date.desc().nulls_last(), Report.id.desc())
+
+
+def paginate_reports(query, args):
+    """
+    Run a keyset-paginated report query.
+
+    Dated reports and the NULL-date tail are read separately, each with a
+    single range condition, so both pages seek into ix_reports_date_id
+    (date DESC NULLS LAST, id DESC) instead of sorting the filtered table.
+
+    Args:
+        query: A Report query with any filters already applied
+        args: The request query string (request.args)
+
+    Returns:
+        tuple: (list of Report rows, next_cursor or None)
+    """
+    limit = parse_limit(args)
+    cursor = args.get("cursor")
+    position = decode_cursor(cursor) if cursor else None
+
+    # Fetch one extra row to know whether another page exists
+    rows = []
+    if position is None or position[0] is not None:
+        dated = query.filter(Report.date.isnot(None))
+        if position is not None:
+            dated = dated.filter(tuple_(Report.date, Report.id) < position)
+        rows = order_reports(dated).limit(limit + 1).all()
+    if len(rows) <= limit:
+        undated = query.filter(Report.date.is_(None))
+        if position is not None and position[0] is None:
+            # Already in the NULL-date tail: only smaller ids remain
+            undated = undated.filter(Report.id < position[1])
+        rows += undated.order_by(Report.id.desc()).limit(limit + 1 - len(rows)).all()
+
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def build_report_query(query, args):
+    """
+    Apply the ?fields=/?include= projection and list filters to a report query.
+
+    Returns:
+        tuple: (query, Fieldset or None)
+    """
+    fieldset = parse_fieldset(args, REPORT_FIELDS, REPORT_INCLUDES)
+    if fieldset:
+        query = query.options(*report_load_options(fieldset))
+    return apply_report_filters(query, args), fieldset
+
+
+def list_reports(query, args):
+    """
+    Build the JSON payload for a report list endpoint.
+
+    Applies filters, the ?fields=/?include= projection and, when requested,
+    keyset pagination.
+
+    Returns:
+        list of report dicts, or {"reports": [...], "next_cursor": ...} when paginated
+
+    Raises:
+        PaginationError, FieldsetError: on invalid query parameters
+    """
+    query, fieldset = build_report_query(query, args)
+
+    if not is_paginated(args):
+        return [serialize_report(r, fieldset) for r in query.all()]
+
+    reports, next_cursor = paginate_reports(query, args)
+    return {
+        "reports": [serialize_report(r, fieldset) for r in reports],
+        "next_cursor": next_cursor,
+    }
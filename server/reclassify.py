@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Re-run AI classification over existing reports, e.g. after a prompt or model change.
+
+Reports are streamed in id order, classified concurrently under a
+requests-per-minute and tokens-per-minute budget, and written back with one
+bulk UPDATE per batch. Progress is checkpointed after every batch, so an
+interrupted run picks up where it stopped:
+
+    python reclassify.py --rpm 500 --tpm 90000 --concurrency 8
+    python reclassify.py --restart        # ignore the checkpoint
+    python reclassify.py --dry-run --limit 50
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import update
+
+from config import app, db
+from models import Report, TableVersion
+from ai_utils import classify_report
+from classification_cache import is_cacheable
+from local_classifier import LLM_TAG, is_final
+from stats import reconcile_stats
+from telemetry import estimate_cost, telemetry
+
+# Rough token accounting for the combined prompt (see classify_report), used to
+# reserve rate-limit budget before a call; progress reports the real usage
+PROMPT_OVERHEAD_TOKENS = 180
+COMPLETION_TOKENS = 200
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(description):
+    """Return (prompt tokens, completion tokens) budgeted for one classification."""
+    return PROMPT_OVERHEAD_TOKENS + len(description or '') // CHARS_PER_TOKEN, COMPLETION_TOKENS
+
+
+class RateLimiter:
+    """Token bucket refilled continuously at `per_minute`; acquire() blocks until there is room."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.available = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                wait = (amount - self.available) / self.rate
+            time.sleep(wait)
+
+
+class Progress:
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, prompt_tokens, completion_tokens, ok):
+        with self._lock:
+            self.done += 1
+            self.errors += 0 if ok else 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def line(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        spent = estimate_cost(self.prompt_tokens, self.completion_tokens)
+        projected = spent / self.done * self.total if self.done else 0.0
+        return (f"{self.done}/{self.total} reports | {self.done / elapsed * 60:.0f}/min | "
+                f"{self.errors} errors | ~${spent:.4f} spent, ~${projected:.4f} projected")
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return json.load(f).get('last_id', 0)
+
+
+def save_checkpoint(path, last_id):
+    # Write then rename, so a crash never leaves a truncated checkpoint
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump({'last_id': last_id, 'saved_at': datetime.now(timezone.utc).isoformat()}, f)
+    os.replace(tmp, path)
+
+
+def iter_batches(after_id, batch_size, limit=None):
+    """Yield lists of (id, description) in id order, starting after `after_id`."""
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = batch_size if remaining is None else min(batch_size, remaining)
+        rows = db.session.query(Report.id, Report.description).filter(
+            Report.id > after_id, Report.classification_status != 'pending'
+        ).order_by(Report.id).limit(size).all()
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1].id
+        if remaining is not None:
+            remaining -= len(rows)
+
+
+def write_batch(results):
+    """Bulk-update a batch of classifications and bump the reports table version."""
+    db.session.execute(update(Report), results)
+    # Bulk UPDATEs bypass the flush listeners, so invalidate cached responses by hand
+    db.session.execute(
+        update(TableVersion)
+        .where(TableVersion.table_name == 'reports')
+        .values(version=TableVersion.version + 1, updated_at=datetime.now(timezone.utc))
+    )
+    db.session.commit()
+
+
+def reclassify(args):
+    # Skip the local model tier and the classification cache unless asked: a
+    # reclassification is usually about getting fresh answers from the (new) prompt
+    if args.allow_local:
+        classify = classify_report
+    else:
+        uncached = classify_report.__wrapped__.__wrapped__  # past local_first and the cache
+
+        def classify(description):
+            type_result, severity_result = uncached(description)
+            if is_cacheable((type_result, severity_result)):
+                type_result['explanation'] = f"{LLM_TAG} {type_result['explanation']}"
+                severity_result['explanation'] = f"{LLM_TAG} {severity_result['explanation']}"
+            return type_result, severity_result
+    rpm = RateLimiter(args.rpm)
+    tpm = RateLimiter(args.tpm)
+
+    def classify_one(row):
+        prompt_tokens, completion_tokens = estimate_tokens(row.description)
+        rpm.acquire()
+        tpm.acquire(prompt_tokens + completion_tokens)
+        with telemetry.thread_usage() as usage:
+            try:
+                type_result, severity_result = classify(row.description)
+                ok = is_final((type_result, severity_result))
+            except Exception as e:
+                print(f"❌ Report {row.id}: {str(e)}")
+                type_result = severity_result = None
+                ok = False
+        progress.record(usage['prompt_tokens'], usage['completion_tokens'], ok)
+        if not ok:
+            # Keep the existing classification rather than overwrite it with a fallback
+            return None
+        return {
+            'id': row.id,
+            'type': type_result['type'],
+            'type_confidence': type_result['confidence'],
+            'type_explanation': type_result['explanation'],
+            'severity': severity_result['severity'],
+            'severity_confidence': severity_result['confidence'],
+            'severity_explanation': severity_result['explanation'],
+            'classification_status': 'complete',
+        }
+
+    after_id = 0 if args.restart else load_checkpoint(args.checkpoint)
+    query = db.session.query(Report.id).filter(Report.id > after_id, Report.classification_status != 'pending')
+    total = query.count() if args.limit is None else min(args.limit, query.count())
+    progress = Progress(total)
+    if after_id:
+        print(f"↩️  Resuming after report {after_id}")
+    print(f"🔄 Reclassifying {total} reports (concurrency {args.concurrency}, "
+          f"{args.rpm} RPM, {args.tpm} TPM){' [dry run]' if args.dry_run else ''}")
+
+    with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix='reclassify') as pool:
+        for rows in iter_batches(after_id, args.batch_size, args.limit):
+            results = [r for r in pool.map(classify_one, rows) if r is not None]
+            if results and not args.dry_run:
+                write_batch(results)
+            if not args.dry_run:
+                save_checkpoint(args.checkpoint, rows[-1].id)
+            print(f"   {progress.line()}")
+
+    if not args.dry_run:
+        # Types and severities moved between counters without going through the ORM
+        reconcile_stats()
+        if args.limit is None and os.path.exists(args.checkpoint):
+            # Finished the whole table; the next run starts from the beginning
+            os.remove(args.checkpoint)
+    print(f"✅ Done: {progress.line()}")
+    return progress.errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run AI classification over existing reports")
+    parser.add_argument('--batch-size', type=int, default=100, help="reports per bulk update (default 100)")
+    parser.add_argument('--concurrency', type=int, default=8, help="parallel classification calls (default 8)")
+    parser.add_argument('--rpm', type=int, default=500, help="requests per minute budget (default 500)")
+    parser.add_argument('--tpm', type=int, default=90000, help="tokens per minute budget (default 90000)")
+    parser.add_argument('--limit', type=int, default=None, help="stop after this many reports")
+    parser.add_argument('--checkpoint', default='reclassify.checkpoint.json', help="checkpoint file path")
+    parser.add_argument('--restart', action='store_true', help="ignore any existing checkpoint")
+    parser.add_argument('--allow-local', action='store_true', help="let the local model answer confident reports")
+    parser.add_argument('--dry-run', action='store_true', help="classify but don't write results")
+    args = parser.parse_args()
+
+    with app.app_context():
+        errors = reclassify(args)
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Resilience layer for OpenAI calls: a hard deadline per classification,
+jittered retries within that deadline, and a circuit breaker.
+
+When the breaker is open, calls fail immediately with CircuitOpenError,
+which the classifiers turn into their usual fallback results, so during an
+upstream incident submissions stop waiting on timeouts altogether. After
+BREAKER_RESET_SECONDS one probe call is let through (half-open); its
+outcome closes the breaker again or keeps it open.
+"""
+import os
+import random
+import threading
+import time
+
+import openai
+
+DEADLINE = float(os.environ.get('OPENAI_DEADLINE', 15))
+ATTEMPT_TIMEOUT = float(os.environ.get('OPENAI_ATTEMPT_TIMEOUT', 8))
+MAX_ATTEMPTS = int(os.environ.get('OPENAI_MAX_ATTEMPTS', 3))
+BACKOFF_BASE = 0.25  # seconds; doubled per retry, then fully jittered
+BACKOFF_CAP = 4.0
+MIN_ATTEMPT_TIMEOUT = 0.5  # don't start an attempt with less time than this left
+
+# Errors worth retrying; anything else (bad request, auth) fails straight away
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the API while the breaker is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe."""
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, name, failure_threshold=5, reset_seconds=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+        self.counts = {'successes': 0, 'failures': 0, 'short_circuited': 0, 'opened': 0}
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go ahead now."""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return
+            self.counts['short_circuited'] += 1
+        raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def record_success(self):
+        with self._lock:
+            self.counts['successes'] += 1
+            self.consecutive_failures = 0
+            if self.state != self.CLOSED:
+                print(f"✅ {self.name} circuit closed")
+            self.state = self.CLOSED
+            self.probe_in_flight = False
+
+    def record_neutral(self):
+        """The call proved nothing about the upstream's health: just free the half-open probe."""
+        with self._lock:
+            self.probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.counts['failures'] += 1
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.counts['opened'] += 1
+                    print(f"🔌 {self.name} circuit opened after {self.consecutive_failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.probe_in_flight = False
+
+    def snapshot(self):
+        """Current state and counters, for monitoring."""
+        with self._lock:
+            retry_in = None
+            if self.state == self.OPEN:
+                retry_in = round(max(0.0, self.opened_at + self.reset_seconds - time.monotonic()), 1)
+            return {
+                'name': self.name,
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_seconds': self.reset_seconds,
+                'probe_in_seconds': retry_in,
+                **self.counts,
+            }
+
+
+openai_breaker = CircuitBreaker(
+    'OpenAI',
+    failure_threshold=int(os.environ.get('OPENAI_BREAKER_THRESHOLD', 5)),
+    reset_seconds=float(os.environ.get('OPENAI_BREAKER_RESET_SECONDS', 30)),
+)
+
+
+def call_with_resilience(fn, breaker=openai_breaker, deadline=DEADLINE, **kwargs):
+    """
+    Call `fn(timeout=..., **kwargs)` under a deadline, with retries and a breaker.
+
+    Each attempt gets min(ATTEMPT_TIMEOUT, time left) as its timeout. Retryable
+    errors are retried after a fully jittered exponential backoff, as long as
+    the backoff plus a minimal attempt still fits before the deadline.
+
+    Raises:
+        CircuitOpenError: if the breaker is open
+        Exception: the last error once attempts or the deadline run out
+    """
+    expires = time.monotonic() + deadline
+    attempt = 0
+    while True:
+        breaker.before_call()
+        attempt += 1
+        remaining = expires - time.monotonic()
+        try:
+            result = fn(timeout=min(ATTEMPT_TIMEOUT, remaining), **kwargs)
+        except RETRYABLE_ERRORS as e:
+            breaker.record_failure()
+            backoff = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (attempt - 1)))
+            time_left = expires - time.monotonic()
+            if attempt >= MAX_ATTEMPTS or time_left - backoff < MIN_ATTEMPT_TIMEOUT:
+                raise
+            print(f"🔁 {breaker.name} call failed ({type(e).__name__}), retrying in {backoff:.2f}s")
+            time.sleep(backoff)
+            continue
+        except Exception:
+            # Non-retryable (e.g. bad request): neither a failure of the upstream nor
+            # proof that it has recovered, so a half-open breaker just probes again
+            breaker.record_neutral()
+            raise
+        breaker.record_success()
+        return result
@@ -0,0 +1,142 @@
+"""
+In-process response cache for the public report read endpoints.
+
+Entries are keyed by route and query string, bounded by an LRU size and a
+TTL, and tagged so writes can invalidate exactly the responses they
+affect. Each entry also remembers the table versions it was built from,
+so a write handled by another gunicorn worker makes it stale as well.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict, defaultdict
+from functools import wraps
+
+from flask import request, make_response, g
+
+from conditional import get_table_versions
+
+LIST_TAG = 'reports:list'
+
+
+def report_tag(report_id):
+    return f'report:{report_id}'
+
+
+class ResponseCache:
+    """Thread-safe LRU + TTL cache of serialized responses with tag invalidation."""
+
+    def __init__(self, max_entries=512, ttl=30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, versions, tags, body, mimetype)
+        self._tags = defaultdict(set)  # tag -> keys
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key, versions):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, entry_versions, _, body, mimetype = entry
+            if expires_at < time.monotonic() or entry_versions != versions:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body, mimetype
+
+    def set(self, key, versions, tags, body, mimetype):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, versions, tags, body, mimetype)
+            for tag in tags:
+                self._tags[tag].add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, *tags):
+        """Drop every entry carrying any of the given tags."""
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.pop(tag, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key):
+        # Caller holds the lock
+        entry = self._entries.pop(key, None)
+        if entry:
+            for tag in entry[2]:
+                keys = self._tags.get(tag)
+                if keys:
+                    keys.discard(key)
+                    if not keys:
+                        del self._tags[tag]
+
+
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get('RESPONSE_CACHE_SIZE', 512)),
+    ttl=float(os.environ.get('RESPONSE_CACHE_TTL', 30)),
+)
+
+
+def invalidate_report(report_id=None):
+    """Invalidate the report lists and, when given, one report's detail and donations."""
+    tags = [LIST_TAG]
+    if report_id is not None:
+        tags.append(report_tag(report_id))
+    response_cache.invalidate(*tags)
+
+
+def cached_response(*tables, tags):
+    """
+    Cache successful GET responses of a handler.
+
+    Args:
+        tables: Tables the response is built from (validated against their versions)
+        tags (callable): Receives the view kwargs, returns the invalidation tags
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            versions = g.get('table_versions') or get_table_versions(tables)
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+
+            cached = response_cache.get(key, versions)
+            if cached:
+                body, mimetype = cached
+                return make_response(body, 200, {'Content-Type': mimetype})
+
+            response = make_response(fn(*args, **kwargs))
+            # Streamed bodies are never materialized, so they are not cached
+            if response.status_code == 200 and not response.is_streamed:
+                response_cache.set(key, versions, tuple(tags(**kwargs)), response.get_data(), response.mimetype)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,309 @@
+"""
+Resumable, chunked uploads of report images.
+
+On a flaky mobile connection a multipart POST /reports that drops at 90%
+loses everything. Instead, a client can upload the image first, in pieces:
+
+    POST /image-uploads                  {"size": 4194304, "filename": "IMG_0042.jpg"}
+                                         -> 201 {"id": ..., "offset": 0, ...}
+    PUT  /image-uploads/<id>             raw bytes, header Upload-Offset: <offset>
+                                         -> 200 {"offset": <bytes received so far>}
+    GET  /image-uploads/<id>             -> {"offset": ...} (also in Upload-Offset)
+    POST /image-uploads/<id>/complete    -> {"status": "complete", "url": ...}
+
+and then submit the report with upload_id=<id> instead of the file. A chunk
+must start where the previous one ended; after a dropped connection the
+client asks for the offset and carries on from there. Whatever part of an
+interrupted chunk did arrive is kept.
+
+Chunks are staged in UPLOAD_FOLDER/tmp/resumable/<id>.part. Completing the
+upload checks the file type and renames it into content-addressed storage
+(see upload_storage.py), from where reports use it like any other local
+image. worker.py removes sessions that stay incomplete for
+UPLOAD_SESSION_TTL_HOURS, and completed uploads that no report has used by
+then, together with their stored file unless something else still uses it
+(identical content is stored once, see blob_in_use).
+"""
+import os
+import glob
+from datetime import datetime, timezone, timedelta
+
+from flask import current_app
+from sqlalchemy import update, delete, or_, and_
+from werkzeug.exceptions import ClientDisconnected
+
+from config import db
+from models import ImageUpload, ImageUploadJob, Report
+from upload_storage import CHUNK_SIZE, TMP_DIR, store_file, public_url
+from upload_ingest import MAX_IMAGE_BYTES, SNIFF_BYTES, ACCEPTED_TYPES, sniff_image_type
+
+SESSION_TTL = timedelta(hours=float(os.environ.get('UPLOAD_SESSION_TTL_HOURS', 24)))
+# A chunk whose request died without releasing the session can be retried after this
+STALE_RECEIVE = timedelta(minutes=5)
+STAGING_DIR = os.path.join(TMP_DIR, 'resumable')
+
+
+class UploadError(Exception):
+    """Raised for invalid upload requests; `status` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400, upload=None):
+        super().__init__(message)
+        self.status = status
+        self.upload = upload
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def staging_path(upload_id):
+    return os.path.join(current_app.config["UPLOAD_FOLDER"], STAGING_DIR, f"{upload_id}.part")
+
+
+def upload_state(upload):
+    """Public description of an upload session."""
+    state = {
+        "id": upload.id,
+        "size": upload.size,
+        "offset": upload.received,
+        "status": 'uploading' if upload.status == 'receiving' else upload.status,
+        "max_chunk_size": current_app.config["MAX_CONTENT_LENGTH"],
+    }
+    if upload.stored_path:
+        state["url"] = public_url(upload.stored_path)
+    return state
+
+
+def create_upload(size, filename=None):
+    """
+    Open an upload session for a file of `size` bytes (caller commits).
+
+    Raises:
+        UploadError: if the size is missing or over MAX_IMAGE_BYTES
+    """
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError("size (in bytes) is required")
+    if size <= 0:
+        raise UploadError("size must be positive")
+    if size > MAX_IMAGE_BYTES:
+        raise UploadError(f"Image is larger than {MAX_IMAGE_BYTES // (1024 * 1024)} MB", 413)
+
+    upload = ImageUpload(size=size, filename=filename, received=0, status='uploading')
+    db.session.add(upload)
+    return upload
+
+
+def get_upload(upload_id):
+    upload = db.session.get(ImageUpload, upload_id)
+    if upload is None:
+        raise UploadError("Upload not found", 404)
+    return upload
+
+
+def _claim(upload_id, offset):
+    """Reserve the session for one chunk starting at `offset`; only one request may write at a time."""
+    now = _now()
+    result = db.session.execute(
+        update(ImageUpload)
+        .where(
+            ImageUpload.id == upload_id,
+            ImageUpload.received == offset,
+            or_(
+                ImageUpload.status == 'uploading',
+                and_(ImageUpload.status == 'receiving', ImageUpload.updated_at < now - STALE_RECEIVE),
+            ),
+        )
+        .values(status='receiving', updated_at=now)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def receive_chunk(upload_id, offset, stream):
+    """
+    Append the bytes in `stream` to an upload at `offset`.
+
+    Returns:
+        ImageUpload: the session, with `received` advanced past the chunk
+
+    Raises:
+        UploadError: 404 unknown session, 409 wrong offset or already complete,
+            413 chunk runs past the declared size, 415 not an image
+    """
+    upload = get_upload(upload_id)
+    if upload.status == 'complete':
+        raise UploadError("Upload is already complete", 409, upload)
+    if offset != upload.received or not _claim(upload_id, offset):
+        db.session.refresh(upload)
+        raise UploadError(f"Expected offset {upload.received}", 409, upload)
+
+    path = staging_path(upload_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    remaining = upload.size - offset
+    written, error, head = 0, None, b''
+    with open(path, 'r+b' if os.path.exists(path) else 'wb') as part:
+        # Drop any tail left by a chunk that was never recorded
+        part.seek(offset)
+        part.truncate()
+        try:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                if written + len(chunk) > remaining:
+                    error = UploadError(f"Chunk runs past the declared size of {upload.size} bytes", 413)
+                    break
+                if offset == 0 and len(head) < SNIFF_BYTES:
+                    # Reject a non-image on its first bytes rather than after the whole upload
+                    head += chunk[:SNIFF_BYTES - len(head)]
+                    if len(head) == SNIFF_BYTES and sniff_image_type(head) is None:
+                        error = UploadError(f"Only {ACCEPTED_TYPES} images are accepted", 415)
+                        break
+                part.write(chunk)
+                written += len(chunk)
+        except ClientDisconnected as e:
+            # Keep what arrived so the client can resume from there
+            error = e
+        if isinstance(error, UploadError):
+            part.truncate(offset)
+            written = 0
+        part.flush()
+        os.fsync(part.fileno())
+
+    db.session.refresh(upload)
+    upload.received = offset + written
+    upload.status = 'uploading'
+    upload.updated_at = _now()
+    db.session.commit()
+    if error is not None:
+        if isinstance(error, UploadError):
+            error.upload = upload
+        raise error
+    return upload
+
+
+def complete_upload(upload_id):
+    """
+    Check a fully received upload and move it into content-addressed storage.
+    Completing an already complete upload just returns it, so clients can retry.
+
+    Raises:
+        UploadError: 404 unknown session, 409 bytes still missing, 415 not an image
+    """
+    upload = get_upload(upload_id)
+    if upload.status == 'complete':
+        return upload
+    # Claiming the last offset keeps a concurrent chunk or a second completion out
+    if upload.received != upload.size or not _claim(upload_id, upload.size):
+        db.session.refresh(upload)
+        if upload.status == 'complete':
+            return upload
+        raise UploadError(f"Upload incomplete: {upload.received} of {upload.size} bytes received", 409, upload)
+
+    path = staging_path(upload_id)
+    with open(path, 'rb') as part:
+        extension = sniff_image_type(part.read(SNIFF_BYTES))
+    if extension is None:
+        _discard_session(upload)
+        db.session.commit()
+        raise UploadError(f"Only {ACCEPTED_TYPES} images are accepted", 415)
+
+    relative, _, created = store_file(path, extension)
+    upload.stored_path = relative
+    upload.status = 'complete'
+    upload.updated_at = _now()
+    db.session.commit()
+    print(f"📦 Resumable upload {upload.id} complete: {relative}{'' if created else ' (already stored)'}")
+    return upload
+
+
+def completed_upload(upload_id):
+    """The complete upload a report refers to by id."""
+    upload = get_upload(upload_id)
+    if upload.status != 'complete':
+        raise UploadError("Upload is not complete yet", 409, upload)
+    if not os.path.exists(os.path.join(current_app.config["UPLOAD_FOLDER"], upload.stored_path)):
+        # Moved to Cloudinary and cleaned up for an earlier report
+        raise UploadError("Uploaded file is no longer available, please upload it again", 410)
+    return upload
+
+
+def _discard_session(upload):
+    try:
+        os.remove(staging_path(upload.id))
+    except FileNotFoundError:
+        pass
+    db.session.delete(upload)
+
+
+def expire_uploads():
+    """Delete sessions that stayed incomplete for SESSION_TTL, with their staged bytes."""
+    expired = ImageUpload.query.filter(
+        ImageUpload.status.in_(('uploading', 'receiving')),
+        ImageUpload.updated_at < _now() - SESSION_TTL,
+    ).all()
+    for upload in expired:
+        _discard_session(upload)
+    db.session.commit()
+    return len(expired)
+
+
+def _unused():
+    """SQL condition: no report refers to the upload."""
+    return ~db.session.query(Report.id).filter(Report.image_upload_id == ImageUpload.id).exists()
+
+
+def blob_in_use(relative_path, exclude_upload_id=None):
+    """
+    Whether a stored file is still needed: shown by a report, waiting for a
+    Cloudinary upload job, or held by a completed upload no report has used yet.
+    """
+    path = os.path.join(current_app.config["UPLOAD_FOLDER"], relative_path)
+    return bool(
+        db.session.query(Report.id).filter(Report.image_path == relative_path).first()
+        or db.session.query(ImageUploadJob.id).filter(
+            ImageUploadJob.spool_path == path, ImageUploadJob.status.in_(('queued', 'running'))
+        ).first()
+        or db.session.query(ImageUpload.id).filter(
+            ImageUpload.stored_path == relative_path,
+            ImageUpload.status == 'complete',
+            ImageUpload.id != exclude_upload_id,
+            _unused(),
+        ).first()
+    )
+
+
+def remove_blob(relative_path):
+    """Delete a stored file and its resized derivatives (see image_derivatives.py)."""
+    stored = os.path.join(current_app.config["UPLOAD_FOLDER"], relative_path)
+    stem = os.path.splitext(stored)[0]
+    for path in [stored] + glob.glob(f"{glob.escape(stem)}-*"):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def expire_unused_uploads():
+    """
+    Delete uploads completed more than SESSION_TTL ago that no report refers
+    to, and their stored files unless something else still uses them.
+    """
+    cutoff = _now() - SESSION_TTL
+    candidates = db.session.query(ImageUpload.id, ImageUpload.stored_path).filter(
+        ImageUpload.status == 'complete', ImageUpload.updated_at < cutoff, _unused()
+    ).all()
+    expired = 0
+    for upload_id, stored_path in candidates:
+        # Re-checked in the DELETE: a report may have picked the upload up meanwhile
+        result = db.session.execute(
+            delete(ImageUpload)
+            .where(ImageUpload.id == upload_id, ImageUpload.updated_at < cutoff, _unused())
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if result.rowcount != 1:
+            continue
+        expired += 1
+        if stored_path and not blob_in_use(stored_path, exclude_upload_id=upload_id):
+            remove_blob(stored_path)
+    return expired
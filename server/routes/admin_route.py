@@ -2,7 +2,18 @@ from flask_restful import Resource
 from flask import request, session, make_response, jsonify
 from models import User, Report, Donation, Admin
 from config import db, api
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
+from pagination import PaginationError, build_report_query, is_paginated, list_reports
+from streaming import stream_json_array, wants_stream
+from conditional import compute_validators, is_not_modified, not_modified, add_validators
+from response_cache import response_cache, invalidate_report
+from stats import read_stats
+from duplicates import duplicate_index
+from resilience import openai_breaker
+from telemetry import telemetry
+import classification_cache
+import local_classifier
+from fieldsets import FieldsetError, DONATION_FIELDS, parse_fieldset, donation_load_options, serialize_donation, serialize_report
 
 
 def check_admin():
@@ -13,6 +24,16 @@ def check_admin():
     return Admin.query.get(admin_id)
 
 
+def donation_with_report(donation):
+    """Full donation payload plus the flattened type/location/description of its report."""
+    donation_dict = donation.to_fast_dict()
+    report = donation.report
+    donation_dict['report_type'] = report.type if report else None
+    donation_dict['report_location'] = report.location if report else None
+    donation_dict['report_description'] = report.description if report else None
+    return donation_dict
+
+
 class AdminUsers(Resource):
     def get(self):
         """Get all users (admin only)"""
@@ -20,8 +41,13 @@ class AdminUsers(Resource):
         if not admin:
             return make_response({"error": "Unauthorized. Admin access required."}, 401)
         
+        if wants_stream(request.args):
+            # User.reports is lazy by default; load it per batch instead of per user
+            query = User.query.options(selectinload(User.reports))
+            return stream_json_array(query, lambda u: u.to_fast_dict())
+
         users = User.query.all()
-        return make_response(jsonify([u.to_dict() for u in users]), 200)
+        return make_response(jsonify([u.to_fast_dict() for u in users]), 200)
 
 
 class AdminUserByID(Resource):
@@ -35,8 +61,13 @@ class AdminUserByID(Resource):
         if not target_user:
             return make_response({"error": "User not found"}, 404)
         
+        report_ids = [report.id for report in target_user.reports]
         db.session.delete(target_user)
         db.session.commit()
+        # The user's reports (and their donations) are cascade-deleted
+        response_cache.clear()
+        for report_id in report_ids:
+            duplicate_index.remove(report_id)
         return make_response({"message": "User deleted successfully"}, 200)
 
 
@@ -47,8 +78,14 @@ class AdminReports(Resource):
         if not admin:
             return make_response({"error": "Unauthorized. Admin access required."}, 401)
         
-        reports = Report.query.all()
-        return make_response(jsonify([r.to_dict() for r in reports]), 200)
+        try:
+            if wants_stream(request.args) and not is_paginated(request.args):
+                query, fieldset = build_report_query(Report.query, request.args)
+                return stream_json_array(query, lambda r: serialize_report(r, fieldset))
+            payload = list_reports(Report.query, request.args)
+        except (PaginationError, FieldsetError) as e:
+            return make_response({"error": str(e)}, 400)
+        return make_response(jsonify(payload), 200)
 
 
 class AdminReportByID(Resource):
@@ -64,6 +101,8 @@ class AdminReportByID(Resource):
         
         db.session.delete(report)
         db.session.commit()
+        invalidate_report(id)
+        duplicate_index.remove(id)
         return make_response({"message": "Report deleted successfully"}, 200)
 
 
@@ -74,25 +113,21 @@ class AdminDonations(Resource):
         if not admin:
             return make_response({"error": "Unauthorized. Admin access required."}, 401)
         
-        # Eagerly load the report relationship
-        donations = Donation.query.options(joinedload(Donation.report)).all()
-        donations_data = []
-        for d in donations:
-            donation_dict = d.to_dict()
-            # Add report details
-            if d.report:
-                donation_dict['report_type'] = d.report.type
-                donation_dict['report_location'] = d.report.location
-                donation_dict['report_description'] = d.report.description
-                print(f" Donation {d.id}: {d.report.type} at {d.report.location}")  # Debug
-            else:
-                donation_dict['report_type'] = None
-                donation_dict['report_location'] = None
-                donation_dict['report_description'] = None
-                print(f" Donation {d.id}: No report found")  # Debug
-            donations_data.append(donation_dict)
-        
-        return make_response(jsonify(donations_data), 200)
+        try:
+            fieldset = parse_fieldset(request.args, DONATION_FIELDS)
+        except FieldsetError as e:
+            return make_response({"error": str(e)}, 400)
+        if fieldset:
+            query = Donation.query.options(*donation_load_options(fieldset))
+            serialize = lambda d: serialize_donation(d, fieldset)
+        else:
+            # Eagerly load the report relationship
+            query = Donation.query.options(joinedload(Donation.report))
+            serialize = donation_with_report
+
+        if wants_stream(request.args):
+            return stream_json_array(query, serialize)
+        return make_response(jsonify([serialize(d) for d in query.all()]), 200)
 
 
 class AdminDonationByID(Resource):
@@ -106,8 +141,10 @@ class AdminDonationByID(Resource):
         if not donation:
             return make_response({"error": "Donation not found"}, 404)
         
+        report_id = donation.report_id
         db.session.delete(donation)
         db.session.commit()
+        invalidate_report(report_id)
         return make_response({"message": "Donation deleted successfully"}, 200)
 
 
@@ -117,17 +154,40 @@ class AdminStats(Resource):
         admin = check_admin()
         if not admin:
             return make_response({"error": "Unauthorized. Admin access required."}, 401)
+
+        etag, last_modified = compute_validators(('users', 'reports', 'donations'))
+        if is_not_modified(etag, last_modified):
+            return not_modified(etag, last_modified, private=True)
         
-        stats = {
-            "total_users": User.query.count(),
-            "total_reports": Report.query.count(),
-            "total_donations": Donation.query.count(),
-            "severe_reports": Report.query.filter_by(severity="Severe").count(),
-            "moderate_reports": Report.query.filter_by(severity="Moderate").count(),
-            "minor_reports": Report.query.filter_by(severity="Minor").count(),
-        }
+        # Single read of the incrementally maintained counters (see stats.py)
+        stats = read_stats()
         
-        return make_response(jsonify(stats), 200)
+        return add_validators(make_response(jsonify(stats), 200), etag, last_modified, private=True)
+
+
+class AdminCacheStats(Resource):
+    def get(self):
+        """Response cache hit/miss counters for this worker (admin only)"""
+        admin = check_admin()
+        if not admin:
+            return make_response({"error": "Unauthorized. Admin access required."}, 401)
+        return make_response(jsonify(response_cache.stats()), 200)
+
+
+class AdminAIStatus(Resource):
+    def get(self):
+        """OpenAI breaker state, call telemetry and tier hit counts for this worker (admin only)"""
+        admin = check_admin()
+        if not admin:
+            return make_response({"error": "Unauthorized. Admin access required."}, 401)
+        return make_response(jsonify({
+            "breaker": openai_breaker.snapshot(),
+            "api_calls": telemetry.summary(),
+            "tiers": {
+                "local_model": dict(local_classifier.stats),
+                "cache": dict(classification_cache.stats),
+            },
+        }), 200)
 
 
 # Register admin routes
@@ -138,3 +198,5 @@ api.add_resource(AdminReportByID, '/admin/reports/<int:id>')
 api.add_resource(AdminDonations, '/admin/donations')
 api.add_resource(AdminDonationByID, '/admin/donations/<int:id>')
 api.add_resource(AdminStats, '/admin/stats')
+api.add_resource(AdminCacheStats, '/admin/cache-stats')
+api.add_resource(AdminAIStatus, '/admin/ai-status')
@@ -1,18 +1,53 @@
 from flask_restful import Resource
-from flask import request, jsonify, make_response, current_app, session
-from werkzeug.utils import secure_filename
+from flask import request, jsonify, make_response, session
 from models import Report, User, Donation
 import os
 from config import api, db
 from datetime import datetime, date, timezone
-from ai_utils import classify_disaster_type, classify_severity
-from cloudinary_config import upload_image_to_cloudinary, is_cloudinary_configured
+from ai_utils import classify_report, classify_severity
+from pagination import PaginationError, build_report_query, is_paginated, list_reports
+from streaming import stream_json_array, wants_stream
+from conditional import conditional_get
+from response_cache import cached_response, invalidate_report, LIST_TAG, report_tag
+from search import search_reports
+from submission import CONCURRENT_SUBMISSION, classify_with_timeout
+from jobs import PENDING_TYPE, enqueue_classification
+from duplicates import duplicate_index, duplicates_of, find_duplicate, reuse_classification
+from image_pipeline import attach_image, attach_upload, process_attached_image
+from resumable_uploads import UploadError, completed_upload
+from upload_ingest import uploaded_image
+from fieldsets import FieldsetError, REPORT_FIELDS, REPORT_INCLUDES, parse_fieldset, report_load_options, serialize_report
+
+
+ASYNC_CLASSIFICATION = os.environ.get('ASYNC_CLASSIFICATION', '0').lower() in ('1', 'true', 'yes')
+
+
+def wants_async():
+    """?async= (or an `async` form field) overrides the ASYNC_CLASSIFICATION default."""
+    raw = request.args.get('async', request.form.get('async'))
+    if raw is None:
+        return ASYNC_CLASSIFICATION
+    return raw.lower() in ('1', 'true', 'yes')
 
 
 class Reports(Resource):
+    @conditional_get('reports', 'donations', 'users')
+    @cached_response('reports', 'donations', 'users', tags=lambda: (LIST_TAG,))
     def get(self):
-        reports = Report.query.all()
-        return make_response(jsonify([r.to_dict() for r in reports]), 200)
+        """List reports, optionally filtered and cursor-paginated.
+
+        Without ?limit or ?cursor the full (filtered) list is returned as a bare
+        array, streamed in batches when ?stream=1. With either, the response is
+        {"reports": [...], "next_cursor": ...}.
+        """
+        try:
+            if wants_stream(request.args) and not is_paginated(request.args):
+                query, fieldset = build_report_query(Report.query, request.args)
+                return stream_json_array(query, lambda r: serialize_report(r, fieldset))
+            payload = list_reports(Report.query, request.args)
+        except (PaginationError, FieldsetError) as e:
+            return make_response({"error": str(e)}, 400)
+        return make_response(jsonify(payload), 200)
 
     def post(self):
         # 1. Check for logged-in user (OPTIONAL)
@@ -22,43 +57,45 @@ class Reports(Resource):
 
         description = request.form.get("description")
         location = request.form.get("location")
-        image = request.files.get("image")
+        image = uploaded_image("image")
+        # An image sent beforehand through a resumable upload (see resumable_uploads.py)
+        upload_id = request.form.get("upload_id")
 
         if not description or not location:
             return make_response({"error": "Missing required fields"}, 400)
-            
-        # Use AI to classify the disaster type based on description
-        type_result = classify_disaster_type(description)
-        print(f"[AI Classification] Disaster type: {type_result['type']} "
-              f"(confidence: {type_result['confidence']}, reason: {type_result['explanation']})")
+        if image and upload_id:
+            return make_response({"error": "Send either image or upload_id, not both"}, 400)
 
-        image_url = None
-        if image:
-            # Try Cloudinary first (if configured), otherwise fall back to local storage
-            if is_cloudinary_configured():
-                # Upload to Cloudinary (permanent cloud storage)
-                result = upload_image_to_cloudinary(image, folder="disaster_reports")
-                if result:
-                    image_url = result['url']
-                    print(f"☁️ Image uploaded to Cloudinary: {image_url}")
-                else:
-                    print("⚠️ Cloudinary upload failed, using local storage")
+        upload = None
+        if upload_id:
+            # Checked before any classification work is done
+            try:
+                upload = completed_upload(upload_id)
+            except UploadError as e:
+                return make_response({"error": str(e)}, e.status)
             
-            # Fallback to local storage (for development or if Cloudinary fails)
-            if not image_url:
-                upload_folder = current_app.config["UPLOAD_FOLDER"]
-                os.makedirs(upload_folder, exist_ok=True)
-                filename = secure_filename(image.filename)
-                image_path = os.path.join(upload_folder, filename)
-                image.save(image_path)
-                base_url = os.environ.get('BACKEND_URL', request.url_root.rstrip('/'))
-                image_url = f"{base_url}/uploads/{filename}"
-                print(f"💾 Image saved locally: {image_url}")
-
-        severity_result = classify_severity(description)
-        print(f"[AI Classification] Severity: {severity_result['severity']} "
-              f"(confidence: {severity_result['confidence']}, reason: {severity_result['explanation']})")
-        
+        # A near-duplicate of an already classified report reuses its classification
+        original, similarity = find_duplicate(description, location)
+        run_async = wants_async() and original is None
+        if original is not None:
+            print(f"[POST /reports] Near-duplicate of report {original.id} ({similarity:.0%} similar)")
+            type_result, severity_result = reuse_classification(original, similarity)
+        elif run_async:
+            # Classification is left to worker.py
+            type_result = {'type': PENDING_TYPE, 'confidence': None, 'explanation': None}
+            severity_result = {'severity': None, 'confidence': None, 'explanation': None}
+        else:
+            if CONCURRENT_SUBMISSION:
+                # Bounded by CLASSIFY_TIMEOUT on the shared pool (see submission.py)
+                type_result, severity_result = classify_with_timeout(description)
+            else:
+                # Use AI to classify the disaster type and severity in one round trip
+                type_result, severity_result = classify_report(description)
+            print(f"[AI Classification] Disaster type: {type_result['type']} "
+                  f"(confidence: {type_result['confidence']}, reason: {type_result['explanation']})")
+            print(f"[AI Classification] Severity: {severity_result['severity']} "
+                  f"(confidence: {severity_result['confidence']}, reason: {severity_result['explanation']})")
+
         # 2. Handle Anonymous/Logged-in Reporter Data
         reporter_name = "Anonymous"
         
@@ -76,25 +113,84 @@ class Reports(Resource):
             type_explanation=type_result['explanation'],
             description=description,
             location=location,
-            image=image_url,
             severity=severity_result['severity'],
             severity_confidence=severity_result['confidence'],
             severity_explanation=severity_result['explanation'],
             reporter_name=reporter_name,  # Set name to username or "Anonymous"
-            user_id=user_id               # Set user_id to actual ID or None (NULL in DB)
+            user_id=user_id,              # Set user_id to actual ID or None (NULL in DB)
+            duplicate_of_id=original.id if original is not None else None,
         )
 
         db.session.add(new_report)
+        # Jobs are created in the same transaction as the report, so none can be lost
+        if image:
+            upload_job = attach_image(new_report, image)
+        elif upload is not None:
+            upload_job = attach_upload(new_report, upload)
+        else:
+            upload_job = None
+        if run_async:
+            enqueue_classification(new_report)
         db.session.commit()
+        invalidate_report()
+        duplicate_index.add(new_report.id, description, location)
+        if image or upload is not None:
+            # Cloudinary upload or local resizing happens off the request thread (see image_pipeline.py)
+            process_attached_image(new_report, upload_job)
+
+        if run_async:
+            print(f"[POST /reports] Report {new_report.id} queued for classification")
+            return make_response({
+                "id": new_report.id,
+                "classification_status": new_report.classification_status,
+                "status_url": f"/reports/{new_report.id}/classification",
+            }, 202)
         return make_response(new_report.to_dict(), 201)
     
 
+class ReportClassification(Resource):
+    @conditional_get('reports')
+    def get(self, id):
+        """Poll the classification of a report submitted with async classification."""
+        report = Report.query.get(id)
+        if not report:
+            return make_response({"error": "Report not found"}, 404)
+        return make_response(report.to_fast_dict(only=(
+            'id', 'classification_status', 'type', 'type_confidence', 'type_explanation',
+            'severity', 'severity_confidence', 'severity_explanation',
+        )), 200)
+
+
+class ReportDuplicates(Resource):
+    @conditional_get('reports')
+    def get(self, id):
+        """List reports that are near-duplicates of this one, most similar first."""
+        report = Report.query.get(id)
+        if not report:
+            return make_response({"error": "Report not found"}, 404)
+        try:
+            fieldset = parse_fieldset(request.args, REPORT_FIELDS)
+        except FieldsetError as e:
+            return make_response({"error": str(e)}, 400)
+        duplicates = [
+            {**serialize_report(duplicate, fieldset), "similarity": round(score, 3)}
+            for duplicate, score in duplicates_of(report)
+        ]
+        return make_response(jsonify({
+            "report_id": id,
+            "duplicate_of_id": report.duplicate_of_id,
+            "duplicates": duplicates,
+        }), 200)
+
+
 class ReportByID(Resource):
+    @conditional_get('reports', 'donations', 'users')
+    @cached_response('reports', 'donations', 'users', tags=lambda id: (report_tag(id),))
     def get(self, id):
         report = Report.query.get(id)
         if not report:
             return make_response({"error": "Report not found"}, 404)
-        return make_response(report.to_dict(), 200)
+        return make_response(report.to_fast_dict(), 200)
    
     def patch(self, id):
         report = Report.query.get(id)
@@ -114,6 +210,7 @@ class ReportByID(Resource):
         # Check if request is FormData (with file) or JSON
         is_form_data = request.content_type and 'multipart/form-data' in request.content_type
         
+        image, upload_job, image_attached = None, None, False
         if is_form_data:
             # Handle FormData with potential image upload
             data = {}
@@ -127,29 +224,15 @@ class ReportByID(Resource):
             if date_str:
                 data['date'] = date_str
             
-            # Handle image upload
-            image = request.files.get('image')
-            if image:
-                # Try Cloudinary first (if configured), otherwise fall back to local storage
-                if is_cloudinary_configured():
-                    result = upload_image_to_cloudinary(image, folder="disaster_reports")
-                    if result:
-                        data['image'] = result['url']
-                        print(f"☁️ Image updated (Cloudinary): {data['image']}")
-                
-                # Fallback to local storage if Cloudinary not configured or failed
-                if 'image' not in data or not data['image']:
-                    upload_folder = current_app.config["UPLOAD_FOLDER"]
-                    os.makedirs(upload_folder, exist_ok=True)
-                    filename = secure_filename(image.filename)
-                    image_path = os.path.join(upload_folder, filename)
-                    image.save(image_path)
-                    base_url = os.environ.get('BACKEND_URL', request.url_root.rstrip('/'))
-                    data['image'] = f"{base_url}/uploads/{filename}"
-                    print(f"💾 Image updated (local): {data['image']}")
+            # Handle image upload: spooled now, pushed to Cloudinary in the background
+            image = uploaded_image('image')
+            upload_id = request.form.get('upload_id')
+            if image and upload_id:
+                return make_response({"error": "Send either image or upload_id, not both"}, 400)
         else:
             # Handle JSON payload
             data = request.get_json(silent=True) or {}
+            upload_id = data.pop('upload_id', None)
 
         # DEBUG: log what we received
         print("[PATCH /reports/<id>] received payload:", data)
@@ -191,18 +274,43 @@ class ReportByID(Resource):
             # Prevent raw string from being set later
             data.pop("date", None)
 
+        # Attach the image only once every field is valid, so a 400 leaves no stored file behind
+        if image:
+            upload_job = attach_image(report, image)
+            image_attached = True
+        elif upload_id:
+            # Or an image sent beforehand through a resumable upload
+            try:
+                upload_job = attach_upload(report, completed_upload(upload_id))
+            except UploadError as e:
+                db.session.rollback()
+                return make_response({"error": str(e)}, e.status)
+            image_attached = True
+
         # Optional: keep severity consistent with POST when description changes
-        if "description" in data and isinstance(data["description"], str):
+        # (an unchanged description keeps its existing classification)
+        if (
+            "description" in data
+            and isinstance(data["description"], str)
+            and data["description"] != report.description
+        ):
             severity_result = classify_severity(data["description"])
             report.severity = severity_result['severity']
             report.severity_confidence = severity_result['confidence']
             report.severity_explanation = severity_result['explanation']
 
         # Apply other fields (includes reporter_name, type, location, etc.)
+        indexed_text = (report.description, report.location)
         for key, value in data.items():
             setattr(report, key, value)
 
         db.session.commit()
+        invalidate_report(id)
+        if (report.description, report.location) != indexed_text:
+            duplicate_index.remove(id)
+            duplicate_index.add(id, report.description, report.location)
+        if image_attached:
+            process_attached_image(report, upload_job)
         return make_response(report.to_dict(), 200)
 
     def delete(self, id):
@@ -220,6 +328,8 @@ class ReportByID(Resource):
 
         db.session.delete(report)
         db.session.commit()
+        invalidate_report(id)
+        duplicate_index.remove(id)
         return make_response({"message": "Report deleted"}, 200)
 
 class UserReports(Resource):
@@ -234,15 +344,23 @@ class UserReports(Resource):
         user = User.query.get(user_id)
         if not user:
             return make_response({"error": "User not found"}, 404)
+
+        try:
+            fieldset = parse_fieldset(request.args, REPORT_FIELDS, REPORT_INCLUDES)
+        except FieldsetError as e:
+            return make_response({"error": str(e)}, 400)
         
-        # Get reports created by the user
-        created_reports = Report.query.filter_by(user_id=user_id).all()
-        created_report_ids = {r.id for r in created_reports}
+        # Get reports created by the user (ids only - the full rows are loaded below)
+        created_report_ids = {
+            row.id for row in db.session.query(Report.id).filter_by(user_id=user_id)
+        }
         
         # Get reports the user donated to (by matching email - case insensitive)
         # Use func.lower for case-insensitive comparison
         from sqlalchemy import func
-        donations = Donation.query.filter(func.lower(Donation.email) == func.lower(user.email)).all()
+        donations = db.session.query(Donation.report_id).filter(
+            func.lower(Donation.email) == func.lower(user.email)
+        ).all()
         donated_report_ids = {d.report_id for d in donations}
         
         # Debug logging
@@ -255,18 +373,33 @@ class UserReports(Resource):
         all_report_ids = created_report_ids.union(donated_report_ids)
         
         # Fetch all reports
-        reports = Report.query.filter(Report.id.in_(all_report_ids)).all() if all_report_ids else []
+        query = Report.query
+        if fieldset:
+            query = query.options(*report_load_options(fieldset))
+        reports = query.filter(Report.id.in_(all_report_ids)).all() if all_report_ids else []
         
-        return make_response(jsonify([r.to_dict() for r in reports]), 200)
+        return make_response(jsonify([serialize_report(r, fieldset) for r in reports]), 200)
+
+
+class ReportSearch(Resource):
+    def get(self):
+        """Ranked full-text search over report type, location and description (?q=)."""
+        try:
+            payload = search_reports(request.args)
+        except (PaginationError, FieldsetError) as e:
+            return make_response({"error": str(e)}, 400)
+        return make_response(jsonify(payload), 200)
 
 
 class ReportDonations(Resource):
+    @conditional_get('reports', 'donations')
+    @cached_response('reports', 'donations', tags=lambda id: (report_tag(id),))
     def get(self, id):
         """List all donations for a report."""
         report = Report.query.get(id)
         if not report:
             return make_response({"error": "Report not found"}, 404)
-        return make_response(jsonify([d.to_dict() for d in report.donations]), 200)
+        return make_response(jsonify([d.to_fast_dict() for d in report.donations]), 200)
 
     def post(self, id):
         """Create a donation for a report."""
@@ -298,11 +431,15 @@ class ReportDonations(Resource):
         )
         db.session.add(donation)
         db.session.commit()
+        invalidate_report(id)
 
         return make_response(donation.to_dict(), 201)
 
 
 api.add_resource(Reports, '/reports')
 api.add_resource(UserReports, '/reports/my-reports')
+api.add_resource(ReportSearch, '/reports/search')
 api.add_resource(ReportByID, '/reports/<int:id>')
 api.add_resource(ReportDonations, '/reports/<int:id>/donations')
+api.add_resource(ReportClassification, '/reports/<int:id>/classification')
+api.add_resource(ReportDuplicates, '/reports/<int:id>/duplicates')
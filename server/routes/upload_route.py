@@ -0,0 +1,68 @@
+from flask_restful import Resource
+from flask import request, make_response
+from config import api, db
+from resumable_uploads import UploadError, create_upload, get_upload, receive_chunk, complete_upload, upload_state
+
+
+def upload_response(upload, status=200):
+    """JSON state of an upload session, with the offset also in the Upload-Offset header."""
+    return make_response(upload_state(upload), status, {"Upload-Offset": str(upload.received)})
+
+
+def error_response(error):
+    body = {"error": str(error)}
+    headers = {}
+    if error.upload is not None:
+        # Tell the client where to resume from
+        body["offset"] = error.upload.received
+        headers["Upload-Offset"] = str(error.upload.received)
+    return make_response(body, error.status, headers)
+
+
+class ImageUploads(Resource):
+    def post(self):
+        """Open a resumable upload session (see resumable_uploads.py)"""
+        data = request.get_json(silent=True) or {}
+        try:
+            upload = create_upload(data.get("size"), data.get("filename"))
+        except UploadError as e:
+            return error_response(e)
+        db.session.commit()
+        response = upload_response(upload, 201)
+        response.headers["Location"] = f"/image-uploads/{upload.id}"
+        return response
+
+
+class ImageUploadByID(Resource):
+    def get(self, upload_id):
+        """How many bytes have arrived, i.e. where the next chunk must start"""
+        try:
+            return upload_response(get_upload(upload_id))
+        except UploadError as e:
+            return error_response(e)
+
+    def put(self, upload_id):
+        """Append the raw request body at the offset given in Upload-Offset"""
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+        except ValueError:
+            return make_response({"error": "Upload-Offset header (in bytes) is required"}, 400)
+        try:
+            upload = receive_chunk(upload_id, offset, request.stream)
+        except UploadError as e:
+            return error_response(e)
+        return upload_response(upload)
+
+
+class ImageUploadComplete(Resource):
+    def post(self, upload_id):
+        """Finish an upload once every byte has arrived"""
+        try:
+            return upload_response(complete_upload(upload_id))
+        except UploadError as e:
+            return error_response(e)
+
+
+api.add_resource(ImageUploads, '/image-uploads')
+api.add_resource(ImageUploadByID, '/image-uploads/<string:upload_id>')
+api.add_resource(ImageUploadComplete, '/image-uploads/<string:upload_id>/complete')
@@ -0,0 +1,122 @@
+"""
+Full-text search over report type, location and description.
+
+Postgres matches against REPORT_TSVECTOR, which is served by the GIN
+expression index ix_reports_search_vector; SQLite uses the `reports_fts`
+FTS5 table (Porter-stemmed, like the 'english' config) that triggers keep
+in sync with `reports`. Both are created by migration e8b3f6c14a27. Results
+are ranked by relevance and paginated with a (score, id) cursor.
+"""
+import re
+
+from sqlalchemy import text, or_, literal
+
+from config import db
+from models import Report
+from pagination import PaginationError, encode_token, decode_token, parse_limit
+from fieldsets import REPORT_FIELDS, REPORT_INCLUDES, parse_fieldset, report_load_options, serialize_report
+
+MAX_QUERY_LENGTH = 200
+
+# Must stay identical to the indexed expression in migration e8b3f6c14a27
+REPORT_TSVECTOR = (
+    "setweight(to_tsvector('english', coalesce(type, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(location, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
+POSTGRES_RANKED = f"""
+    SELECT id, ts_rank_cd(({REPORT_TSVECTOR}), websearch_to_tsquery('english', :q))::float8 AS score
+    FROM reports
+    WHERE ({REPORT_TSVECTOR}) @@ websearch_to_tsquery('english', :q)
+"""
+
+# bm25() is lower-is-better, so negate it to sort like ts_rank
+SQLITE_RANKED = """
+    SELECT rowid AS id, -bm25(reports_fts) AS score
+    FROM reports_fts
+    WHERE reports_fts MATCH :q
+"""
+
+
+def _page_sql(ranked_sql, after_cursor):
+    """Wrap a ranked subquery with the (score, id) keyset condition, ordering and limit."""
+    where = "WHERE score < :cursor_score OR (score = :cursor_score AND id < :cursor_id)" if after_cursor else ""
+    return text(f"SELECT id, score FROM ({ranked_sql}) ranked {where} ORDER BY score DESC, id DESC LIMIT :limit")
+
+
+def fts5_query(q):
+    """Turn free text into an FTS5 query: every word must match, operators are neutralised."""
+    words = re.findall(r"\w+", q)
+    return " ".join(f'"{word}"' for word in words)
+
+
+def _ranked_ids(q, cursor_score, cursor_id, limit):
+    dialect = db.engine.dialect.name
+    params = {"cursor_score": cursor_score, "cursor_id": cursor_id, "limit": limit}
+
+    after_cursor = cursor_id is not None
+
+    if dialect == "postgresql":
+        return db.session.execute(_page_sql(POSTGRES_RANKED, after_cursor), {**params, "q": q}).all()
+    if dialect == "sqlite":
+        match = fts5_query(q)
+        if not match:
+            return []
+        return db.session.execute(_page_sql(SQLITE_RANKED, after_cursor), {**params, "q": match}).all()
+
+    # No text index on this database: unranked substring scan
+    pattern = f"%{q}%"
+    query = db.session.query(Report.id, literal(0.0).label("score")).filter(or_(
+        Report.description.ilike(pattern), Report.location.ilike(pattern), Report.type.ilike(pattern)
+    ))
+    if after_cursor:
+        query = query.filter(Report.id < cursor_id)
+    return query.order_by(Report.id.desc()).limit(limit).all()
+
+
+def search_reports(args):
+    """
+    Run a ranked full-text search for ?q=, honouring ?limit=, ?cursor= and ?fields=.
+
+    Returns:
+        dict: {"reports": [...], "next_cursor": ...}, best matches first
+
+    Raises:
+        PaginationError, FieldsetError: on invalid query parameters
+    """
+    q = (args.get("q") or "").strip()
+    if not q:
+        raise PaginationError("q is required")
+    if len(q) > MAX_QUERY_LENGTH:
+        raise PaginationError(f"q must be at most {MAX_QUERY_LENGTH} characters")
+
+    limit = parse_limit(args)
+    fieldset = parse_fieldset(args, REPORT_FIELDS, REPORT_INCLUDES)
+
+    cursor_score = cursor_id = None
+    if args.get("cursor"):
+        try:
+            cursor_score, cursor_id = decode_token(args["cursor"])
+            cursor_score, cursor_id = float(cursor_score), int(cursor_id)
+        except (ValueError, TypeError):
+            raise PaginationError("Invalid cursor")
+
+    # One extra row tells us whether there is another page
+    ranked = _ranked_ids(q, cursor_score, cursor_id, limit + 1)
+    next_cursor = None
+    if len(ranked) > limit:
+        last = ranked[limit - 1]
+        next_cursor = encode_token([last.score, last.id])
+        ranked = ranked[:limit]
+
+    ids = [row.id for row in ranked]
+    query = Report.query
+    if fieldset:
+        query = query.options(*report_load_options(fieldset))
+    by_id = {r.id: r for r in query.filter(Report.id.in_(ids))} if ids else {}
+
+    return {
+        "reports": [serialize_report(by_id[i], fieldset) for i in ids if i in by_id],
+        "next_cursor": next_cursor,
+    }
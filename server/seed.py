@@ -5,6 +5,7 @@ Populates the database with sample users, reports, and donations
 """
 from config import app, db
 from models import User, Report, Donation
+from stats import reconcile_stats
 from datetime import datetime, timezone, timedelta
 import random
 
@@ -227,6 +228,9 @@ def seed_all():
         users = seed_users()
         reports = seed_reports(users)
         donations = seed_donations(reports)
+
+        # clear_database() bulk-deletes past the ORM events, so rebuild the counters
+        reconcile_stats()
         
         print("\n" + "="*50)
         print("✅ Database seeding completed successfully!")
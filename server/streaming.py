@@ -0,0 +1,41 @@
+"""
+Streaming JSON array responses for large collection endpoints.
+
+Rows are read from the database in yield_per batches and written to the
+client one element at a time, so a request never holds the full ORM list,
+the full list of dicts or the full JSON string in memory.
+"""
+import json
+
+from flask import Response, stream_with_context
+
+STREAM_BATCH_SIZE = 500
+
+
+def wants_stream(args):
+    """Streaming is opt-in with ?stream=1 (or true/yes)."""
+    return args.get("stream", "").lower() in ("1", "true", "yes")
+
+
+def stream_json_array(query, serialize, batch_size=STREAM_BATCH_SIZE):
+    """
+    Stream the rows of a query as a compact JSON array.
+
+    Args:
+        query: A SQLAlchemy query (loader options and filters already applied)
+        serialize (callable): row -> JSON-compatible dict
+        batch_size (int): Rows fetched per round trip
+
+    Returns:
+        flask.Response with a generator body
+    """
+    def generate():
+        yield "["
+        separator = ""
+        for row in query.yield_per(batch_size):
+            # sort_keys keeps element output identical to jsonify()
+            yield separator + json.dumps(serialize(row), separators=(",", ":"), sort_keys=True)
+            separator = ","
+        yield "]"
+
+    return Response(stream_with_context(generate()), status=200, mimetype="application/json")
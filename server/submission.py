@@ -0,0 +1,61 @@
+"""
+Bounded report classification: the AI call runs on a shared thread pool with
+its own timeout, so a hung or slow API call holds a pool thread rather than
+the request for longer than CLASSIFY_TIMEOUT. A classification that fails or
+times out yields the usual "Other" / "Moderate" fallback.
+
+The pool only runs classifications, so max_workers bounds this worker's
+concurrent OpenAI calls; background image work has its own pool
+(image_executor.py).
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from ai_utils import classify_report
+
+CONCURRENT_SUBMISSION = os.environ.get('CONCURRENT_SUBMISSION', '1').lower() not in ('0', 'false', 'no')
+CLASSIFY_TIMEOUT = float(os.environ.get('CLASSIFY_TIMEOUT', 20))
+
+# Shared by every request in this worker; max_workers bounds concurrent classifications
+executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('SUBMISSION_WORKERS', 8)),
+    thread_name_prefix='submission',
+)
+
+
+def fallback_classification(reason):
+    """The results used when classification is unavailable, matching ai_utils' fallbacks."""
+    return (
+        {'type': 'Other', 'confidence': 0.0, 'explanation': f'Classification failed: {reason}'},
+        {'severity': 'Moderate', 'confidence': 0.0, 'explanation': f'Classification failed: {reason}'},
+    )
+
+
+def _result_or_none(future, timeout, label):
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        future.cancel()
+        print(f"⏱️ {label} timed out after {timeout}s")
+    except Exception as e:
+        print(f"❌ {label} failed: {str(e)}")
+    return None
+
+
+def classify_with_timeout(description):
+    """
+    Classify a report on the shared pool, waiting at most CLASSIFY_TIMEOUT.
+
+    Args:
+        description (str): The disaster description text
+
+    Returns:
+        tuple: (type_result, severity_result), the fallback if classification
+        failed or timed out
+    """
+    classification = _result_or_none(
+        executor.submit(classify_report, description), CLASSIFY_TIMEOUT, "AI classification"
+    )
+    if classification is None:
+        classification = fallback_classification("timed out or unavailable")
+    return classification
@@ -0,0 +1,155 @@
+"""
+In-memory telemetry for OpenAI calls: latency, token usage, outcome and cost.
+
+Every API call made by ai_utils is recorded here with its wall time, the
+prompt/completion tokens from the response's usage, the model that served
+it and its outcome. Latency percentiles come from a sliding window of the
+most recent calls; counters and per-day cost accumulate for the life of the
+worker. Figures are per worker process, like the other /admin stats.
+"""
+import os
+import math
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+WINDOW = int(os.environ.get('AI_TELEMETRY_WINDOW', 5000))
+KEEP_DAYS = 30
+
+# USD per 1K tokens; override for other models or price changes
+PRICES = {
+    'gpt-3.5-turbo': (
+        float(os.environ.get('OPENAI_INPUT_PRICE_PER_1K', 0.0005)),
+        float(os.environ.get('OPENAI_OUTPUT_PRICE_PER_1K', 0.0015)),
+    ),
+}
+DEFAULT_PRICE = PRICES['gpt-3.5-turbo']
+
+# Outcomes other than 'ok' mean the caller fell back to a default answer
+OUTCOMES = ('ok', 'parse_failure', 'error', 'short_circuited')
+
+
+def estimate_cost(prompt_tokens, completion_tokens, model=None):
+    """USD cost of a call; dated model names (gpt-3.5-turbo-0125) use their family's price."""
+    input_price, output_price = next(
+        (price for name, price in PRICES.items() if model and model.startswith(name)), DEFAULT_PRICE
+    )
+    return prompt_tokens / 1000 * input_price + completion_tokens / 1000 * output_price
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class _KindStats:
+    def __init__(self):
+        self.latencies = deque(maxlen=WINDOW)
+        self.outcomes = defaultdict(int)
+        self.models = defaultdict(int)
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        calls = sum(self.outcomes.values())
+        fallbacks = calls - self.outcomes['ok']
+        return {
+            'calls': calls,
+            'outcomes': {outcome: self.outcomes[outcome] for outcome in OUTCOMES},
+            'fallback_rate': round(fallbacks / calls, 4) if calls else 0.0,
+            'models': dict(self.models),
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'latency_ms': {
+                f'p{p}': round(percentile(latencies, p) * 1000, 1) if latencies else None
+                for p in (50, 95, 99)
+            },
+        }
+
+
+class Telemetry:
+    def __init__(self):
+        self._kinds = defaultdict(_KindStats)
+        self._daily_cost = {}  # 'YYYY-MM-DD' (UTC) -> USD
+        self._lock = threading.Lock()
+        self._thread = threading.local()
+
+    def record(self, kind, latency, outcome='ok', model=None, prompt_tokens=0, completion_tokens=0):
+        """
+        Record one API call.
+
+        Args:
+            kind (str): The classifier that made it ('type', 'severity', 'report')
+            latency (float): Wall time in seconds, including retries
+            outcome (str): One of OUTCOMES
+            model (str): The model that served the call, if it got a response
+        """
+        usage = getattr(self._thread, 'usage', None)
+        if usage is not None:
+            usage['prompt_tokens'] += prompt_tokens
+            usage['completion_tokens'] += completion_tokens
+        cost = estimate_cost(prompt_tokens, completion_tokens, model)
+        today = datetime.now(timezone.utc).date().isoformat()
+        with self._lock:
+            stats = self._kinds[kind]
+            stats.latencies.append(latency)
+            stats.outcomes[outcome] += 1
+            if model:
+                stats.models[model] += 1
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            self._daily_cost[today] = self._daily_cost.get(today, 0.0) + cost
+            if len(self._daily_cost) > KEEP_DAYS:
+                del self._daily_cost[min(self._daily_cost)]
+
+    @contextmanager
+    def thread_usage(self):
+        """
+        Count the tokens of the API calls this thread makes inside the block.
+
+        Yields:
+            dict: 'prompt_tokens' and 'completion_tokens', updated as calls complete
+        """
+        outer = getattr(self._thread, 'usage', None)
+        usage = self._thread.usage = {'prompt_tokens': 0, 'completion_tokens': 0}
+        try:
+            yield usage
+        finally:
+            self._thread.usage = outer
+            if outer is not None:
+                for key in usage:
+                    outer[key] += usage[key]
+
+    def record_parse_failure(self, kind):
+        """Reclassify the most recent 'ok' call of `kind` as a parse failure."""
+        with self._lock:
+            stats = self._kinds[kind]
+            if stats.outcomes['ok']:
+                stats.outcomes['ok'] -= 1
+            stats.outcomes['parse_failure'] += 1
+
+    def summary(self):
+        with self._lock:
+            kinds = {kind: stats.summary() for kind, stats in self._kinds.items()}
+            all_latencies = sorted(l for stats in self._kinds.values() for l in stats.latencies)
+            daily_cost = {day: round(cost, 6) for day, cost in sorted(self._daily_cost.items())}
+        calls = sum(k['calls'] for k in kinds.values())
+        fallbacks = sum(k['calls'] - k['outcomes']['ok'] for k in kinds.values())
+        return {
+            'calls': calls,
+            'fallback_rate': round(fallbacks / calls, 4) if calls else 0.0,
+            'latency_ms': {
+                f'p{p}': round(percentile(all_latencies, p) * 1000, 1) if all_latencies else None
+                for p in (50, 95, 99)
+            },
+            'cost_usd_by_day': daily_cost,
+            'by_classifier': kinds,
+        }
+
+
+telemetry = Telemetry()
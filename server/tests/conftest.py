@@ -0,0 +1,225 @@
+"""
+Shared fixtures: a migrated SQLite database, a scratch UPLOAD_FOLDER and an
+in-process stand-in for the OpenAI API (fake_openai.completion_content), so
+the suite runs offline. Module-level caches and singletons are reset before
+every test.
+"""
+import io
+import os
+import sys
+import shutil
+import tempfile
+from types import SimpleNamespace
+
+import httpx
+import openai as openai_sdk
+import pytest
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TMP_DIR = tempfile.mkdtemp(prefix='disaster-tests-')
+
+# Must be set before config.py / ai_utils.py are imported
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(TMP_DIR, 'test.db')}"
+os.environ['OPENAI_API_KEY'] = 'test'
+os.environ['LOCAL_CLASSIFIER'] = '0'
+os.environ['ASYNC_CLASSIFICATION'] = '0'
+os.environ['CONCURRENT_SUBMISSION'] = '0'
+for name in ('CLOUDINARY_CLOUD_NAME', 'CLOUDINARY_API_KEY', 'CLOUDINARY_API_SECRET', 'CLOUDINARY_URL'):
+    os.environ.pop(name, None)
+sys.path.insert(0, SERVER_DIR)
+
+from flask_migrate import upgrade  # noqa: E402
+
+from app import app  # noqa: E402
+from config import db  # noqa: E402
+import ai_utils  # noqa: E402
+import classification_cache  # noqa: E402
+import duplicates  # noqa: E402
+import fake_openai  # noqa: E402
+import image_derivatives  # noqa: E402
+import image_pipeline  # noqa: E402
+import local_classifier  # noqa: E402
+import resilience  # noqa: E402
+import response_cache  # noqa: E402
+import telemetry  # noqa: E402
+from models import Admin, Donation, Report, StatCounter, User  # noqa: E402
+
+app.config['TESTING'] = True
+app.config['UPLOAD_FOLDER'] = os.path.join(TMP_DIR, 'uploads')
+
+# Counters a freshly migrated database starts with (see the stat_counters migration)
+BASE_COUNTERS = ('users', 'reports', 'donations', 'donation_amount')
+
+
+class FakeCompletions:
+    """Replaces client.chat.completions; answers like fake_openai.py, or raises `error`."""
+
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+        self.content = None
+
+    def create(self, model, messages, timeout=None, **kwargs):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        content = self.content or fake_openai.completion_content(messages[0]['content'], messages[-1]['content'])
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=50, completion_tokens=30),
+        )
+
+
+@pytest.fixture(scope='session', autouse=True)
+def migrated_db():
+    with app.app_context():
+        upgrade(directory=os.path.join(SERVER_DIR, 'migrations'))
+    yield
+    shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def clean_state(migrated_db):
+    with app.app_context():
+        for table in reversed(db.metadata.sorted_tables):
+            if table.name != 'table_versions':
+                db.session.execute(table.delete())
+        db.session.add_all(StatCounter(name=name, value=0) for name in BASE_COUNTERS)
+        db.session.commit()
+
+    shutil.rmtree(app.config['UPLOAD_FOLDER'], ignore_errors=True)
+    os.makedirs(app.config['UPLOAD_FOLDER'])
+
+    response_cache.response_cache.clear()
+    classification_cache.memory_tier.clear()
+    duplicates.duplicate_index.__init__()
+    duplicates.duplicate_index.rebuild()
+    local_classifier.local_classifier.__init__()
+    resilience.openai_breaker.__init__(
+        'OpenAI', failure_threshold=resilience.openai_breaker.failure_threshold,
+        reset_seconds=resilience.openai_breaker.reset_seconds,
+    )
+    telemetry.telemetry.__init__()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def openai(monkeypatch):
+    """The fake chat completions endpoint; set .error or .content to change its answers."""
+    completions = FakeCompletions()
+    monkeypatch.setattr(ai_utils.client.chat, 'completions', completions)
+    return completions
+
+
+class InlineExecutor:
+    """Runs submitted work straight away, so background image work is done when a request returns."""
+
+    def submit(self, fn, *args, **kwargs):
+        fn(*args, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def inline_executor(monkeypatch):
+    """Background image work would otherwise outlive the test that started it."""
+    executor = InlineExecutor()
+    monkeypatch.setattr(image_pipeline, 'executor', executor)
+    monkeypatch.setattr(image_derivatives, 'executor', executor)
+    return executor
+
+
+@pytest.fixture
+def image_bytes():
+    """Encode a solid-colour test image: image_bytes(fmt='PNG', size=(600, 400))."""
+    from PIL import Image
+
+    def image_bytes(fmt='PNG', size=(600, 400), color=(200, 30, 30)):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, color).save(buffer, fmt)
+        return buffer.getvalue()
+    return image_bytes
+
+
+@pytest.fixture
+def api_error():
+    """Build the openai.APIStatusError the SDK raises for an HTTP `status` answer."""
+    def api_error(status):
+        request = httpx.Request('POST', 'https://api.openai.com/v1/chat/completions')
+        return openai_sdk.APIStatusError('upstream error', response=httpx.Response(status, request=request), body=None)
+    return api_error
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+@pytest.fixture
+def app_context():
+    with app.app_context():
+        yield
+
+
+@pytest.fixture
+def login(client):
+    """Put a user (and/or admin) id in the test client's session cookie."""
+    def login(user_id=None, admin_id=None):
+        with client.session_transaction() as session:
+            if user_id is not None:
+                session['user_id'] = user_id
+            if admin_id is not None:
+                session['admin_id'] = admin_id
+                session['is_admin'] = True
+    return login
+
+
+@pytest.fixture
+def make_user(app_context):
+    def make_user(username='casey', email=None, password='password'):
+        user = User(username=username, email=email or f'{username}@example.com')
+        user.password_hash = password
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make_user
+
+
+@pytest.fixture
+def make_admin(app_context):
+    def make_admin(username='admin'):
+        admin = Admin(username=username, email=f'{username}@example.com')
+        admin.password_hash = 'password'
+        db.session.add(admin)
+        db.session.commit()
+        return admin
+    return make_admin
+
+
+@pytest.fixture
+def make_report(app_context):
+    """Insert a classified report directly, without going through POST /reports."""
+    def make_report(description='River burst its banks and flooded the market', location='Kisumu', **fields):
+        values = dict(
+            type='Flood', severity='Moderate', reporter_name='Anonymous',
+            type_confidence=0.9, type_explanation='Keyword match',
+            severity_confidence=0.8, severity_explanation='Keyword match',
+        )
+        values.update(fields)
+        report = Report(description=description, location=location, **values)
+        db.session.add(report)
+        db.session.commit()
+        return report
+    return make_report
+
+
+@pytest.fixture
+def make_donation(app_context):
+    def make_donation(report, full_name='Jordan Doe', amount_number=100.0, **fields):
+        donation = Donation(
+            report_id=report.id, full_name=full_name, email=fields.pop('email', 'jordan@example.com'),
+            phone='0700000000', type='Money', amount=str(amount_number), amount_number=amount_number, **fields,
+        )
+        db.session.add(donation)
+        db.session.commit()
+        return donation
+    return make_donation
@@ -0,0 +1,37 @@
+from ai_utils import classify_report
+
+
+def test_one_call_classifies_type_and_severity(openai):
+    type_result, severity_result = classify_report('Massive flood destroyed hundreds of homes')
+    assert openai.calls == 1
+    assert type_result['type'] == 'Flood'
+    assert severity_result['severity'] == 'Severe'
+    assert type_result['confidence'] == 0.91
+    assert severity_result['confidence'] == 0.84
+
+
+def test_unparseable_answer_falls_back_to_separate_calls(openai):
+    openai.content = 'Flood, probably severe'
+    type_result, severity_result = classify_report('River flood in the valley')
+    # The combined call, then one call per single-purpose prompt (also unparseable here)
+    assert openai.calls == 3
+    assert type_result['explanation'] == 'Unable to parse AI response'
+    assert severity_result['explanation'] == 'Unable to parse AI response'
+
+
+def test_api_failure_returns_the_fallback(openai, api_error):
+    openai.error = api_error(400)
+    type_result, severity_result = classify_report('Smoke over the ridge')
+    assert (type_result['type'], type_result['confidence']) == ('Other', 0.0)
+    assert (severity_result['severity'], severity_result['confidence']) == ('Moderate', 0.0)
+    assert type_result['explanation'].startswith('Classification failed')
+
+
+def test_submission_stores_the_classification(client, openai):
+    response = client.post('/reports', data={
+        'description': 'Small fire in a kitchen, quickly contained', 'location': 'Nakuru',
+    })
+    assert response.status_code == 201
+    body = response.get_json()
+    assert (body['type'], body['severity']) == ('Fire', 'Minor')
+    assert openai.calls == 1
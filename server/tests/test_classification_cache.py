@@ -0,0 +1,40 @@
+import classification_cache
+from ai_utils import classify_report
+from classification_cache import cache_key, is_cacheable
+from models import ClassificationCache
+
+
+def test_resubmissions_reuse_the_answer(openai):
+    first = classify_report('Flood water in the streets')
+    assert classify_report('  FLOOD water in the   streets! ') == first
+    assert openai.calls == 1
+
+
+def test_database_tier_survives_a_cold_memory_tier(openai, app_context):
+    first = classify_report('Flood water in the streets')
+    classification_cache.memory_tier.clear()
+    assert classify_report('Flood water in the streets') == first
+    assert openai.calls == 1
+    assert ClassificationCache.query.count() == 1
+
+
+def test_failures_are_not_cached(openai, app_context, api_error):
+    openai.error = api_error(400)
+    classify_report('Flood water in the streets')
+    openai.error = None
+    type_result, _ = classify_report('Flood water in the streets')
+    assert type_result['type'] == 'Flood'
+    assert openai.calls == 2
+
+
+def test_prompt_version_is_part_of_the_key():
+    assert cache_key('report', 'report-v1', 'flood') != cache_key('report', 'report-v2', 'flood')
+    assert cache_key('report', 'report-v1', 'Flood.') == cache_key('report', 'report-v1', 'flood')
+
+
+def test_is_cacheable():
+    ok = {'type': 'Flood', 'confidence': 0.9, 'explanation': 'Keyword match'}
+    failed = {'type': 'Other', 'confidence': 0.0, 'explanation': 'Classification failed: timeout'}
+    assert is_cacheable(ok)
+    assert not is_cacheable((ok, failed))
+    assert not is_cacheable({**ok, 'explanation': 'Unable to parse AI response'})
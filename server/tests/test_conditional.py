@@ -0,0 +1,57 @@
+import pytest
+
+from config import db
+
+
+@pytest.fixture
+def report(make_report):
+    return make_report()
+
+
+def test_etag_round_trip_returns_304(client, report):
+    first = client.get('/reports')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'no-cache'
+    etag = first.headers['ETag']
+
+    second = client.get('/reports', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.get_data() == b''
+    assert second.headers['ETag'] == etag
+
+
+def test_if_modified_since_returns_304(client, report):
+    last_modified = client.get(f'/reports/{report.id}').headers['Last-Modified']
+    response = client.get(f'/reports/{report.id}', headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 304
+
+
+def test_write_changes_the_etag(client, report, make_report):
+    etag = client.get('/reports').headers['ETag']
+    make_report(description='another report')
+    response = client.get('/reports', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_donation_changes_the_report_etag(client, report, make_donation):
+    etag = client.get(f'/reports/{report.id}').headers['ETag']
+    make_donation(report)
+    assert client.get(f'/reports/{report.id}', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_query_string_is_part_of_the_etag(client, report):
+    assert client.get('/reports').headers['ETag'] != client.get('/reports?type=Flood').headers['ETag']
+
+
+def test_update_bumps_the_table_version(client, report):
+    etag = client.get(f'/reports/{report.id}').headers['ETag']
+    report.location = 'Kisumu East'
+    db.session.commit()
+    assert client.get(f'/reports/{report.id}', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_errors_carry_no_validators(client):
+    response = client.get('/reports/999')
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
@@ -0,0 +1,172 @@
+import threading
+import time
+
+import pytest
+
+from config import db
+import duplicates
+from duplicates import (
+    DuplicateIndex, duplicate_index, find_duplicate, has_reusable_classification, signature, similarity,
+)
+from models import Report
+
+DESCRIPTION = 'The river burst its banks overnight and flooded the main market in Kisumu town'
+REWORDED = 'The river burst its banks overnight and flooded the main market in Kisumu town centre'
+
+
+@pytest.fixture
+def user(make_user, login):
+    user = make_user()
+    login(user_id=user.id)
+    return user
+
+
+def submit(client, description=REWORDED, location='Kisumu'):
+    response = client.post('/reports', data={'description': description, 'location': location})
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def test_signatures_estimate_similarity():
+    assert similarity(signature(DESCRIPTION, 'Kisumu'), signature(REWORDED, 'Kisumu')) >= 0.8
+    assert similarity(signature(DESCRIPTION, 'Kisumu'), signature('Wildfire near the forest', 'Nakuru')) < 0.2
+
+
+def test_near_duplicate_reuses_the_classification(client, openai, make_report):
+    original = make_report(description=DESCRIPTION, type='Flood', severity='Severe')
+
+    body = submit(client)
+
+    assert openai.calls == 0
+    assert (body['type'], body['severity']) == ('Flood', 'Severe')
+    assert body['type_explanation'].startswith(f'[duplicate of #{original.id}')
+    assert db.session.get(Report, body['id']).duplicate_of_id == original.id
+
+
+def test_unrelated_report_is_classified(client, openai, make_report):
+    make_report(description=DESCRIPTION)
+    body = submit(client, description='Small kitchen fire contained by neighbours', location='Nakuru')
+    assert openai.calls == 1
+    assert db.session.get(Report, body['id']).duplicate_of_id is None
+
+
+@pytest.mark.parametrize('fields', [
+    dict(type='Other', type_confidence=0.0, type_explanation='Classification failed: timed out',
+         severity='Moderate', severity_confidence=0.0, severity_explanation='Classification failed: timed out'),
+    dict(type_explanation='Unable to parse AI response'),
+    dict(type_confidence=None, severity_confidence=None),
+    dict(type_explanation='[local] Naive Bayes on 300 past reports (LLM unavailable)',
+         severity_explanation='[local] Naive Bayes on 300 past reports (LLM unavailable)'),
+])
+def test_failed_originals_are_not_reused(client, openai, make_report, fields):
+    """Regression: fallback answers stored while the classifier was down were copied to duplicates."""
+    original = make_report(description=DESCRIPTION, **fields)
+    assert not has_reusable_classification(original)
+
+    body = submit(client)
+
+    assert openai.calls == 1
+    assert body['type'] == 'Flood'
+    assert not body['type_explanation'].startswith('[duplicate')
+
+
+def test_a_good_original_behind_a_failed_one_is_still_found(app_context, make_report):
+    make_report(description=REWORDED, type_confidence=0.0, type_explanation='Classification failed: boom')
+    good = make_report(description=DESCRIPTION)
+    assert find_duplicate(REWORDED + ' today', 'Kisumu')[0] == good
+
+
+def test_duplicates_of_a_failed_report_are_not_reused_either(client, openai, make_report):
+    original = make_report(description=DESCRIPTION, type='Other', type_confidence=0.0,
+                           type_explanation='Classification failed: boom')
+    make_report(description=DESCRIPTION + ' again', type='Other', type_confidence=0.0,
+                type_explanation=f'[duplicate of #{original.id}, 95% similar] Classification failed: boom',
+                duplicate_of_id=original.id)
+    submit(client)
+    assert openai.calls == 1
+
+
+def test_deleted_report_leaves_the_index(client, user, make_report):
+    """Regression: deleted reports stayed in the in-memory index."""
+    original = make_report(description=DESCRIPTION, user_id=user.id)
+    assert find_duplicate(REWORDED, 'Kisumu')[0] == original
+
+    assert client.delete(f'/reports/{original.id}').status_code == 200
+
+    assert original.id not in duplicate_index.signatures
+    assert find_duplicate(REWORDED, 'Kisumu') == (None, 0.0)
+
+
+def test_admin_deletes_leave_the_index(client, login, make_admin, make_user, make_report):
+    login(admin_id=make_admin().id)
+    owner = make_user('owner')
+    by_report = make_report(description=DESCRIPTION)
+    by_user = [make_report(description=f'{DESCRIPTION} {i}', user_id=owner.id) for i in range(2)]
+    find_duplicate(REWORDED, 'Kisumu')
+    assert len(duplicate_index.signatures) == 3
+
+    assert client.delete(f'/admin/reports/{by_report.id}').status_code == 200
+    assert client.delete(f'/admin/users/{owner.id}').status_code == 200
+
+    assert duplicate_index.signatures == {}
+    assert all(r.id not in duplicate_index.signatures for r in by_user)
+
+
+def test_edited_report_is_reindexed(client, user, openai, make_report):
+    """Regression: an edited description kept matching under its old text."""
+    report = make_report(description=DESCRIPTION, user_id=user.id)
+    find_duplicate(REWORDED, 'Kisumu')
+
+    response = client.patch(f'/reports/{report.id}', json={'description': 'Wildfire spreading across the hills'})
+    assert response.status_code == 200
+
+    assert find_duplicate(REWORDED, 'Kisumu') == (None, 0.0)
+    assert find_duplicate('Wildfire spreading across the hills today', 'Kisumu')[0] == report
+
+
+def test_edits_by_another_worker_are_rescored(app_context, make_report):
+    report = make_report(description=DESCRIPTION)
+    find_duplicate(REWORDED, 'Kisumu')
+
+    # Changed behind this worker's back: the index still holds the old signature
+    report.description = 'Wildfire spreading across the hills'
+    db.session.commit()
+
+    assert find_duplicate(REWORDED, 'Kisumu') == (None, 0.0)
+
+
+def test_the_index_is_built_off_the_request_thread(app_context, make_report, monkeypatch):
+    """Regression: the first lookup rebuilt the whole index on the request thread."""
+    report = make_report(description=DESCRIPTION)
+    index = DuplicateIndex()
+    release = threading.Event()
+    sync = index._sync
+
+    def slow_sync():
+        release.wait(5)
+        sync()
+    monkeypatch.setattr(index, '_sync', slow_sync)
+    monkeypatch.setattr(duplicates, 'duplicate_index', index)
+
+    # Unbuilt: no duplicate, without waiting for the build
+    assert find_duplicate(REWORDED, 'Kisumu') == (None, 0.0)
+    assert find_duplicate(REWORDED, 'Kisumu') == (None, 0.0)
+    assert not index.built
+    release.set()
+    deadline = time.monotonic() + 5
+    while not index.built:
+        assert time.monotonic() < deadline, 'index was not built'
+        time.sleep(0.01)
+
+    assert find_duplicate(REWORDED, 'Kisumu')[0] == report
+
+
+def test_duplicates_endpoint_lists_both_directions(client, make_report):
+    first = make_report(description=DESCRIPTION)
+    second = make_report(description=REWORDED)
+    make_report(description='Wildfire near the forest', location='Nakuru')
+
+    body = client.get(f'/reports/{first.id}/duplicates').get_json()
+
+    assert [d['id'] for d in body['duplicates']] == [second.id]
+    assert body['duplicates'][0]['similarity'] >= 0.8
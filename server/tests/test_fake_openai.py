@@ -0,0 +1,73 @@
+import json
+
+import openai as openai_sdk
+import pytest
+from openai import OpenAI
+
+import ai_utils
+import resilience
+from fake_openai import FakeOpenAI, completion_content, start_server
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Start a fake server and point ai_utils.client at it, as OPENAI_BASE_URL would."""
+    servers = []
+    monkeypatch.setattr(resilience.time, 'sleep', lambda seconds: None)
+
+    def serve(**knobs):
+        fake = FakeOpenAI(**{'latency_ms': 1.0, 'latency_sigma': 0.0, 'seed': 1, **knobs})
+        server, base_url = start_server(fake)
+        servers.append(server)
+        client = OpenAI(api_key='fake', base_url=base_url, max_retries=0, timeout=5)
+        monkeypatch.setattr(ai_utils, 'client', client)
+        return fake, client
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_answers_match_each_prompt_shape():
+    combined = json.loads(completion_content('... type_confidence ...', 'Massive flood destroyed homes'))
+    assert (combined['type'], combined['severity']) == ('Flood', 'Severe')
+    severity = json.loads(completion_content('You are a disaster severity assessment expert', 'small fire'))
+    assert severity == {'severity': 'Minor', 'confidence': 0.84, 'explanation': 'Keyword match'}
+    disaster_type = json.loads(completion_content('You are a classifier', 'Tremor shook the town'))
+    assert disaster_type['type'] == 'Earthquake'
+
+
+def test_draw_honours_the_rates():
+    assert {FakeOpenAI(error_rate=1.0).draw()[1] for _ in range(20)} == {'error'}
+    assert {FakeOpenAI(malformed_rate=1.0).draw()[1] for _ in range(20)} == {'malformed'}
+    delay, outcome = FakeOpenAI(latency_ms=250, latency_sigma=0.0).draw()
+    assert (delay, outcome) == (0.25, 'ok')
+
+
+def test_sdk_round_trip(serve):
+    fake, client = serve()
+    response = client.chat.completions.create(model='gpt-3.5-turbo', messages=[
+        {'role': 'system', 'content': 'You are a classifier'},
+        {'role': 'user', 'content': 'River flood'},
+    ])
+    assert json.loads(response.choices[0].message.content)['type'] == 'Flood'
+    assert response.usage.prompt_tokens > 0
+    assert fake.requests == 1
+
+
+def test_classify_report_through_the_server(serve):
+    serve()
+    type_result, severity_result = ai_utils.classify_report('Massive flood destroyed hundreds of homes')
+    assert (type_result['type'], severity_result['severity']) == ('Flood', 'Severe')
+
+
+def test_injected_errors_are_http_500(serve):
+    _, client = serve(error_rate=1.0)
+    with pytest.raises(openai_sdk.InternalServerError):
+        client.chat.completions.create(model='gpt-3.5-turbo', messages=[{'role': 'user', 'content': 'x'}])
+
+
+def test_malformed_answers_fall_back(serve):
+    serve(malformed_rate=1.0)
+    type_result, _ = ai_utils.classify_report('River flood in the valley')
+    assert type_result['explanation'] == 'Unable to parse AI response'
@@ -0,0 +1,57 @@
+import pytest
+
+from fieldsets import DONATION_COLUMNS
+
+
+@pytest.fixture
+def report(make_report, make_donation):
+    report = make_report()
+    make_donation(report, full_name='Jordan Doe')
+    return report
+
+
+def test_fields_limit_the_payload(client, report):
+    body = client.get('/reports?fields=id,type,severity').get_json()
+    assert body == [{'id': report.id, 'type': 'Flood', 'severity': 'Moderate'}]
+
+
+def test_relationships_are_left_out_unless_included(client, report):
+    body = client.get('/reports?fields=id,location').get_json()
+    assert 'donations' not in body[0]
+    assert 'user' not in body[0]
+
+
+def test_included_donations_use_the_public_name_key(client, report):
+    """Regression: embedded donations exposed the full_name column instead of 'name'."""
+    body = client.get('/reports?fields=id&include=donations').get_json()
+    donation = body[0]['donations'][0]
+
+    assert donation['name'] == 'Jordan Doe'
+    assert 'full_name' not in donation
+    assert set(donation) == set(DONATION_COLUMNS)
+
+
+def test_included_donations_match_the_donation_endpoints(client, login, make_admin, report):
+    login(admin_id=make_admin().id)
+    embedded = client.get('/reports?fields=id&include=donations').get_json()[0]['donations']
+    listed = client.get('/admin/donations?fields=' + ','.join(DONATION_COLUMNS)).get_json()
+    assert embedded == listed
+
+
+def test_fieldsets_work_with_pagination(client, report):
+    body = client.get('/reports?limit=5&fields=location').get_json()
+    assert body['reports'] == [{'location': 'Kisumu'}]
+    assert body['next_cursor'] is None
+
+
+@pytest.mark.parametrize('query', ['fields=id,secret', 'include=reporter'])
+def test_unknown_fields_are_400(client, query):
+    response = client.get(f'/reports?{query}')
+    assert response.status_code == 400
+    assert 'Unknown' in response.get_json()['error']
+
+
+def test_admin_donation_fields_flatten_the_report(client, login, make_admin, report):
+    login(admin_id=make_admin().id)
+    body = client.get('/admin/donations?fields=name,report_location').get_json()
+    assert body == [{'name': 'Jordan Doe', 'report_location': 'Kisumu'}]
@@ -0,0 +1,81 @@
+import os
+
+import pytest
+from PIL import Image
+
+from config import db
+from image_derivatives import render_derivatives, start_derivatives
+
+BASE_URL = 'http://localhost/uploads/ab/cd'
+
+
+@pytest.fixture
+def source(tmp_path, image_bytes):
+    """Write an original image into tmp_path and return its path."""
+    def source(size=(2000, 1000), fmt='JPEG'):
+        path = tmp_path / f'original.{fmt.lower()}'
+        path.write_bytes(image_bytes(fmt, size))
+        return str(path)
+    return source
+
+
+def test_every_size_and_format_is_rendered(tmp_path, source):
+    variants = render_derivatives(source(), str(tmp_path / 'out'), 'abc', BASE_URL)
+
+    assert variants['webp'] == {f'{w}w': f'{BASE_URL}/abc-{w}.webp' for w in (160, 480, 1200)}
+    assert set(variants['jpeg']) == {'160w', '480w', '1200w'}
+    with Image.open(tmp_path / 'out' / 'abc-480.webp') as image:
+        assert image.size == (480, 240)
+
+
+def test_sizes_wider_than_the_original_are_skipped(tmp_path, source):
+    variants = render_derivatives(source(size=(300, 200)), str(tmp_path), 'abc', BASE_URL)
+    assert set(variants['webp']) == {'160w', '300w'}
+
+
+def test_existing_derivatives_are_not_rendered_again(tmp_path, source):
+    render_derivatives(source(), str(tmp_path), 'abc', BASE_URL)
+    path = tmp_path / 'abc-160.jpeg'
+    mtime = os.stat(path).st_mtime_ns
+
+    render_derivatives(source(), str(tmp_path), 'abc', BASE_URL)
+
+    assert os.stat(path).st_mtime_ns == mtime
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_variants_are_recorded_on_the_report(tmp_path, make_report, source):
+    report = make_report(image=f'{BASE_URL}/abc.png')
+
+    start_derivatives(report.id, source(fmt='PNG'), report.image)
+
+    db.session.refresh(report)
+    assert report.image_variants['jpeg']['1200w'] == f'{BASE_URL}/original-1200.jpeg'
+
+
+def test_a_replaced_image_keeps_no_stale_variants(tmp_path, make_report, source):
+    report = make_report(image='https://example.com/newer.jpg')
+    start_derivatives(report.id, source(), f'{BASE_URL}/abc.jpeg')
+    db.session.refresh(report)
+    assert report.image_variants is None
+
+
+def test_unreadable_images_are_skipped(tmp_path, make_report):
+    broken = tmp_path / 'broken.jpeg'
+    broken.write_bytes(b'not an image')
+    report = make_report(image=f'{BASE_URL}/broken.jpeg')
+
+    start_derivatives(report.id, str(broken), report.image)
+
+    db.session.refresh(report)
+    assert report.image_variants is None
+
+
+def test_variants_are_served_with_the_report(client, make_report, tmp_path, source):
+    report = make_report(image=f'{BASE_URL}/abc.png')
+    start_derivatives(report.id, source(fmt='PNG'), report.image)
+    # The test client shares this app context's session, which still holds the old row
+    db.session.expire_all()
+
+    body = client.get(f'/reports/{report.id}').get_json()
+    assert set(body['image_variants']) == {'webp', 'jpeg'}
@@ -0,0 +1,141 @@
+import io
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+import image_pipeline
+from app import app
+from config import db
+from image_pipeline import MAX_ATTEMPTS, requeue_stale_uploads, run_upload_job, spool_image
+from jobs import STALE_LOCK
+from models import ImageUploadJob, Report
+from upload_storage import relative_path_from_url
+
+CDN_URL = 'https://res.cloudinary.com/demo/image/upload/disaster_reports/abc.jpg'
+
+
+@pytest.fixture
+def cloudinary(monkeypatch):
+    """Pretend Cloudinary is configured; .result is what the next upload returns."""
+    class FakeCloudinary:
+        result = {'url': CDN_URL, 'public_id': 'disaster_reports/abc'}
+        uploaded = []
+        deleted = []
+
+        def upload(self, path, folder):
+            self.uploaded.append(path)
+            return self.result
+
+    fake = FakeCloudinary()
+    monkeypatch.setattr(image_pipeline, 'is_cloudinary_configured', lambda: True)
+    monkeypatch.setattr(image_pipeline, 'upload_image_to_cloudinary', fake.upload)
+    monkeypatch.setattr(image_pipeline, 'delete_image_from_cloudinary', fake.deleted.append)
+    return fake
+
+
+@pytest.fixture
+def submit(client, image_bytes):
+    """POST /reports with a photo attached; returns the stored Report."""
+    def submit(**fields):
+        form = {'description': 'River flood in the valley', 'location': 'Kisumu', **fields}
+        form['image'] = (io.BytesIO(image_bytes()), 'photo.png')
+        response = client.post('/reports', data=form, content_type='multipart/form-data')
+        assert response.status_code == 201, response.get_json()
+        return db.session.get(Report, response.get_json()['id'])
+    return submit
+
+
+def local_path(report):
+    return os.path.join(app.config['UPLOAD_FOLDER'], relative_path_from_url(report.image))
+
+
+def test_local_storage_without_cloudinary(app_context, submit):
+    report = submit()
+
+    assert report.image_status == 'local'
+    assert os.path.exists(local_path(report))
+    assert set(report.image_variants) == {'webp', 'jpeg'}
+    assert ImageUploadJob.query.count() == 0
+
+
+def test_identical_images_share_one_file(app_context, submit):
+    first = submit()
+    second = submit(description='Another flood report', location='Nakuru')
+    assert first.image == second.image
+
+
+def test_unspooled_files_are_named_by_their_sniffed_type(image_bytes):
+    """Regression: the same bytes sent as .jpg and .jpeg were stored twice."""
+    data = image_bytes('JPEG')
+    with app.test_request_context():
+        paths = {spool_image(FileStorage(io.BytesIO(data), name))[0] for name in ('a.jpg', 'a.jpeg', 'a.JPG')}
+    path, = paths
+    assert path.endswith('.jpg')
+
+
+def test_upload_swaps_in_the_cdn_url(app_context, cloudinary, submit):
+    report = submit()
+    spool_path = cloudinary.uploaded[0]
+
+    assert (report.image, report.image_status) == (CDN_URL, 'uploaded')
+    assert ImageUploadJob.query.one().status == 'done'
+    # Nothing else refers to the spooled copy any more
+    assert not os.path.exists(spool_path)
+
+
+def test_spool_shared_with_another_report_is_kept(app_context, cloudinary, monkeypatch, submit):
+    monkeypatch.setattr(image_pipeline, 'is_cloudinary_configured', lambda: False)
+    local = submit()
+    monkeypatch.setattr(image_pipeline, 'is_cloudinary_configured', lambda: True)
+
+    submit(description='Another flood report')
+
+    assert os.path.exists(local_path(local))
+
+
+def test_failed_uploads_back_off_then_give_up(app_context, cloudinary, submit):
+    cloudinary.result = None
+    report = submit()
+    job = ImageUploadJob.query.one()
+    provisional = report.image
+
+    assert (job.status, job.attempts, report.image_status) == ('queued', 1, 'pending')
+    assert job.run_after > datetime.now()
+
+    while job.status == 'queued':
+        job.status, job.attempts = 'running', job.attempts + 1
+        db.session.commit()
+        run_upload_job(job.id)
+
+    assert job.attempts == MAX_ATTEMPTS
+    assert job.status == 'failed'
+    assert (report.image, report.image_status) == (provisional, 'failed')
+
+
+def test_upload_for_a_replaced_image_is_deleted(app_context, cloudinary, monkeypatch, submit):
+    monkeypatch.setattr(image_pipeline, 'start_upload', lambda job: None)
+    report = submit()
+    job = ImageUploadJob.query.one()
+    report.image = 'https://example.com/newer.jpg'
+    db.session.commit()
+
+    assert run_upload_job(job.id) == 'done'
+
+    assert report.image == 'https://example.com/newer.jpg'
+    assert cloudinary.deleted == ['disaster_reports/abc']
+
+
+def test_stale_uploads_out_of_attempts_are_failed(app_context, cloudinary, monkeypatch, submit):
+    monkeypatch.setattr(image_pipeline, 'start_upload', lambda job: None)
+    report = submit()
+    job = ImageUploadJob.query.one()
+    job.status, job.attempts = 'running', MAX_ATTEMPTS
+    job.locked_at = datetime.now() - STALE_LOCK - timedelta(seconds=1)
+    db.session.commit()
+
+    assert requeue_stale_uploads() == 1
+
+    db.session.expire_all()
+    assert (job.status, report.image_status) == ('failed', 'failed')
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+import jobs
+from config import db
+from models import ClassificationJob, Report
+from worker import work_once
+
+
+def submit(client, description='Flood water in the streets'):
+    response = client.post('/reports?async=1', data={'description': description, 'location': 'Kisumu'})
+    assert response.status_code == 202
+    return response.get_json()
+
+
+def test_async_submission_is_classified_by_the_worker(client, openai, app_context):
+    body = submit(client)
+    assert body['classification_status'] == 'pending'
+    assert openai.calls == 0
+
+    status = client.get(body['status_url']).get_json()
+    assert (status['classification_status'], status['type']) == ('pending', jobs.PENDING_TYPE)
+
+    assert work_once() == 1
+    status = client.get(body['status_url']).get_json()
+    assert (status['classification_status'], status['type']) == ('complete', 'Flood')
+    assert db.session.get(ClassificationJob, 1).status == 'done'
+
+
+def test_failed_classification_is_retried_then_marked_failed(client, openai, app_context, api_error):
+    openai.error = api_error(400)
+    report_id = submit(client)['id']
+    job = ClassificationJob.query.filter_by(report_id=report_id).one()
+
+    for attempt in range(1, jobs.MAX_ATTEMPTS + 1):
+        # Make the backed-off job due again
+        job.run_after = job.run_after - timedelta(days=1)
+        db.session.commit()
+        assert work_once() == 1
+        db.session.refresh(job)
+        assert job.attempts == attempt
+    assert job.status == 'failed'
+    report = db.session.get(Report, report_id)
+    assert (report.classification_status, report.type) == ('failed', 'Other')
+
+
+def test_local_guesses_while_the_api_is_down_are_retried(client, app_context, monkeypatch):
+    """Regression: the local model's stand-in answer marked the job complete."""
+    guess = ({'type': 'Flood', 'confidence': 0.4, 'explanation': '[local] Naive Bayes (LLM unavailable)'},
+             {'severity': 'Minor', 'confidence': 0.4, 'explanation': '[local] Naive Bayes (LLM unavailable)'})
+    monkeypatch.setattr(jobs, 'classify_report', lambda description: guess)
+    report_id = submit(client)['id']
+
+    assert work_once() == 1
+
+    job = ClassificationJob.query.one()
+    assert job.status == 'queued'
+    assert db.session.get(Report, report_id).classification_status == 'pending'
+
+
+def test_a_job_is_claimed_only_once(client, app_context):
+    submit(client)
+    assert len(jobs.claim_jobs()) == 1
+    assert jobs.claim_jobs() == []
+
+
+def test_stale_running_jobs_are_requeued(client, app_context):
+    submit(client)
+    job_id, = jobs.claim_jobs()
+    job = db.session.get(ClassificationJob, job_id)
+    job.locked_at = job.locked_at - jobs.STALE_LOCK - timedelta(seconds=1)
+    db.session.commit()
+    assert jobs.requeue_stale_jobs() == 1
+    assert jobs.claim_jobs() == [job_id]
+
+
+def test_jobs_that_keep_crashing_the_worker_are_failed(client, app_context):
+    """Regression: a job whose worker died on every attempt was requeued forever."""
+    report_id = submit(client)['id']
+    for attempt in range(1, jobs.MAX_ATTEMPTS + 1):
+        job_id, = jobs.claim_jobs()
+        job = db.session.get(ClassificationJob, job_id)
+        job.locked_at = job.locked_at - jobs.STALE_LOCK - timedelta(seconds=1)
+        db.session.commit()
+        assert jobs.requeue_stale_jobs() == 1
+
+    db.session.expire_all()
+    assert (job.status, job.attempts) == ('failed', jobs.MAX_ATTEMPTS)
+    assert db.session.get(Report, report_id).classification_status == 'failed'
+    assert jobs.claim_jobs() == []
@@ -0,0 +1,163 @@
+import itertools
+import random
+import threading
+import time
+
+import pytest
+
+import local_classifier
+from ai_utils import classify_report
+from config import db
+from local_classifier import IsotonicCalibrator, LocalClassifier, features, LLM_TAG, LOCAL_TAG
+from models import Report
+
+VOCABULARY = {
+    ('Flood', 'Severe'): 'river burst its banks, homes under water and families stranded on roofs',
+    ('Fire', 'Minor'): 'small kitchen fire, smoke quickly put out by neighbours',
+}
+PLACE_WORDS = ('north', 'south', 'east', 'west', 'upper', 'lower', 'old', 'new',
+               'central', 'market', 'school', 'church', 'bridge', 'road', 'farm', 'estate')
+
+
+@pytest.fixture
+def history(app_context):
+    """LLM-labelled reports with two clearly separable classes."""
+    for i in range(300):
+        (report_type, severity), text = list(VOCABULARY.items())[i % 2]
+        db.session.add(Report(
+            description=f'{text} near block {i}', location='Kisumu', type=report_type, severity=severity,
+            type_confidence=0.9, severity_confidence=0.9,
+            type_explanation=f'{LLM_TAG} Keyword match', severity_explanation=f'{LLM_TAG} Keyword match',
+        ))
+    db.session.commit()
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(local_classifier, 'LOCAL_CLASSIFIER', True)
+    monkeypatch.setattr(local_classifier, 'AUDIT_RATE', 0.0)
+    for key in local_classifier.stats:
+        monkeypatch.setitem(local_classifier.stats, key, 0)
+
+
+def wait_for_model(classifier=local_classifier.local_classifier, timeout=5):
+    deadline = time.monotonic() + timeout
+    while classifier.type_model is None or classifier._training:
+        assert time.monotonic() < deadline, 'model was not trained'
+        time.sleep(0.01)
+
+
+def test_calibrator_is_monotone_and_matches_observed_accuracy():
+    scores = [0.5, 0.6, 0.7, 0.8, 0.9, 0.99, 0.999, 1.0]
+    correct = [False, True, False, True, True, True, True, True]
+    calibrate = IsotonicCalibrator(scores, correct, min_block=1)
+    mapped = [calibrate(s) for s in scores]
+    assert mapped == sorted(mapped)
+    # 0.6 (right) and 0.7 (wrong) violate monotonicity and are pooled
+    assert calibrate(0.55) == calibrate(0.7) == 0.5
+    assert calibrate(0.5) == 0.0
+    assert calibrate(1.0) == 1.0
+
+
+def test_overconfident_posteriors_are_calibrated_to_held_out_accuracy(app_context):
+    """One flood-like report in four carries another label, yet naive Bayes is ~100% sure of 'Flood'."""
+    flood, mud = VOCABULARY[('Flood', 'Severe')], 'mud slid down the hill onto the road'
+    places = [' '.join(words) for words in itertools.product(PLACE_WORDS, repeat=3)]
+    noise = random.Random(7)
+    for place in places[:400]:
+        report_type = 'Landslide' if noise.random() < 0.25 else 'Flood'
+        db.session.add(Report(description=f'{flood} {place}', location='Kisumu', type=report_type,
+                              severity='Severe', type_confidence=0.9, severity_confidence=0.9))
+    for place in places[::20]:
+        db.session.add(Report(description=f'{mud} {place}', location='Kisumu', type='Landslide',
+                              severity='Severe', type_confidence=0.9, severity_confidence=0.9))
+    db.session.commit()
+
+    classifier = LocalClassifier()
+    classifier.train()
+    model = classifier.type_model
+
+    label, raw = model.model.predict(features(f'{flood} central market'))
+    _, calibrated = model.predict(features(f'{flood} central market'))
+    assert label == 'Flood'
+    assert raw > 0.999
+    assert calibrated < local_classifier.THRESHOLD
+
+    # Unambiguous reports are still answered locally
+    label, calibrated = model.predict(features(f'{mud} north school'))
+    assert label == 'Landslide'
+    assert calibrated >= local_classifier.THRESHOLD
+    assert 0 < model.coverage < 1
+    assert model.agreement >= local_classifier.THRESHOLD
+
+
+def test_classify_never_trains_on_the_calling_thread(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_train(self):
+        started.set()
+        release.wait(5)
+
+    monkeypatch.setattr(LocalClassifier, 'train', slow_train)
+    classifier = LocalClassifier()
+    began = time.monotonic()
+    assert classifier.classify('flood in the valley') is None
+    assert time.monotonic() - began < 1
+    assert started.wait(1)
+    # A second call while training is running doesn't start another thread
+    assert classifier.classify('flood in the valley') is None
+    release.set()
+
+
+def test_llm_answers_until_a_model_exists(enabled, history, openai):
+    type_result, _ = classify_report('river burst its banks, homes under water')
+    assert type_result['explanation'].startswith(LLM_TAG)
+    assert openai.calls == 1
+
+    wait_for_model()
+    type_result, severity_result = classify_report('river burst its banks, homes under water and families')
+    assert (type_result['type'], severity_result['severity']) == ('Flood', 'Severe')
+    assert type_result['explanation'].startswith(LOCAL_TAG)
+    assert openai.calls == 1
+
+
+def test_audited_answers_go_to_the_llm(enabled, history, openai, monkeypatch):
+    local_classifier.local_classifier.start_training()
+    wait_for_model()
+    monkeypatch.setattr(local_classifier, 'AUDIT_RATE', 1.0)
+
+    type_result, _ = classify_report('small kitchen fire, smoke quickly put out')
+    assert type_result['explanation'].startswith(LLM_TAG)
+    assert openai.calls == 1
+    assert local_classifier.stats['audited'] == 1
+    assert local_classifier.stats['audit_agreed'] == 1
+
+
+def test_training_skips_local_answers_but_keeps_audited_ones(history):
+    db.session.add_all([
+        Report(description='local guess', location='x', type='Fire', severity='Minor',
+               type_confidence=0.99, severity_confidence=0.99,
+               type_explanation=f'{LOCAL_TAG} Naive Bayes', severity_explanation=f'{LOCAL_TAG} Naive Bayes'),
+        Report(description='audited answer', location='x', type='Fire', severity='Minor',
+               type_confidence=0.9, severity_confidence=0.9,
+               type_explanation=f'{LLM_TAG} Keyword match', severity_explanation=f'{LLM_TAG} Keyword match'),
+    ])
+    db.session.commit()
+    classifier = LocalClassifier()
+    classifier.train()
+    assert classifier.type_model.n_examples == 301
+
+
+def test_training_skips_duplicates(history):
+    """Regression: copies of a local answer retrained the model on its own guesses."""
+    original = Report.query.first()
+    db.session.add(Report(
+        description='near copy', location='x', type='Fire', severity='Minor',
+        type_confidence=0.99, severity_confidence=0.99, duplicate_of_id=original.id,
+        type_explanation=f'[duplicate of #{original.id}, 90% similar] {LOCAL_TAG} Naive Bayes',
+        severity_explanation=f'[duplicate of #{original.id}, 90% similar] {LOCAL_TAG} Naive Bayes',
+    ))
+    db.session.commit()
+    classifier = LocalClassifier()
+    classifier.train()
+    assert classifier.type_model.n_examples == 300
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from config import db
+from pagination import PaginationError, decode_cursor, encode_cursor, parse_date_param
+
+START = datetime(2026, 1, 1, 12, 0)
+
+
+@pytest.fixture
+def reports(make_report):
+    """Seven reports a day apart, plus two sharing a timestamp and one without a date."""
+    made = [make_report(description=f'report {i}', date=START + timedelta(days=i)) for i in range(7)]
+    made += [make_report(description=f'tie {i}', date=START + timedelta(days=10)) for i in range(2)]
+    undated = make_report(description='undated')
+    # The column default fills in a missing date on insert, so clear it afterwards
+    undated.date = None
+    db.session.commit()
+    return made + [undated]
+
+
+def walk(client, url):
+    """Follow next_cursor to the end, returning every id seen and the number of pages."""
+    ids, pages, cursor = [], 0, None
+    while True:
+        response = client.get(url + (f'&cursor={cursor}' if cursor else ''))
+        assert response.status_code == 200
+        body = response.get_json()
+        ids += [r['id'] for r in body['reports']]
+        pages += 1
+        cursor = body['next_cursor']
+        if cursor is None:
+            return ids, pages
+
+
+def test_unpaginated_list_stays_a_bare_array(client, reports):
+    body = client.get('/reports').get_json()
+    assert isinstance(body, list)
+    assert len(body) == len(reports)
+
+
+def test_cursor_walk_returns_every_report_once_newest_first(client, reports):
+    ids, pages = walk(client, '/reports?limit=3')
+
+    assert pages == 4
+    assert len(ids) == len(set(ids)) == len(reports)
+    tied = sorted((r.id for r in reports if r.description.startswith('tie')), reverse=True)
+    assert ids[:2] == tied
+    # Undated reports sort last
+    assert ids[-1] == reports[-1].id
+
+
+def test_last_page_has_no_cursor(client, reports):
+    body = client.get(f'/reports?limit={len(reports)}').get_json()
+    assert len(body['reports']) == len(reports)
+    assert body['next_cursor'] is None
+
+
+def test_filters_run_before_pagination(client, make_report):
+    for i in range(4):
+        make_report(description=f'fire {i}', type='Fire', severity='Severe', location='Nakuru town')
+    make_report(description='flood', type='Flood', severity='Minor', location='Kisumu')
+
+    ids, _ = walk(client, '/reports?limit=2&type=fire&severity=SEVERE&location=nakuru')
+    assert len(ids) == 4
+
+
+def test_date_range_is_inclusive_of_whole_days(client, reports):
+    body = client.get('/reports?date_from=2026-01-02&date_to=2026-01-03').get_json()
+    assert sorted(r['description'] for r in body) == ['report 1', 'report 2']
+
+
+@pytest.mark.parametrize('query', ['limit=0', 'limit=ten', 'cursor=not-a-cursor', 'date_from=yesterday'])
+def test_invalid_parameters_are_400(client, query):
+    response = client.get(f'/reports?{query}')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_limit_is_capped(client, make_report):
+    for i in range(3):
+        make_report(description=f'report {i}')
+    body = client.get('/reports?limit=100000').get_json()
+    assert len(body['reports']) == 3
+
+
+def test_cursor_round_trip(make_report):
+    report = make_report(date=START)
+    assert decode_cursor(encode_cursor(report)) == (START, report.id)
+
+
+def test_parse_date_param_normalizes_to_naive_utc():
+    assert parse_date_param('2026-01-01T03:00:00+03:00') == datetime(2026, 1, 1, 0, 0)
+    assert parse_date_param('2026-01-01', end_of_day=True) == datetime(2026, 1, 1, 23, 59, 59, 999999)
+    with pytest.raises(PaginationError):
+        parse_date_param('01/01/2026')
+
+
+def test_admin_reports_are_paginated_too(client, login, make_admin, reports):
+    login(admin_id=make_admin().id)
+    ids, _ = walk(client, '/admin/reports?limit=4')
+    assert len(ids) == len(reports)
+
+
+def test_pages_seek_into_the_date_index(client, reports):
+    """Every page, including the NULL-date tail, seeks into the index instead of sorting the table."""
+    cursor = client.get('/reports?limit=3').get_json()['next_cursor']
+    statements = []
+
+    def capture(conn, cursor_, statement, parameters, context, executemany):
+        if statement.lstrip().startswith('SELECT') and 'FROM reports' in statement:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        assert client.get(f'/reports?limit=3&cursor={cursor}').status_code == 200
+        # The last page runs into the NULL-date tail
+        walk(client, '/reports?limit=8')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+
+    assert statements
+    with db.engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = ' '.join(row[-1] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters))
+            assert 'ix_reports_date_id' in plan and 'TEMP B-TREE' not in plan, (statement, plan)
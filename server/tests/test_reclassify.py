@@ -0,0 +1,110 @@
+import argparse
+
+import pytest
+
+import reclassify
+from ai_utils import classify_report
+from config import db
+from models import Report, StatCounter, TableVersion
+
+
+@pytest.fixture
+def run(tmp_path):
+    checkpoint = str(tmp_path / 'checkpoint.json')
+
+    def run(**options):
+        args = dict(batch_size=2, concurrency=2, rpm=60000, tpm=10 ** 7, limit=None, checkpoint=checkpoint,
+                    restart=False, allow_local=False, dry_run=False)
+        args.update(options)
+        return reclassify.reclassify(argparse.Namespace(**args))
+    run.checkpoint = checkpoint
+    return run
+
+
+@pytest.fixture
+def stale(make_report):
+    """Reports whose stored classification disagrees with what the classifier now says."""
+    return [make_report(description=f'Massive flood destroyed homes in block {i}', type='Other', severity='Minor')
+            for i in range(5)]
+
+
+def reload(reports):
+    db.session.expire_all()
+    return [db.session.get(Report, r.id) for r in reports]
+
+
+def test_rewrites_every_report_and_bumps_the_version(run, stale):
+    version = db.session.get(TableVersion, 'reports').version
+    assert run() == 0
+    assert {(r.type, r.severity) for r in reload(stale)} == {('Flood', 'Severe')}
+    assert all(r.type_explanation.startswith('[llm]') for r in reload(stale))
+    assert db.session.get(TableVersion, 'reports').version > version
+    # Counters were moved by bulk UPDATEs and are reconciled at the end
+    assert StatCounter.query.get('type:Flood').value == 5
+
+
+def test_interrupted_run_resumes_from_the_checkpoint(run, stale, openai):
+    run(limit=2)
+    assert [r.type for r in reload(stale)] == ['Flood', 'Flood', 'Other', 'Other', 'Other']
+    calls = openai.calls
+    run()
+    assert openai.calls - calls == 3
+    assert {r.type for r in reload(stale)} == {'Flood'}
+
+
+def test_failures_keep_the_existing_classification(run, stale, openai, api_error):
+    openai.error = api_error(400)
+    assert run() == len(stale)
+    assert {(r.type, r.severity) for r in reload(stale)} == {('Other', 'Minor')}
+
+
+def test_reclassified_reports_are_marked_complete(run, make_report):
+    """Regression: reports whose earlier classification failed stayed 'failed'."""
+    report = make_report(description='Massive flood destroyed homes', type='Other',
+                         classification_status='failed')
+    run()
+    assert reload([report])[0].classification_status == 'complete'
+
+
+def test_progress_records_the_tokens_actually_used(run, stale, monkeypatch):
+    progresses = []
+
+    class Progress(reclassify.Progress):
+        def __init__(self, total):
+            super().__init__(total)
+            progresses.append(self)
+    monkeypatch.setattr(reclassify, 'Progress', Progress)
+
+    run()
+
+    # The fake API reports 50 prompt and 30 completion tokens per call
+    progress, = progresses
+    assert (progress.prompt_tokens, progress.completion_tokens) == (50 * len(stale), 30 * len(stale))
+
+
+def test_cached_answers_are_not_reused(run, stale, openai):
+    classify_report(stale[0].description)
+    calls = openai.calls
+    run()
+    assert openai.calls - calls == len(stale)
+
+
+def test_dry_run_writes_nothing(run, stale):
+    run(dry_run=True)
+    assert {r.type for r in reload(stale)} == {'Other'}
+
+
+def test_rate_limiter_spaces_out_requests(monkeypatch):
+    clock, sleeps = [100.0], []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    monkeypatch.setattr(reclassify.time, 'monotonic', lambda: clock[0])
+    monkeypatch.setattr(reclassify.time, 'sleep', sleep)
+    limiter = reclassify.RateLimiter(per_minute=60)
+    for _ in range(62):
+        limiter.acquire()
+    # The first minute's budget is available at once, then one per second
+    assert sleeps == [pytest.approx(1.0), pytest.approx(1.0)]
@@ -0,0 +1,123 @@
+import httpx
+import openai as openai_sdk
+import pytest
+
+import resilience
+from ai_utils import classify_report
+from resilience import CircuitBreaker, CircuitOpenError, call_with_resilience
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(resilience.time, 'sleep', lambda seconds: None)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def timeout_error():
+    return openai_sdk.APITimeoutError(request=httpx.Request('POST', 'https://api.openai.com/v1/chat/completions'))
+
+
+def failing(error):
+    calls = []
+
+    def fn(timeout):
+        calls.append(timeout)
+        raise error
+    fn.calls = calls
+    return fn
+
+
+def opened_breaker(clock):
+    breaker = CircuitBreaker('test', failure_threshold=2, reset_seconds=30)
+    with pytest.raises(CircuitOpenError):
+        # The second failed attempt opens the breaker, which stops the third
+        call_with_resilience(failing(timeout_error()), breaker=breaker)
+    assert breaker.state == breaker.OPEN
+    return breaker
+
+
+def test_retryable_errors_are_retried_up_to_max_attempts():
+    fn = failing(timeout_error())
+    breaker = CircuitBreaker('test', failure_threshold=10)
+    with pytest.raises(openai_sdk.APITimeoutError):
+        call_with_resilience(fn, breaker=breaker)
+    assert len(fn.calls) == resilience.MAX_ATTEMPTS
+    assert all(timeout <= resilience.ATTEMPT_TIMEOUT for timeout in fn.calls)
+    assert breaker.consecutive_failures == resilience.MAX_ATTEMPTS
+
+
+def test_non_retryable_errors_fail_at_once(api_error):
+    fn = failing(api_error(400))
+    with pytest.raises(openai_sdk.APIStatusError):
+        call_with_resilience(fn, breaker=CircuitBreaker('test'))
+    assert len(fn.calls) == 1
+
+
+def test_open_breaker_short_circuits(clock):
+    breaker = opened_breaker(clock)
+    short_circuited = breaker.counts['short_circuited']
+    fn = failing(timeout_error())
+    with pytest.raises(CircuitOpenError):
+        call_with_resilience(fn, breaker=breaker)
+    assert fn.calls == []
+    assert breaker.counts['short_circuited'] == short_circuited + 1
+
+
+def test_successful_probe_closes_the_breaker(clock):
+    breaker = opened_breaker(clock)
+    clock[0] += 30
+    assert call_with_resilience(lambda timeout: 'ok', breaker=breaker) == 'ok'
+    assert breaker.state == breaker.CLOSED
+
+
+def test_failed_probe_reopens_the_breaker(clock, monkeypatch):
+    breaker = opened_breaker(clock)
+    clock[0] += 30
+    monkeypatch.setattr(resilience, 'MAX_ATTEMPTS', 1)
+    with pytest.raises(openai_sdk.APITimeoutError):
+        call_with_resilience(failing(timeout_error()), breaker=breaker)
+    assert breaker.state == breaker.OPEN
+
+
+def test_only_one_probe_at_a_time(clock):
+    breaker = opened_breaker(clock)
+    clock[0] += 30
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_non_retryable_probe_is_neutral(clock, api_error):
+    """Regression: a 400 during the half-open probe closed the breaker as if the upstream had recovered."""
+    breaker = opened_breaker(clock)
+    clock[0] += 30
+    with pytest.raises(openai_sdk.APIStatusError):
+        call_with_resilience(failing(api_error(400)), breaker=breaker)
+
+    assert breaker.state == breaker.HALF_OPEN
+    assert breaker.counts['successes'] == 0
+    # The probe slot was released: the next call may probe
+    assert call_with_resilience(lambda timeout: 'ok', breaker=breaker) == 'ok'
+    assert breaker.state == breaker.CLOSED
+
+
+def test_non_retryable_errors_do_not_reset_the_failure_count(api_error):
+    breaker = CircuitBreaker('test', failure_threshold=5)
+    breaker.record_failure()
+    with pytest.raises(openai_sdk.APIStatusError):
+        call_with_resilience(failing(api_error(400)), breaker=breaker)
+    assert breaker.consecutive_failures == 1
+
+
+def test_open_breaker_gives_the_fallback_without_calling_openai(openai, clock):
+    for _ in range(resilience.openai_breaker.failure_threshold):
+        resilience.openai_breaker.record_failure()
+    type_result, severity_result = classify_report('Flood water in the streets')
+    assert openai.calls == 0
+    assert type_result['explanation'].startswith('Classification failed')
@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy import text
+
+from config import db
+from response_cache import ResponseCache, response_cache
+
+
+@pytest.fixture
+def report(make_report):
+    return make_report()
+
+
+def test_repeated_reads_are_served_from_the_cache(client, report):
+    first = client.get('/reports').get_json()
+    hits = response_cache.hits
+    assert client.get('/reports').get_json() == first
+    assert response_cache.hits == hits + 1
+
+
+def test_new_report_invalidates_the_lists(client, report):
+    assert len(client.get('/reports').get_json()) == 1
+    response = client.post('/reports', data={'description': 'Flood water in the streets', 'location': 'Kisumu'})
+    assert response.status_code == 201
+    assert len(client.get('/reports').get_json()) == 2
+
+
+def test_donation_invalidates_the_report_and_its_donations(client, report):
+    assert client.get(f'/reports/{report.id}').get_json()['donations'] == []
+    assert client.get(f'/reports/{report.id}/donations').get_json() == []
+
+    response = client.post(f'/reports/{report.id}/donations', json={
+        'full_name': 'Jordan Doe', 'email': 'jordan@example.com', 'phone': '0700', 'type': 'Money', 'amount': '10',
+    })
+    assert response.status_code == 201
+    assert len(client.get(f'/reports/{report.id}').get_json()['donations']) == 1
+    assert len(client.get(f'/reports/{report.id}/donations').get_json()) == 1
+
+
+def test_write_from_another_worker_makes_entries_stale(client, report):
+    client.get(f'/reports/{report.id}')
+    # Another worker's write never reaches this process's cache, only the table versions
+    db.session.execute(text("UPDATE reports SET location = 'Nairobi' WHERE id = :id"), {'id': report.id})
+    db.session.execute(text("UPDATE table_versions SET version = version + 1 WHERE table_name = 'reports'"))
+    db.session.commit()
+    assert client.get(f'/reports/{report.id}').get_json()['location'] == 'Nairobi'
+
+
+def test_error_responses_are_not_cached(client):
+    client.get('/reports/999')
+    assert response_cache.stats()['entries'] == 0
+
+
+def test_lru_evicts_the_oldest_entry():
+    cache = ResponseCache(max_entries=2, ttl=60)
+    for key in ('a', 'b', 'c'):
+        cache.set(key, {}, ('tag',), b'{}', 'application/json')
+    assert cache.get('a', {}) is None
+    assert cache.get('c', {}) == (b'{}', 'application/json')
+
+
+def test_invalidate_drops_only_tagged_entries():
+    cache = ResponseCache()
+    cache.set('list', {}, ('reports:list',), b'[]', 'application/json')
+    cache.set('one', {}, ('report:1',), b'{}', 'application/json')
+    cache.invalidate('report:1')
+    assert cache.get('one', {}) is None
+    assert cache.get('list', {}) is not None
+
+
+def test_expired_entries_are_misses():
+    cache = ResponseCache(ttl=-1)
+    cache.set('a', {}, (), b'{}', 'application/json')
+    assert cache.get('a', {}) is None
@@ -0,0 +1,202 @@
+import io
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+import image_pipeline
+from app import app
+from config import db
+from models import ImageUpload, ImageUploadJob, Report
+from resumable_uploads import SESSION_TTL, blob_in_use, expire_unused_uploads, expire_uploads, staging_path
+
+
+@pytest.fixture
+def data(image_bytes):
+    return image_bytes('PNG', (300, 200))
+
+
+def create(client, size):
+    response = client.post('/image-uploads', json={'size': size, 'filename': 'photo.png'})
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+def put(client, upload_id, offset, chunk):
+    return client.put(f'/image-uploads/{upload_id}', data=chunk, headers={'Upload-Offset': str(offset)})
+
+
+def upload(client, data):
+    upload_id = create(client, len(data))
+    assert put(client, upload_id, 0, data).status_code == 200
+    response = client.post(f'/image-uploads/{upload_id}/complete')
+    assert response.status_code == 200
+    return upload_id
+
+
+def submit(client, upload_id=None, **fields):
+    form = {'description': 'River flood in the valley', 'location': 'Kisumu', **fields}
+    if upload_id:
+        form['upload_id'] = upload_id
+    response = client.post('/reports', data=form, content_type='multipart/form-data')
+    assert response.status_code == 201, response.get_json()
+    return db.session.get(Report, response.get_json()['id'])
+
+
+def age(upload_id, by=SESSION_TTL + timedelta(minutes=1)):
+    db.session.get(ImageUpload, upload_id).updated_at = datetime.now(timezone.utc) - by
+    db.session.commit()
+
+
+def stored_file(upload_id):
+    return os.path.join(app.config['UPLOAD_FOLDER'], db.session.get(ImageUpload, upload_id).stored_path)
+
+
+def test_chunks_resume_from_the_reported_offset(client, app_context, data):
+    upload_id = create(client, len(data))
+
+    assert put(client, upload_id, 0, data[:100]).headers['Upload-Offset'] == '100'
+    # A retried chunk at a stale offset is refused with the offset to resume from
+    stale = put(client, upload_id, 0, data[:100])
+    assert stale.status_code == 409
+    assert stale.get_json()['offset'] == 100
+    assert client.get(f'/image-uploads/{upload_id}').get_json()['offset'] == 100
+
+    assert put(client, upload_id, 100, data[100:]).status_code == 200
+    body = client.post(f'/image-uploads/{upload_id}/complete').get_json()
+
+    assert body['status'] == 'complete'
+    with open(stored_file(upload_id), 'rb') as f:
+        assert f.read() == data
+    assert not os.path.exists(staging_path(upload_id))
+
+
+def test_incomplete_uploads_cannot_be_completed_or_used(client, app_context, data):
+    upload_id = create(client, len(data))
+    put(client, upload_id, 0, data[:100])
+
+    assert client.post(f'/image-uploads/{upload_id}/complete').status_code == 409
+    response = client.post('/reports', data={'description': 'x', 'location': 'y', 'upload_id': upload_id})
+    assert response.status_code == 409
+
+
+@pytest.mark.parametrize('body, status', [({}, 400), ({'size': 0}, 400), ({'size': 10 ** 9}, 413)])
+def test_invalid_sessions_are_refused(client, body, status):
+    assert client.post('/image-uploads', json=body).status_code == status
+
+
+def test_chunks_past_the_declared_size_are_413(client, app_context, data):
+    upload_id = create(client, 100)
+    assert put(client, upload_id, 0, data[:101]).status_code == 413
+    assert client.get(f'/image-uploads/{upload_id}').get_json()['offset'] == 0
+
+
+def test_non_images_are_refused_on_the_first_chunk(client, app_context):
+    upload_id = create(client, 1000)
+    assert put(client, upload_id, 0, b'%PDF-1.7' + b'\0' * 100).status_code == 415
+
+
+def test_report_uses_the_upload(client, app_context, data):
+    upload_id = upload(client, data)
+    report = submit(client, upload_id)
+
+    assert report.image_upload_id == upload_id
+    assert report.image.endswith(db.session.get(ImageUpload, upload_id).stored_path)
+    assert report.image_status == 'local'
+
+
+def test_abandoned_sessions_are_expired(client, app_context, data):
+    upload_id = create(client, len(data))
+    put(client, upload_id, 0, data[:100])
+    fresh_id = create(client, len(data))
+    age(upload_id)
+
+    assert expire_uploads() == 1
+
+    assert db.session.get(ImageUpload, upload_id) is None
+    assert not os.path.exists(staging_path(upload_id))
+    assert db.session.get(ImageUpload, fresh_id) is not None
+
+
+def test_unused_completed_uploads_are_expired_with_their_file(client, app_context, data):
+    """Regression: completed uploads no report used kept their row and stored file forever."""
+    upload_id = upload(client, data)
+    path = stored_file(upload_id)
+    age(upload_id)
+
+    assert expire_unused_uploads() == 1
+
+    assert ImageUpload.query.filter_by(id=upload_id).first() is None
+    assert not os.path.exists(path)
+
+
+def test_recent_or_used_uploads_are_kept(client, app_context, data, image_bytes):
+    recent_id = upload(client, data)
+    used_id = upload(client, image_bytes('PNG', (50, 50)))
+    submit(client, used_id)
+    age(used_id)
+
+    assert expire_unused_uploads() == 0
+    assert os.path.exists(stored_file(recent_id))
+    assert os.path.exists(stored_file(used_id))
+
+
+def test_shared_files_outlive_an_expired_upload(client, app_context, data):
+    """Identical content is stored once; only the last user may delete it."""
+    expired_id = upload(client, data)
+    path = stored_file(expired_id)
+    # The same bytes as an inline image on a report, and as another pending upload
+    submit(client, description='Another flood report', image=(io.BytesIO(data), 'photo.png'))
+    pending_id = upload(client, data)
+    age(expired_id)
+
+    assert expire_unused_uploads() == 1
+    assert os.path.exists(path)
+
+    Report.query.delete()
+    db.session.commit()
+    age(pending_id)
+    assert expire_unused_uploads() == 1
+    assert not os.path.exists(path)
+    assert not [f for f in os.listdir(os.path.dirname(path)) if f.startswith(os.path.basename(path)[:64])]
+
+
+def test_cloudinary_cleanup_keeps_a_file_an_unused_upload_needs(client, app_context, monkeypatch, data):
+    monkeypatch.setattr(image_pipeline, 'is_cloudinary_configured', lambda: True)
+    monkeypatch.setattr(image_pipeline, 'upload_image_to_cloudinary',
+                        lambda path, folder: {'url': 'https://cdn.example.com/a.png', 'public_id': 'a'})
+    pending_id = upload(client, data)
+
+    submit(client, image=(io.BytesIO(data), 'photo.png'))
+
+    assert ImageUploadJob.query.one().status == 'done'
+    assert os.path.exists(stored_file(pending_id))
+
+
+def test_reports_are_found_by_their_stored_path(client, app_context, data):
+    """Regression: the lookup was a leading-wildcard LIKE on Report.image, a full table scan."""
+    report = submit(client, image=(io.BytesIO(data), 'photo.png'))
+    relative = report.image.rsplit('/uploads/', 1)[1]
+    assert report.image_path == relative
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM reports' in statement:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        assert blob_in_use(relative)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+
+    (statement, parameters), = statements
+    with db.engine.connect() as conn:
+        plan = ' '.join(row[-1] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters))
+    assert 'ix_reports_image_path' in plan, plan
+
+    report.image = 'https://example.com/elsewhere.jpg'
+    db.session.commit()
+    assert report.image_path is None
+    assert not blob_in_use(relative)
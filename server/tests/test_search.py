@@ -0,0 +1,70 @@
+import pytest
+
+from config import db
+
+
+def search(client, query):
+    response = client.get(f'/reports/search?{query}')
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_matches_type_location_and_description(client, make_report):
+    report = make_report(description='Smoke over the hills', location='Eldoret', type='Wildfire')
+    make_report(description='Market flooded', location='Kisumu')
+    for q in ('smoke', 'eldoret', 'wildfire'):
+        assert [r['id'] for r in search(client, f'q={q}')['reports']] == [report.id]
+
+
+def test_words_are_stemmed(client, make_report):
+    """Regression: SQLite matched exact tokens only, unlike Postgres' english config."""
+    report = make_report(description='The river is flooding the lower town')
+    assert [r['id'] for r in search(client, 'q=flood')['reports']] == [report.id]
+    assert [r['id'] for r in search(client, 'q=floods')['reports']] == [report.id]
+
+
+def test_every_word_must_match(client, make_report):
+    both = make_report(description='Flood water near the school')
+    make_report(description='Flood water near the market')
+    assert [r['id'] for r in search(client, 'q=flood school')['reports']] == [both.id]
+
+
+def test_better_matches_rank_first(client, make_report):
+    weak = make_report(description='Some flood damage reported', type='Other')
+    strong = make_report(description='Flood flood flood, houses under water', type='Flood')
+    assert [r['id'] for r in search(client, 'q=flood')['reports']] == [strong.id, weak.id]
+
+
+def test_cursor_pages_through_all_matches(client, make_report):
+    made = {make_report(description=f'flood number {i}').id for i in range(5)}
+    seen, cursor = [], None
+    while True:
+        body = search(client, 'q=flood&limit=2' + (f'&cursor={cursor}' if cursor else ''))
+        seen += [r['id'] for r in body['reports']]
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+    assert sorted(seen) == sorted(made)
+
+
+def test_index_follows_updates_and_deletes(client, make_report):
+    report = make_report(description='Landslide blocked the road')
+    report.description = 'Earthquake cracked the road'
+    db.session.commit()
+    assert search(client, 'q=landslide')['reports'] == []
+    assert len(search(client, 'q=earthquake')['reports']) == 1
+
+    db.session.delete(report)
+    db.session.commit()
+    assert search(client, 'q=earthquake')['reports'] == []
+
+
+def test_operators_in_the_query_are_plain_words(client, make_report):
+    make_report(description='Flood near the school')
+    assert len(search(client, 'q=flood OR "school* NEAR(')['reports']) == 0
+    assert len(search(client, 'q=school*')['reports']) == 1
+
+
+@pytest.mark.parametrize('query', ['', 'q=', 'q=' + 'x' * 201, 'q=flood&cursor=bogus'])
+def test_invalid_searches_are_400(client, query):
+    assert client.get(f'/reports/search?{query}').status_code == 400
@@ -0,0 +1,26 @@
+import pytest
+
+from models import compile_serializer, Report
+
+
+@pytest.fixture
+def report(make_user, make_report, make_donation):
+    report = make_report(user_id=make_user().id, image_variants={'webp': {'480w': '/uploads/a.webp'}})
+    make_donation(report)
+    return report
+
+
+def test_fast_dict_matches_to_dict(report):
+    assert report.to_fast_dict() == report.to_dict()
+    assert report.user.to_fast_dict() == report.user.to_dict()
+    donation = report.donations[0]
+    assert donation.to_fast_dict() == donation.to_dict()
+
+
+def test_fast_dict_only_matches_to_dict_only(report):
+    only = ('id', 'date', 'severity', 'user')
+    assert report.to_fast_dict(only=only) == report.to_dict(only=only)
+
+
+def test_serializers_are_compiled_once_per_field_set(report):
+    assert compile_serializer(Report, ('id',)) is compile_serializer(Report, ('id',))
@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy import event
+
+from config import db
+from models import StatCounter
+from stats import compute_counters, read_stats, reconcile_stats
+
+
+@pytest.fixture
+def admin_client(client, login, make_admin):
+    login(admin_id=make_admin().id)
+    return client
+
+
+def stored_counters():
+    return {row.name: row.value for row in StatCounter.query if row.value}
+
+
+def test_counters_follow_orm_writes(make_user, make_report, make_donation):
+    user = make_user()
+    severe = make_report(severity='Severe', type='Fire', user_id=user.id)
+    make_report(severity='Minor')
+    make_donation(severe, amount_number=40)
+    small = make_donation(severe, amount_number=1)
+    assert stored_counters() == compute_counters() == {
+        'users': 1, 'reports': 2, 'donations': 2, 'donation_amount': 41,
+        'severity:Severe': 1, 'severity:Minor': 1, 'type:Fire': 1, 'type:Flood': 1,
+    }
+
+    # Changed after commit, when the old values are no longer loaded
+    severe.severity = 'Moderate'
+    small.amount_number = 2.5
+    db.session.commit()
+    assert stored_counters()['severity:Moderate'] == 1
+    assert 'severity:Severe' not in stored_counters()
+    assert stored_counters()['donation_amount'] == 42.5
+
+    # Deleting the user cascades to the report and its donations
+    db.session.delete(user)
+    db.session.commit()
+    assert stored_counters() == {k: v for k, v in compute_counters().items() if v}
+
+
+def test_admin_stats_payload(admin_client, make_report, make_donation):
+    make_donation(make_report(severity='Severe'), amount_number=10)
+    body = admin_client.get('/admin/stats').get_json()
+    assert body['total_reports'] == 1
+    assert body['severe_reports'] == 1
+    assert body['total_donation_amount'] == 10
+    assert body['reports_by_type'] == {'Flood': 1}
+
+
+def test_read_stats_never_writes(app_context):
+    """Regression: an empty counters table made the admin GET lock, recompute and commit."""
+    StatCounter.query.delete()
+    db.session.commit()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        stats = read_stats()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert stats['total_reports'] == 0
+    assert all(statement.lstrip().upper().startswith('SELECT') for statement in statements)
+    assert StatCounter.query.count() == 0
+
+
+def test_reconcile_repairs_counters_after_bulk_changes(make_report):
+    make_report()
+    StatCounter.query.delete()
+    db.session.commit()
+    assert reconcile_stats() == compute_counters()
+    assert stored_counters()['reports'] == 1
+
+
+def test_stats_require_an_admin(client):
+    assert client.get('/admin/stats').status_code == 401
@@ -0,0 +1,23 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def report(make_report, make_donation):
+    report = make_report()
+    make_donation(report)
+    return report
+
+
+def test_streamed_list_matches_the_plain_list(client, report, make_report):
+    make_report(description='second')
+    streamed = client.get('/reports?stream=1')
+    assert streamed.is_streamed
+    assert json.loads(streamed.get_data()) == client.get('/reports').get_json()
+
+
+def test_streamed_list_applies_fieldsets_and_filters(client, report, make_report):
+    make_report(description='fire', type='Fire')
+    body = json.loads(client.get('/reports?stream=1&type=Fire&fields=description').get_data())
+    assert body == [{'description': 'fire'}]
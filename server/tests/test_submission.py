@@ -0,0 +1,41 @@
+import threading
+
+import pytest
+
+import submission
+
+
+@pytest.fixture
+def slow_classifier(monkeypatch):
+    """classify_report blocks until released, like an OpenAI call that hangs."""
+    release = threading.Event()
+
+    def classify_report(description):
+        release.wait(5)
+        return {'type': 'Flood', 'confidence': 0.9, 'explanation': 'late'}, \
+            {'severity': 'Minor', 'confidence': 0.9, 'explanation': 'late'}
+
+    monkeypatch.setattr(submission, 'classify_report', classify_report)
+    yield release
+    release.set()
+
+
+def test_classification_runs_on_the_pool(openai):
+    type_result, severity_result = submission.classify_with_timeout('Flood water in the streets')
+    assert type_result['type'] == 'Flood'
+    assert openai.calls == 1
+
+
+def test_timeout_returns_the_fallback(monkeypatch, slow_classifier):
+    monkeypatch.setattr(submission, 'CLASSIFY_TIMEOUT', 0.05)
+    type_result, severity_result = submission.classify_with_timeout('Flood water in the streets')
+    assert (type_result['type'], severity_result['severity']) == ('Other', 'Moderate')
+    assert type_result['explanation'] == 'Classification failed: timed out or unavailable'
+
+
+def test_concurrent_submission_route_is_bounded(client, monkeypatch, slow_classifier):
+    monkeypatch.setattr('routes.report_route.CONCURRENT_SUBMISSION', True)
+    monkeypatch.setattr(submission, 'CLASSIFY_TIMEOUT', 0.05)
+    response = client.post('/reports', data={'description': 'Flood water in the streets', 'location': 'Kisumu'})
+    assert response.status_code == 201
+    assert response.get_json()['type'] == 'Other'
@@ -0,0 +1,90 @@
+import pytest
+
+from ai_utils import classify_report
+from resilience import CircuitOpenError, openai_breaker
+from telemetry import Telemetry, estimate_cost, percentile, telemetry
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([0.2], 95) == 0.2
+    assert percentile([], 50) is None
+
+
+def test_dated_models_use_their_family_price():
+    assert estimate_cost(1000, 1000, 'gpt-3.5-turbo-0125') == estimate_cost(1000, 1000, 'gpt-3.5-turbo')
+    assert estimate_cost(2000, 0, 'gpt-3.5-turbo') == pytest.approx(0.001)
+
+
+def test_summary_aggregates_per_classifier():
+    recorder = Telemetry()
+    for ms in range(1, 101):
+        recorder.record('report', ms / 1000, model='gpt-3.5-turbo-0125', prompt_tokens=100, completion_tokens=20)
+    recorder.record('type', 0.5, outcome='error')
+    recorder.record_parse_failure('report')
+
+    summary = recorder.summary()
+
+    assert summary['calls'] == 101
+    assert summary['fallback_rate'] == round(2 / 101, 4)
+    assert summary['latency_ms'] == {'p50': 51.0, 'p95': 96.0, 'p99': 100.0}
+    report = summary['by_classifier']['report']
+    assert report['outcomes'] == {'ok': 99, 'parse_failure': 1, 'error': 0, 'short_circuited': 0}
+    assert report['models'] == {'gpt-3.5-turbo-0125': 100}
+    assert (report['prompt_tokens'], report['completion_tokens']) == (10000, 2000)
+    [cost] = summary['cost_usd_by_day'].values()
+    assert cost == pytest.approx(estimate_cost(10000, 2000, 'gpt-3.5-turbo'), abs=1e-6)
+
+
+def test_empty_summary():
+    assert Telemetry().summary() == {
+        'calls': 0, 'fallback_rate': 0.0,
+        'latency_ms': {'p50': None, 'p95': None, 'p99': None},
+        'cost_usd_by_day': {}, 'by_classifier': {},
+    }
+
+
+def test_classification_calls_are_recorded(openai):
+    classify_report('Massive flood destroyed hundreds of homes')
+
+    report = telemetry.summary()['by_classifier']['report']
+    assert report['outcomes']['ok'] == 1
+    assert (report['prompt_tokens'], report['completion_tokens']) == (50, 30)
+    assert report['latency_ms']['p50'] is not None
+
+
+def test_parse_failures_and_errors_are_recorded(openai, api_error):
+    openai.content = 'not json'
+    classify_report('River flood in the valley')
+    openai.content, openai.error = None, api_error(400)
+    classify_report('River flood in the valley')
+
+    by_classifier = telemetry.summary()['by_classifier']
+    assert by_classifier['report']['outcomes']['parse_failure'] == 1
+    assert by_classifier['type']['outcomes']['parse_failure'] == 1
+    assert by_classifier['report']['outcomes']['error'] == 1
+
+
+def test_short_circuited_calls_are_recorded(openai, monkeypatch):
+    def refuse(*args, **kwargs):
+        raise CircuitOpenError('open')
+    monkeypatch.setattr(openai_breaker, 'before_call', refuse)
+
+    classify_report('River flood in the valley')
+
+    assert telemetry.summary()['by_classifier']['report']['outcomes']['short_circuited'] == 1
+    assert openai.calls == 0
+
+
+def test_ai_status_endpoint(client, login, make_admin, openai):
+    assert client.get('/admin/ai-status').status_code == 401
+
+    login(admin_id=make_admin().id)
+    classify_report('Massive flood destroyed hundreds of homes')
+    body = client.get('/admin/ai-status').get_json()
+
+    assert body['api_calls']['calls'] == 1
+    assert body['breaker']['state'] == 'closed'
+    assert set(body['tiers']) == {'local_model', 'cache'}
@@ -0,0 +1,126 @@
+import io
+import os
+
+import pytest
+
+import upload_ingest
+from app import app
+from config import db
+from models import Report
+from upload_ingest import sniff_image_type
+from upload_storage import TMP_DIR
+
+AVIF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uploads', 'drought.avif')
+
+
+def post(client, image=None, **fields):
+    form = {'description': 'River flood in the valley', 'location': 'Kisumu', **fields}
+    if image is not None:
+        form['image'] = image
+    return client.post('/reports', data=form, content_type='multipart/form-data')
+
+
+def spooled():
+    tmp_dir = os.path.join(app.config['UPLOAD_FOLDER'], TMP_DIR)
+    return os.listdir(tmp_dir) if os.path.isdir(tmp_dir) else []
+
+
+@pytest.mark.parametrize('fmt, ext', [('JPEG', '.jpg'), ('PNG', '.png'), ('GIF', '.gif'), ('WEBP', '.webp')])
+def test_sniffing_common_formats(fmt, ext, image_bytes):
+    assert sniff_image_type(image_bytes(fmt, (4, 4))[:upload_ingest.SNIFF_BYTES]) == ext
+
+
+def test_sniffing_heif_brands():
+    with open(AVIF, 'rb') as f:
+        assert sniff_image_type(f.read(upload_ingest.SNIFF_BYTES)) == '.avif'
+    assert sniff_image_type(b'\x00\x00\x00\x18ftypheic\x00\x00\x00\x00mif1heic') == '.heic'
+    # A generic HEIF major brand is AVIF when AVIF is among the compatible brands
+    assert sniff_image_type(b'\x00\x00\x00\x18ftypmif1\x00\x00\x00\x00mif1avif') == '.avif'
+    assert sniff_image_type(b'\x00\x00\x00\x14ftypisom\x00\x00\x00\x00isom') is None
+    assert sniff_image_type(b'%PDF-1.7') is None
+
+
+def test_image_is_stored_under_its_sniffed_type(client, app_context, image_bytes):
+    # The client's filename and extension are ignored
+    response = post(client, (io.BytesIO(image_bytes('PNG')), 'photo.jpg'))
+    assert response.status_code == 201
+    assert response.get_json()['image'].endswith('.png')
+    assert spooled() == []
+
+
+def test_avif_is_accepted(client, app_context):
+    with open(AVIF, 'rb') as f:
+        response = post(client, (io.BytesIO(f.read()), 'drought.avif'))
+    assert response.status_code == 201
+    assert response.get_json()['image'].endswith('.avif')
+
+
+def test_non_images_are_415(client, app_context):
+    response = post(client, (io.BytesIO(b'#!/bin/sh\necho hello world, this is not an image\n'), 'run.sh'))
+    assert response.status_code == 415
+    assert 'AVIF' in response.get_json()['error']
+    assert Report.query.count() == 0
+    assert spooled() == []
+
+
+def test_tiny_non_images_are_415(client, app_context):
+    assert post(client, (io.BytesIO(b'hi'), 'a.png')).status_code == 415
+
+
+@pytest.mark.parametrize('image', [(io.BytesIO(b''), ''), (io.BytesIO(b''), 'photo.jpg')])
+def test_empty_file_input_means_no_image(client, app_context, image):
+    """Regression: an unselected <input type=file> was rejected with 415."""
+    response = post(client, image)
+
+    assert response.status_code == 201
+    report = db.session.get(Report, response.get_json()['id'])
+    assert report.image is None
+    assert spooled() == []
+
+
+def test_empty_file_input_on_edit_keeps_the_image(client, app_context, login, make_user, make_report):
+    user = make_user()
+    login(user_id=user.id)
+    report = make_report(user_id=user.id, image='https://example.com/photo.jpg')
+
+    response = client.patch(f'/reports/{report.id}', data={
+        'description': 'Flood water receding', 'image': (io.BytesIO(b''), ''),
+    }, content_type='multipart/form-data')
+
+    assert response.status_code == 200
+    assert response.get_json()['image'] == 'https://example.com/photo.jpg'
+
+
+def test_invalid_edit_stores_no_image(client, app_context, login, make_user, make_report, image_bytes):
+    """Regression: the image was stored before the date was validated, leaving an orphan on 400."""
+    user = make_user()
+    login(user_id=user.id)
+    report = make_report(user_id=user.id)
+
+    response = client.patch(f'/reports/{report.id}', data={
+        'date': 'next tuesday', 'image': (io.BytesIO(image_bytes('PNG')), 'photo.png'),
+    }, content_type='multipart/form-data')
+
+    assert response.status_code == 400
+    assert os.listdir(app.config['UPLOAD_FOLDER']) in ([], [TMP_DIR])
+    assert spooled() == []
+
+
+def test_declared_oversized_body_is_413_before_reading(client, app_context):
+    response = client.post(
+        '/reports', data=b'x' * 10, content_type='multipart/form-data; boundary=x',
+        environ_overrides={'CONTENT_LENGTH': str(app.config['MAX_CONTENT_LENGTH'] + 1)},
+    )
+    assert response.status_code == 413
+    assert 'error' in response.get_json()
+
+
+def test_image_is_cut_off_while_streaming(client, app_context, monkeypatch, image_bytes):
+    monkeypatch.setattr(upload_ingest, 'MAX_IMAGE_BYTES', 64 * 1024)
+    data = image_bytes('PNG')[:16] + os.urandom(200 * 1024)
+
+    response = post(client, (io.BytesIO(data), 'big.png'))
+
+    assert response.status_code == 413
+    assert Report.query.count() == 0
+    assert spooled() == []
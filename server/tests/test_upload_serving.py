@@ -0,0 +1,92 @@
+import hashlib
+import os
+
+import pytest
+
+import upload_serving
+from app import app
+from upload_serving import ACCEL_PREFIX, IMMUTABLE_MAX_AGE
+from upload_storage import content_path
+
+DATA = bytes(range(256)) * 40
+DIGEST = hashlib.sha256(DATA).hexdigest()
+STORED = content_path(DIGEST, '.png')
+
+
+@pytest.fixture
+def files():
+    folder = app.config['UPLOAD_FOLDER']
+    os.makedirs(os.path.join(folder, os.path.dirname(STORED)))
+    for relative in (STORED, 'IMG_0001.jpg'):
+        with open(os.path.join(folder, relative), 'wb') as f:
+            f.write(DATA)
+
+
+@pytest.fixture
+def mode(monkeypatch):
+    def mode(name):
+        monkeypatch.setattr(upload_serving, 'SERVING_MODE', name)
+    return mode
+
+
+def test_content_addressed_files_are_immutable(client, files):
+    response = client.get(f'/uploads/{STORED}')
+
+    assert response.status_code == 200
+    assert response.data == DATA
+    assert response.headers['ETag'] == f'"{DIGEST}"'
+    cache_control = response.cache_control
+    assert (cache_control.public, cache_control.immutable, cache_control.max_age) == (True, True, IMMUTABLE_MAX_AGE)
+    assert response.mimetype == 'image/png'
+
+
+def test_legacy_files_must_be_revalidated(client, files):
+    response = client.get('/uploads/IMG_0001.jpg')
+    assert response.cache_control.no_cache
+    assert not response.cache_control.immutable
+    assert response.headers['ETag'] != f'"{DIGEST}"'
+
+
+@pytest.mark.parametrize('name', ['flask', 'x-accel-redirect', 'x-sendfile'])
+def test_conditional_requests_get_304(client, files, mode, name):
+    mode(name)
+    etag = client.get(f'/uploads/{STORED}').headers['ETag']
+
+    response = client.get(f'/uploads/{STORED}', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.data == b''
+    assert 'X-Accel-Redirect' not in response.headers
+    assert 'X-Sendfile' not in response.headers
+
+
+def test_ranges_are_served_by_flask(client, files):
+    response = client.get(f'/uploads/{STORED}', headers={'Range': 'bytes=100-199'})
+    assert response.status_code == 206
+    assert response.data == DATA[100:200]
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(DATA)}'
+
+
+def test_x_accel_redirect_sends_headers_only(client, files, mode):
+    mode('x-accel-redirect')
+    response = client.get(f'/uploads/{STORED}', headers={'Range': 'bytes=0-9'})
+
+    # nginx serves the range from the internal location
+    assert response.status_code == 200
+    assert response.data == b''
+    assert response.headers['X-Accel-Redirect'] == ACCEL_PREFIX + STORED
+    assert response.headers['ETag'] == f'"{DIGEST}"'
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert response.mimetype == 'image/png'
+
+
+def test_x_sendfile_names_the_absolute_path(client, files, mode):
+    mode('x-sendfile')
+    response = client.get('/uploads/IMG_0001.jpg')
+    assert response.data == b''
+    assert response.headers['X-Sendfile'] == os.path.abspath(os.path.join(app.config['UPLOAD_FOLDER'], 'IMG_0001.jpg'))
+
+
+@pytest.mark.parametrize('path', ['missing.png', '../test.db', 'ab'])
+def test_missing_or_escaping_paths_are_404(client, files, path):
+    assert client.get(f'/uploads/{path}').status_code == 404
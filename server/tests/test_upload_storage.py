@@ -0,0 +1,86 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from app import app
+from upload_storage import (
+    TMP_DIR, content_path, is_content_addressed, public_url, relative_path_from_url, store_file, store_stream,
+)
+
+DATA = b'\x89PNG\r\n\x1a\n' + b'pixels' * 50000
+DIGEST = hashlib.sha256(DATA).hexdigest()
+
+
+class BrokenStream(io.BytesIO):
+    def read(self, size=-1):
+        if self.tell() > 0:
+            raise IOError('connection reset')
+        return super().read(size)
+
+
+def leftovers(folder):
+    return os.listdir(os.path.join(folder, TMP_DIR))
+
+
+def test_files_are_stored_under_their_sharded_hash(tmp_path):
+    relative, path, created = store_stream(io.BytesIO(DATA), '.png', upload_folder=str(tmp_path))
+
+    assert relative == f'{DIGEST[:2]}/{DIGEST[2:4]}/{DIGEST}.png' == content_path(DIGEST, '.png')
+    assert created
+    with open(path, 'rb') as f:
+        assert f.read() == DATA
+    assert leftovers(tmp_path) == []
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    first = store_stream(io.BytesIO(DATA), '.png', upload_folder=str(tmp_path))
+    second = store_stream(io.BytesIO(DATA), '.png', upload_folder=str(tmp_path))
+
+    assert second == (first[0], first[1], False)
+    assert leftovers(tmp_path) == []
+
+
+def test_same_name_different_content_do_not_collide(tmp_path):
+    first, _, _ = store_stream(io.BytesIO(b'one'), '.jpg', upload_folder=str(tmp_path))
+    second, _, _ = store_stream(io.BytesIO(b'two'), '.jpg', upload_folder=str(tmp_path))
+    assert first != second
+
+
+def test_failed_stream_leaves_nothing_behind(tmp_path):
+    with pytest.raises(IOError):
+        store_stream(BrokenStream(DATA), '.png', upload_folder=str(tmp_path))
+    assert leftovers(tmp_path) == []
+    assert sorted(os.listdir(tmp_path)) == [TMP_DIR]
+
+
+def test_store_file_moves_an_assembled_file(tmp_path):
+    assembled = tmp_path / 'assembled'
+    assembled.write_bytes(DATA)
+
+    relative, path, created = store_file(str(assembled), '.png', upload_folder=str(tmp_path))
+
+    assert (relative, created) == (content_path(DIGEST, '.png'), True)
+    assert not assembled.exists()
+    assert os.path.exists(path)
+
+
+@pytest.mark.parametrize('relative, expected', [
+    (content_path(DIGEST, '.png'), True),
+    (content_path(DIGEST), True),
+    (content_path(DIGEST) + '-480.webp', True),
+    ('IMG_0001.jpg', False),
+    ('ab/cd/not-a-hash.png', False),
+])
+def test_is_content_addressed(relative, expected):
+    assert is_content_addressed(relative) is expected
+
+
+def test_urls_round_trip(monkeypatch):
+    monkeypatch.delenv('BACKEND_URL', raising=False)
+    with app.test_request_context(base_url='http://localhost:5000'):
+        url = public_url(content_path(DIGEST, '.png'))
+    assert url == f'http://localhost:5000/uploads/{content_path(DIGEST, ".png")}'
+    assert relative_path_from_url(url) == content_path(DIGEST, '.png')
+    assert relative_path_from_url('https://res.cloudinary.com/demo/abc.jpg') is None
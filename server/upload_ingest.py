@@ -0,0 +1,184 @@
+"""
+Streaming, size-bounded ingestion of uploaded images.
+
+By default Werkzeug buffers each uploaded file (in memory up to 500KB, then
+in an anonymous temp file) and only then hands the request to the view. Here
+IngestRequest streams every file part straight into a SpoolFile instead:
+
+- the part is written in parser-sized chunks to UPLOAD_FOLDER/tmp, hashed as
+  it goes, so the stored copy is later a rename (upload_storage.store_spooled)
+  rather than a second read and write;
+- its first bytes are sniffed, and anything that isn't a JPEG, PNG, GIF, WebP,
+  HEIC or AVIF image is rejected (415) before the rest is read;
+- it is cut off with 413 as soon as it passes MAX_IMAGE_BYTES.
+
+A form whose file input was left empty still sends the part, with no
+filename and no bytes. Such parts are not sniffed, and uploaded_image()
+treats them as no image at all.
+
+reject_oversized runs before any view code and refuses a request whose
+Content-Length already exceeds MAX_CONTENT_LENGTH without reading the body;
+bodies without a length are capped by Werkzeug while streaming. Spool files
+that are not stored by the end of the request are deleted.
+"""
+import os
+import hashlib
+import tempfile
+
+from flask import Request, current_app, request
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+from upload_storage import TMP_DIR
+
+MAX_IMAGE_BYTES = int(float(os.environ.get('MAX_IMAGE_MB', 10)) * 1024 * 1024)
+# Room for the text fields sent alongside one image
+MAX_CONTENT_LENGTH = MAX_IMAGE_BYTES + 256 * 1024
+# Non-file form fields are kept in memory; descriptions are short
+MAX_FORM_MEMORY_SIZE = 256 * 1024
+# Enough for an ISO-BMFF ftyp box with a few compatible brands
+SNIFF_BYTES = 32
+
+ACCEPTED_TYPES = "JPEG, PNG, GIF, WebP, HEIC or AVIF"
+HEIF_BRANDS = {b'heic', b'heix', b'mif1', b'msf1'}
+AVIF_BRANDS = {b'avif', b'avis'}
+
+
+def sniff_image_type(head):
+    """
+    Identify an image from its first bytes.
+
+    Returns:
+        str: file extension such as '.jpg', or None if not an accepted image
+    """
+    if head.startswith(b'\xff\xd8\xff'):
+        return '.jpg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return '.png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return '.gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return '.webp'
+    if head[4:8] == b'ftyp':
+        # Major brand, then the compatible brands (skipping the minor version)
+        box_end = min(len(head), int.from_bytes(head[:4], 'big'))
+        brands = [head[8:12]] + [head[i:i + 4] for i in range(16, box_end - 3, 4)]
+        if brands[0] in AVIF_BRANDS or (brands[0] in HEIF_BRANDS and AVIF_BRANDS.intersection(brands)):
+            return '.avif'
+        if brands[0] in HEIF_BRANDS:
+            return '.heic'
+    return None
+
+
+def accepted_image_type(head):
+    """
+    Like sniff_image_type, but refuses anything that isn't an accepted image.
+
+    Returns:
+        str: file extension such as '.jpg'
+
+    Raises:
+        UnsupportedMediaType: (415) for other content
+    """
+    extension = sniff_image_type(head)
+    if extension is None:
+        _reject(UnsupportedMediaType, f"Only {ACCEPTED_TYPES} images are accepted")
+    return extension
+
+
+def _reject(error_class, message):
+    error = error_class(message)
+    # Flask-RESTful renders `data` as the body, matching the routes' {"error": ...} responses
+    error.data = {"error": message}
+    raise error
+
+
+class SpoolFile:
+    """
+    Writable/readable file for one uploaded part that validates and hashes
+    while Werkzeug's multipart parser writes into it.
+    """
+
+    def __init__(self, upload_folder, filename=None):
+        # An empty file input sends a part without a filename; don't sniff it
+        self.check_type = bool(filename)
+        tmp_dir = os.path.join(upload_folder, TMP_DIR)
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=tmp_dir)
+        self.file = os.fdopen(fd, 'w+b')
+        self.size = 0
+        self.extension = None
+        self.stored = False
+        self._digest = hashlib.sha256()
+        self._head = b''
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > MAX_IMAGE_BYTES:
+            self.close()
+            _reject(RequestEntityTooLarge, f"Image is larger than {MAX_IMAGE_BYTES // (1024 * 1024)} MB")
+        if self.check_type and self.extension is None and len(self._head) < SNIFF_BYTES:
+            self._head += data[:SNIFF_BYTES - len(self._head)]
+            if len(self._head) == SNIFF_BYTES:
+                self._sniff()
+        self._digest.update(data)
+        return self.file.write(data)
+
+    def _sniff(self):
+        try:
+            self.extension = accepted_image_type(self._head)
+        except UnsupportedMediaType:
+            self.close()
+            raise
+
+    def seek(self, offset, whence=0):
+        # The parser seeks back to the start once the part is complete
+        if self.check_type and self.extension is None and self.size:
+            self._sniff()
+        return self.file.seek(offset, whence)
+
+    def hexdigest(self):
+        return self._digest.hexdigest()
+
+    def close(self):
+        self.file.close()
+        if not self.stored:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def __getattr__(self, name):
+        # read, readline, tell, flush, fileno, ... come from the underlying file
+        return getattr(self.file, name)
+
+    def __iter__(self):
+        return iter(self.file)
+
+
+class IngestRequest(Request):
+    """Request class that streams uploaded files into validated spool files."""
+
+    max_form_memory_size = MAX_FORM_MEMORY_SIZE
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return SpoolFile(current_app.config["UPLOAD_FOLDER"], filename)
+
+
+def uploaded_image(name="image"):
+    """
+    The image sent in the `name` file field of the current request.
+
+    Returns:
+        FileStorage, or None if the field is missing or the file input was left empty
+    """
+    image = request.files.get(name)
+    if not image or getattr(image.stream, "size", None) == 0:
+        return None
+    return image
+
+
+def reject_oversized():
+    """before_request hook: refuse a declared oversized body before reading any of it."""
+    limit = current_app.config.get("MAX_CONTENT_LENGTH")
+    if limit and request.content_length and request.content_length > limit:
+        _reject(RequestEntityTooLarge, f"Upload is larger than {limit // (1024 * 1024)} MB")
@@ -0,0 +1,112 @@
+"""
+Serving /uploads efficiently.
+
+Every response carries a strong ETag and Cache-Control, and conditional
+(If-None-Match / If-Modified-Since) requests are answered with 304 without
+touching the file body. UPLOAD_SERVING chooses who transfers the bytes:
+
+- flask (default):    the app streams the file itself, with Range support.
+                      Fine for development, but a gunicorn sync worker is
+                      held for the whole download.
+- x-accel-redirect:   the app returns only headers plus
+                      X-Accel-Redirect: UPLOAD_ACCEL_PREFIX/<path>, and nginx
+                      sends the file (and handles Range) from an internal
+                      location, e.g.
+
+                          location /_protected_uploads/ {
+                              internal;
+                              alias /app/server/uploads/;
+                              etag off;
+                              add_header ETag $upstream_http_etag;
+                          }
+
+- x-sendfile:         the same with X-Sendfile: <absolute path>, for Apache
+                      mod_xsendfile or lighttpd.
+
+Content-addressed files (see upload_storage.py) are cached as immutable for a
+year and use their SHA-256 as the ETag; legacy flat filenames must be
+revalidated and get an ETag from their mtime and size.
+"""
+import os
+import mimetypes
+from urllib.parse import quote
+
+from flask import current_app, request, send_file, abort
+from werkzeug.security import safe_join
+
+from upload_storage import is_content_addressed
+
+MODES = ('flask', 'x-accel-redirect', 'x-sendfile')
+SERVING_MODE = os.environ.get('UPLOAD_SERVING', 'flask').lower()
+ACCEL_PREFIX = '/' + os.environ.get('UPLOAD_ACCEL_PREFIX', '/_protected_uploads/').strip('/') + '/'
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+if SERVING_MODE not in MODES:
+    print(f"⚠️  Unknown UPLOAD_SERVING '{SERVING_MODE}' - serving uploads from Flask")
+    SERVING_MODE = 'flask'
+
+
+def upload_etag(filename, stat):
+    """
+    Strong ETag for a stored file.
+
+    Content-addressed names already contain the SHA-256 of their bytes; other
+    files are never rewritten in place, so mtime and size identify a version.
+    """
+    if is_content_addressed(filename):
+        return os.path.splitext(os.path.basename(filename))[0]
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def _apply_cache_policy(response, immutable):
+    if immutable:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def serve_upload(filename, mode=None):
+    """
+    Build the response for /uploads/<filename>.
+
+    Args:
+        filename (str): Path relative to UPLOAD_FOLDER
+        mode (str): One of MODES; defaults to UPLOAD_SERVING
+
+    Returns:
+        Response: 200/206 with the file (flask mode), 200 with an offload
+        header for the proxy, or 304 Not Modified
+    """
+    mode = mode or SERVING_MODE
+    path = safe_join(current_app.config['UPLOAD_FOLDER'], filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    stat = os.stat(path)
+    etag = upload_etag(filename, stat)
+    immutable = is_content_addressed(filename)
+
+    if mode == 'flask':
+        # send_file evaluates If-None-Match/If-Modified-Since and Range itself
+        response = send_file(path, etag=etag, last_modified=stat.st_mtime, conditional=True)
+        return _apply_cache_policy(response, immutable)
+
+    # Headers only: the proxy sends the body and serves byte ranges from the file
+    response = current_app.response_class(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+    response.set_etag(etag)
+    response.last_modified = stat.st_mtime
+    response.headers['Accept-Ranges'] = 'bytes'
+    _apply_cache_policy(response, immutable)
+
+    response = response.make_conditional(request.environ, accept_ranges=False)
+    if response.status_code == 304:
+        return response
+    if mode == 'x-accel-redirect':
+        response.headers['X-Accel-Redirect'] = ACCEL_PREFIX + quote(filename)
+    else:
+        response.headers['X-Sendfile'] = os.path.abspath(path)
+    return response
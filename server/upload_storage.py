@@ -0,0 +1,128 @@
+"""
+Content-addressed storage for uploaded files in UPLOAD_FOLDER.
+
+Files are stored as <aa>/<bb>/<sha256><ext>, where aa and bb are the first
+two byte pairs of the hash, so no directory grows past a few thousand
+entries. An upload is streamed into a temporary file while it is hashed and
+then renamed into place atomically; if the same content is already stored,
+the temporary copy is discarded instead. Stored files never change, which
+lets /uploads serve them as immutable.
+"""
+import os
+import re
+import hashlib
+import tempfile
+
+from flask import current_app, request
+
+CHUNK_SIZE = 64 * 1024
+TMP_DIR = 'tmp'
+# Stored files and their resized derivatives (<sha256>-<width>.<ext>, see image_derivatives.py)
+CONTENT_PATH = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(-\d+)?(\.[a-z0-9]{1,5})?$')
+
+
+def content_path(digest, ext=''):
+    """Relative path for content with the given SHA-256 hex digest."""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+def is_content_addressed(relative_path):
+    """True for paths whose content can never change (stored files and their derivatives)."""
+    return bool(CONTENT_PATH.match(relative_path))
+
+
+def store_stream(stream, ext='', upload_folder=None):
+    """
+    Stream a file into content-addressed storage.
+
+    Args:
+        stream: A readable binary file object
+        ext (str): Extension for the stored file, from its sniffed type (never
+            the client's filename, or the same bytes would be stored once per
+            spelling of the extension)
+
+    Returns:
+        tuple: (relative path, absolute path, created) where created is False
+        if identical content was already stored
+    """
+    upload_folder = upload_folder or current_app.config["UPLOAD_FOLDER"]
+    tmp_dir = os.path.join(upload_folder, TMP_DIR)
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                tmp.write(chunk)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        return _commit(tmp_path, digest.hexdigest(), ext, upload_folder)
+    except BaseException:
+        _discard(tmp_path)
+        raise
+
+
+def store_spooled(spool, upload_folder=None):
+    """
+    Store an upload_ingest.SpoolFile, which was hashed while it was received,
+    by renaming it into place.
+
+    Returns:
+        tuple: (relative path, absolute path, created), as for store_stream
+    """
+    upload_folder = upload_folder or current_app.config["UPLOAD_FOLDER"]
+    spool.flush()
+    os.fsync(spool.fileno())
+    spool.stored = True
+    return _commit(spool.path, spool.hexdigest(), spool.extension, upload_folder)
+
+
+def store_file(path, ext='', upload_folder=None):
+    """
+    Move an already written file (e.g. an assembled resumable upload) into
+    content-addressed storage.
+
+    Returns:
+        tuple: (relative path, absolute path, created), as for store_stream
+    """
+    upload_folder = upload_folder or current_app.config["UPLOAD_FOLDER"]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return _commit(path, digest.hexdigest(), ext, upload_folder)
+
+
+def _commit(tmp_path, digest, ext, upload_folder):
+    """Move a fully written temporary file to its content address (or drop it as a duplicate)."""
+    relative = content_path(digest, ext)
+    final_path = os.path.join(upload_folder, relative)
+    if os.path.exists(final_path):
+        _discard(tmp_path)
+        return relative, final_path, False
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    # Atomic on POSIX: readers see either no file or the complete file
+    os.replace(tmp_path, final_path)
+    return relative, final_path, True
+
+
+def _discard(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def public_url(relative_path):
+    """URL under which /uploads serves a stored file."""
+    base_url = os.environ.get('BACKEND_URL', request.url_root.rstrip('/'))
+    return f"{base_url}/uploads/{relative_path}"
+
+
+def relative_path_from_url(url):
+    """The stored path for an /uploads URL, or None for other URLs."""
+    if not url or '/uploads/' not in url:
+        return None
+    return url.rsplit('/uploads/', 1)[1]
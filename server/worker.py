@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Background worker for asynchronous report classification and image uploads.
+
+Polls the classification_jobs and image_upload_jobs tables, classifies
+pending reports, pushes spooled images to Cloudinary and writes the results
+back. It also clears out abandoned resumable uploads. Run one or more
+alongside the web process:
+
+    python worker.py
+"""
+import os
+import time
+
+from config import app, db
+from models import ClassificationJob, ImageUploadJob
+from jobs import claim_jobs, requeue_stale_jobs, run_job
+from image_pipeline import requeue_stale_uploads, run_upload_job
+from resumable_uploads import expire_uploads, expire_unused_uploads
+from local_classifier import LOCAL_CLASSIFIER, local_classifier
+
+POLL_INTERVAL = float(os.environ.get('WORKER_POLL_SECONDS', 1))
+BATCH_SIZE = int(os.environ.get('WORKER_BATCH_SIZE', 10))
+STALE_CHECK_EVERY = 60  # polls between stale-lock sweeps
+
+QUEUES = (
+    (ClassificationJob, run_job, requeue_stale_jobs, 'Classification'),
+    (ImageUploadJob, run_upload_job, requeue_stale_uploads, 'Image upload'),
+)
+
+
+def work_once():
+    """Claim and run one batch of due jobs from each queue. Returns the number of jobs run."""
+    ran = 0
+    for model, run, _, label in QUEUES:
+        job_ids = claim_jobs(BATCH_SIZE, model=model)
+        for job_id in job_ids:
+            try:
+                # Writing the report bumps its table version, which invalidates the
+                # web workers' cached responses (see response_cache.py)
+                status = run(job_id)
+                print(f"🤖 {label} job {job_id}: {status}")
+            except Exception as e:
+                db.session.rollback()
+                print(f"❌ {label} job {job_id} crashed: {str(e)}")
+        ran += len(job_ids)
+    return ran
+
+
+def main():
+    print(f"🚀 Background worker started (poll every {POLL_INTERVAL}s)")
+    if LOCAL_CLASSIFIER:
+        # Start training now rather than when the first job arrives
+        local_classifier.start_training()
+    polls = 0
+    while True:
+        if polls % STALE_CHECK_EVERY == 0:
+            for _, _, requeue, label in QUEUES:
+                requeued = requeue()
+                if requeued:
+                    print(f"🔄 Released {requeued} stale {label.lower()} job(s)")
+            expired = expire_uploads()
+            if expired:
+                print(f"🧹 Removed {expired} abandoned resumable upload(s)")
+            unused = expire_unused_uploads()
+            if unused:
+                print(f"🧹 Removed {unused} completed upload(s) no report used")
+        polls += 1
+
+        if not work_once():
+            time.sleep(POLL_INTERVAL)
+
+
+if __name__ == "__main__":
+    with app.app_context():
+        try:
+            main()
+        except KeyboardInterrupt:
+            print("👋 Background worker stopped")